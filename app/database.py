@@ -1,18 +1,39 @@
+import os
+from contextlib import asynccontextmanager
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 from .utils.constants import (
-    DATABASE_URL, 
-    DB_POOL_SIZE, 
-    DB_MAX_OVERFLOW, 
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
     DB_POOL_TIMEOUT
 )
 
+# Serve requests from AsyncSession (asyncpg/aiosqlite) instead of the blocking Session
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+
+
+def get_async_database_url(url: str) -> str:
+    """Map a sync database URL onto its async driver"""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgresql+psycopg2:"):
+        return "postgresql+asyncpg:" + url[len("postgresql+psycopg2:"):]
+    if url.startswith("postgresql:"):
+        return "postgresql+asyncpg:" + url[len("postgresql:"):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", get_async_database_url(DATABASE_URL))
+
 # Create SQLAlchemy engine with configuration from environment
 if DATABASE_URL.startswith("sqlite"):
     # SQLite specific configuration
     engine = create_engine(
-        DATABASE_URL, 
+        DATABASE_URL,
         connect_args={"check_same_thread": False},
         echo=False  # Set to True for SQL debugging
     )
@@ -30,10 +51,35 @@ else:
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine is only built when enabled so the async drivers stay optional
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_ASYNC:
+    if ASYNC_DATABASE_URL.startswith("sqlite"):
+        async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+    else:
+        async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=True,
+            echo=False
+        )
+
+    # Objects stay loaded after commit; lazy refreshes cannot run outside run_sync
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
 # Create Base class for models
 Base = declarative_base()
 
-def get_db():
+def get_sync_db():
     """Dependency to get database session"""
     db = SessionLocal()
     try:
@@ -41,6 +87,84 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Dependency to get async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Routers depend on get_db; DB_ASYNC decides which session flavour they receive
+get_db = get_async_db if DB_ASYNC else get_sync_db
+
+async def run_db(db, fn, *args, **kwargs):
+    """Call fn(session, *args) on either a Session or an AsyncSession
+
+    Services are written against the sync Session API. On an AsyncSession
+    they run through run_sync, so IO goes through the async driver and
+    the event loop is never blocked.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return fn(db, *args, **kwargs)
+
+async def release_db(db):
+    """Close a request session early so a long-lived response does not pin a connection"""
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        db.close()
+
+async def stream_db(db, statement, batch_size: int):
+    """Yield the rows of a Core select in batches from a server-side cursor
+
+    Only one batch is held in memory however many rows match. On a
+    blocking Session each fetch runs in the threadpool.
+    """
+    statement = statement.execution_options(yield_per=batch_size)
+    if isinstance(db, AsyncSession):
+        result = await db.stream(statement)
+        async for batch in result.partitions():
+            yield batch
+    else:
+        batches = (await run_in_threadpool(db.execute, statement)).partitions()
+        while True:
+            batch = await run_in_threadpool(next, batches, None)
+            if batch is None:
+                return
+            yield batch
+
+@asynccontextmanager
+async def session_scope():
+    """Session for background work that runs outside a request"""
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+def get_db_mode() -> str:
+    """Name of the active database session mode"""
+    return "async" if DB_ASYNC else "sync"
+
+def get_pool_stats() -> dict:
+    """Connection pool usage of the engine serving requests"""
+    pool = async_engine.sync_engine.pool if DB_ASYNC else engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        capacity = pool.size() + max(0, getattr(pool, "_max_overflow", 0))
+        stats.update({
+            "size": pool.size(),
+            "capacity": capacity,
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "saturation": round(pool.checkedout() / capacity, 3) if capacity > 0 else None
+        })
+    return stats
+
 def create_tables():
     """Create all tables - useful for initialization"""
     Base.metadata.create_all(bind=engine)
@@ -51,4 +175,4 @@ def drop_tables():
 
 def get_engine():
     """Get the SQLAlchemy engine"""
-    return engine
\ No newline at end of file
+    return engine
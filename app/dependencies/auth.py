@@ -1,10 +1,11 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from ..database import get_db
+from ..database import get_db, run_db
 from ..models.user import User
 from ..models.session import Session as UserSession
 from ..utils.security import verify_token
+from ..utils.auth_cache import auth_cache
 from datetime import datetime
 
 security = HTTPBearer()
@@ -37,10 +38,25 @@ async def get_current_user(
     except Exception:
         raise credentials_exception
 
+    return await run_db(db, resolve_user, credentials.credentials, user_id)
+
+
+def resolve_user(db: Session, token: str, user_id: int) -> User:
+    """Load the token's user and check that a session is still active"""
+
+    # Serve repeat requests from the identity cache
+    user = auth_cache.get(db, token)
+    if user is not None:
+        return user
+
     # Get user from database
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
     # Check if session is still valid
     valid_session = db.query(UserSession).filter(
@@ -55,6 +71,8 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    auth_cache.set(token, user, valid_session.expires_at)
+
     return user
 
 
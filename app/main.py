@@ -1,8 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
+from .database import engine, async_engine, Base
 from .routers import auth, admin, teacher, student, constants, health
+from .services.ai_client import ai_http_client
+from .services.counter_service import counter_reconciler
+from .services.grading_service import grading_queue
+from .services.regrade_service import regrade_runner
 from .utils.constants import APP_NAME, APP_VERSION, APP_DESCRIPTION, DEBUG
+from .utils.query_stats import query_stats, QueryStatsMiddleware
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -26,6 +31,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Count SQL statements and DB time per request (X-DB-Queries / X-DB-Time headers in debug mode)
+query_stats.instrument(engine)
+if async_engine is not None:
+    query_stats.instrument(async_engine.sync_engine)
+app.add_middleware(QueryStatsMiddleware, add_headers=DEBUG)
+
 # Include routers
 app.include_router(health.router, prefix="", tags=["health"])  # No prefix for health endpoints
 app.include_router(constants.router, prefix="/app", tags=["constants"])
@@ -62,11 +73,26 @@ async def startup_event():
         print(f"❌ Configuration error: {e}")
         raise
 
+    # Open the pooled AI client once instead of per submission
+    await ai_http_client.start()
+
+    # Background grading workers (requeues submissions left ungraded)
+    await grading_queue.start()
+
+    # Resume bulk regrade jobs interrupted by a restart
+    await regrade_runner.start()
+
+    # Repair (or, after a migration, fill in) the stored student/submission counters
+    await counter_reconciler.start()
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
     print(f"👋 Shutting down {APP_NAME}")
 
-    # Optional: Clean up resources
-    # Close database connections, etc.
\ No newline at end of file
+    # Stop grading workers before closing pooled AI connections
+    await counter_reconciler.stop()
+    await regrade_runner.stop()
+    await grading_queue.stop()
+    await ai_http_client.close()
\ No newline at end of file
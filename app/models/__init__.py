@@ -4,5 +4,8 @@ from .group import Group
 from .homework import Homework
 from .submission import Submission, SubmissionFile
 from .grade import Grade
+from .leaderboard import LeaderboardEntry
+from .regrade_job import RegradeJob
 
-__all__ = ["User", "Session", "Group", "Homework", "Submission", "SubmissionFile", "Grade"]
\ No newline at end of file
+__all__ = ["User", "Session", "Group", "Homework", "Submission", "SubmissionFile", "Grade", "LeaderboardEntry",
+           "RegradeJob"]
\ No newline at end of file
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from ..database import Base
 
 
 class Grade(Base):
     __tablename__ = "grades"
+    __table_args__ = (
+        UniqueConstraint("submission_id", name="uq_grades_submission"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     submission_id = Column(Integer, ForeignKey("submissions.id"), nullable=False)
@@ -29,5 +32,10 @@ class Grade(Base):
 
     modified_by_teacher = Column(DateTime, nullable=True)  # When teacher changed grade
 
+    # Grading timings
+    queue_wait_ms = Column(Integer, nullable=True)  # Queued until a worker picked it up
+    grading_ms = Column(Integer, nullable=True)  # Time spent in the AI call
+    graded_at = Column(DateTime, nullable=True)
+
     # Relationships
     submission = relationship("Submission", back_populates="grade")
\ No newline at end of file
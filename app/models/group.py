@@ -9,7 +9,8 @@ class Group(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    student_count = Column(Integer, nullable=False, default=0, server_default="0")  # Kept by CounterService
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -6,6 +6,10 @@ from ..database import Base
 
 class Homework(Base):
     __tablename__ = "homework"
+    __table_args__ = (
+        Index("ix_homework_group_dates", "group_id", "start_date", "deadline"),
+        Index("ix_homework_teacher_created", "teacher_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -18,6 +22,8 @@ class Homework(Base):
     group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
     file_extension = Column(String, nullable=False)  # .py, .dart, etc.
     ai_grading_prompt = Column(Text, nullable=False)
+    prompt_token_budget = Column(Integer, nullable=True)  # Overrides AI_PROMPT_TOKEN_BUDGET
+    submission_count = Column(Integer, nullable=False, default=0, server_default="0")  # Kept by CounterService
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, UniqueConstraint, Index
+from datetime import datetime
+from ..database import Base
+
+
+class LeaderboardEntry(Base):
+    __tablename__ = "leaderboard_entries"
+    __table_args__ = (
+        UniqueConstraint("student_id", "period", "period_start", name="uq_leaderboard_student_bucket"),
+        Index("ix_leaderboard_group_bucket", "group_id", "period", "period_start", "total_points"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=True)  # Student's current group
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    period = Column(String, nullable=False)  # day, month, all (see leaderboard_service.PERIODS)
+    period_start = Column(Date, nullable=False)  # First day of the bucket
+    total_points = Column(Integer, nullable=False, default=0)
+    submission_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON
+from datetime import datetime
+from ..database import Base
+
+
+class RegradeJob(Base):
+    __tablename__ = "regrade_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    homework_id = Column(Integer, ForeignKey("homework.id"), nullable=False)
+    requested_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    include_teacher_modified = Column(Boolean, nullable=False, default=False)
+    filters = Column(JSON, nullable=True)  # student_ids, submitted_from, submitted_to
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, failed
+
+    # Progress; last_submission_id is the resume cursor (submissions run in id order)
+    total = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)  # Teacher-modified grades left alone
+    processed = Column(Integer, nullable=False, default=0)
+    succeeded = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    last_submission_id = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -1,11 +1,17 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 from ..database import Base
 
 
 class Submission(Base):
     __tablename__ = "submissions"
+    __table_args__ = (
+        # One submission per student and homework; also serves lookups by homework
+        UniqueConstraint("homework_id", "student_id", name="uq_submissions_homework_student"),
+        Index("ix_submissions_student_submitted", "student_id", "submitted_at"),
+        Index("ix_submissions_grading_status", "grading_status", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     homework_id = Column(Integer, ForeignKey("homework.id"), nullable=False)
@@ -16,6 +22,15 @@ class Submission(Base):
     ai_feedback = Column(Text, nullable=False)  # Short overall feedback
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Background grading: pending -> grading -> graded
+    # (needs_regrade when the AI was unavailable, failed after too many attempts)
+    grading_status = Column(String, nullable=False, default="pending", server_default="graded")
+    grading_attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    grading_queued_at = Column(DateTime, nullable=True)
+    grading_started_at = Column(DateTime, nullable=True)
+    graded_at = Column(DateTime, nullable=True)
+    grading_error = Column(Text, nullable=True)
+
     # Relationships
     homework = relationship("Homework", back_populates="submissions")
     student = relationship("User", back_populates="submissions")
@@ -27,9 +42,10 @@ class SubmissionFile(Base):
     __tablename__ = "submission_files"
 
     id = Column(Integer, primary_key=True, index=True)
-    submission_id = Column(Integer, ForeignKey("submissions.id"), nullable=False)
+    submission_id = Column(Integer, ForeignKey("submissions.id"), nullable=False, index=True)
     file_name = Column(Text, nullable=False)
-    content = Column(Text, nullable=False)  # Code content as string
+    # Code content as string; deferred so listing files does not read it (undefer() where it is needed)
+    content = deferred(Column(Text, nullable=False))
     line_count = Column(Integer, nullable=False)
 
     # Relationships
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -6,6 +6,10 @@ from ..database import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_group_role", "group_id", "role"),
+        Index("ix_users_role", "role"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     fullname = Column(String, nullable=False)
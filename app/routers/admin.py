@@ -1,27 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
+from typing import List, Optional
+from datetime import date
+from ..database import get_db, run_db, get_db_mode, get_pool_stats
 from ..dependencies.auth import get_current_admin
 from ..schemas.user import UserCreate, UserUpdate, UserResponse
 from ..schemas.group import GroupCreate, GroupUpdate, GroupResponse
-from ..services.grade_service import GradeService
+from ..schemas.page import Page
+from ..schemas.regrade import RegradeRequest, RegradeJobResponse
+from ..services.leaderboard_service import LeaderboardService
+from ..services.group_service import GroupService
+from ..services.user_service import UserService
+from ..services.ai_client import ai_http_client
+from ..services.ai_providers import provider_pool
+from ..services.grading_service import GradingService, grading_queue
+from ..services.circuit_breaker import ai_breaker
+from ..services.regrade_service import RegradeService, regrade_runner
+from ..services.grading_cache import grading_cache
+from ..services.counter_service import counter_reconciler
+from ..services.grading_stream import grading_events
+from ..services.ai_scheduler import ai_scheduler
 from ..models.user import User
-from ..models.group import Group
-from ..utils.security import get_password_hash
+from ..utils.security import get_password_hash_async
+from ..utils.auth_cache import auth_cache
+from ..utils.query_stats import query_stats
+from ..utils.pagination import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
 
 router = APIRouter()
 
 
 # Teachers CRUD
-@router.get("/teachers", response_model=List[UserResponse])
+@router.get("/teachers", response_model=Page[UserResponse])
 async def get_teachers(
+        cursor: Optional[str] = None,
+        limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+        with_total: bool = False,
         current_user: User = Depends(get_current_admin),
         db: Session = Depends(get_db)
 ):
-    """Get all teachers"""
-    teachers = db.query(User).filter(User.role == "teacher").all()
-    return [UserResponse.from_orm(teacher) for teacher in teachers]
+    """Get a page of teachers"""
+    page = await run_db(db, UserService.get_users, "teacher", None, cursor, limit, with_total)
+    return {**page, "items": [UserResponse.model_validate(teacher) for teacher in page["items"]]}
 
 
 @router.post("/teachers", response_model=UserResponse)
@@ -39,28 +58,11 @@ async def create_teacher(
             detail="Role must be 'teacher'"
         )
 
-    # Check if username already exists
-    existing_user = db.query(User).filter(User.username == teacher_data.username).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already exists"
-        )
-
     # Create teacher
-    teacher = User(
-        fullname=teacher_data.fullname,
-        username=teacher_data.username,
-        password_hash=get_password_hash(teacher_data.password),
-        role=teacher_data.role,
-        group_id=teacher_data.group_id
-    )
+    password_hash = await get_password_hash_async(teacher_data.password)
+    teacher = await run_db(db, UserService.create_user, teacher_data, password_hash)
 
-    db.add(teacher)
-    db.commit()
-    db.refresh(teacher)
-
-    return UserResponse.from_orm(teacher)
+    return UserResponse.model_validate(teacher)
 
 
 @router.put("/teachers/{teacher_id}", response_model=UserResponse)
@@ -72,28 +74,13 @@ async def update_teacher(
 ):
     """Update teacher"""
 
-    teacher = db.query(User).filter(
-        User.id == teacher_id,
-        User.role == "teacher"
-    ).first()
-
-    if not teacher:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Teacher not found"
-        )
-
-    # Update fields
-    for field, value in teacher_data.dict(exclude_unset=True).items():
-        if field == "password" and value:
-            setattr(teacher, "password_hash", get_password_hash(value))
-        elif value is not None:
-            setattr(teacher, field, value)
+    password_hash = None
+    if teacher_data.password:
+        password_hash = await get_password_hash_async(teacher_data.password)
 
-    db.commit()
-    db.refresh(teacher)
+    teacher = await run_db(db, UserService.update_user, teacher_id, "teacher", teacher_data, password_hash)
 
-    return UserResponse.from_orm(teacher)
+    return UserResponse.model_validate(teacher)
 
 
 @router.delete("/teachers/{teacher_id}")
@@ -104,47 +91,25 @@ async def delete_teacher(
 ):
     """Delete teacher"""
 
-    teacher = db.query(User).filter(
-        User.id == teacher_id,
-        User.role == "teacher"
-    ).first()
-
-    if not teacher:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Teacher not found"
-        )
-
-    # Check if teacher has assigned groups
-    group_count = db.query(Group).filter(Group.teacher_id == teacher_id).count()
-    if group_count > 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot delete teacher with assigned groups"
-        )
-
-    db.delete(teacher)
-    db.commit()
+    await run_db(db, UserService.delete_teacher, teacher_id)
 
     return {"message": "Teacher deleted successfully"}
 
 
 # Students CRUD
-@router.get("/students", response_model=List[UserResponse])
+@router.get("/students", response_model=Page[UserResponse])
 async def get_students(
         group_id: int = None,
+        cursor: Optional[str] = None,
+        limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+        with_total: bool = False,
         current_user: User = Depends(get_current_admin),
         db: Session = Depends(get_db)
 ):
-    """Get all students, optionally filtered by group"""
-
-    query = db.query(User).filter(User.role == "student")
+    """Get a page of students, optionally filtered by group"""
 
-    if group_id:
-        query = query.filter(User.group_id == group_id)
-
-    students = query.all()
-    return [UserResponse.from_orm(student) for student in students]
+    page = await run_db(db, UserService.get_users, "student", group_id, cursor, limit, with_total)
+    return {**page, "items": [UserResponse.model_validate(student) for student in page["items"]]}
 
 
 @router.post("/students", response_model=UserResponse)
@@ -162,37 +127,11 @@ async def create_student(
             detail="Role must be 'student'"
         )
 
-    # Check if username already exists
-    existing_user = db.query(User).filter(User.username == student_data.username).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already exists"
-        )
-
-    # Validate group if provided
-    if student_data.group_id:
-        group = db.query(Group).filter(Group.id == student_data.group_id).first()
-        if not group:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Group not found"
-            )
-
     # Create student
-    student = User(
-        fullname=student_data.fullname,
-        username=student_data.username,
-        password_hash=get_password_hash(student_data.password),
-        role=student_data.role,
-        group_id=student_data.group_id
-    )
+    password_hash = await get_password_hash_async(student_data.password)
+    student = await run_db(db, UserService.create_user, student_data, password_hash)
 
-    db.add(student)
-    db.commit()
-    db.refresh(student)
-
-    return UserResponse.from_orm(student)
+    return UserResponse.model_validate(student)
 
 
 @router.put("/students/{student_id}", response_model=UserResponse)
@@ -204,37 +143,13 @@ async def update_student(
 ):
     """Update student"""
 
-    student = db.query(User).filter(
-        User.id == student_id,
-        User.role == "student"
-    ).first()
-
-    if not student:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Student not found"
-        )
-
-    # Validate group if provided
-    if student_data.group_id:
-        group = db.query(Group).filter(Group.id == student_data.group_id).first()
-        if not group:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Group not found"
-            )
+    password_hash = None
+    if student_data.password:
+        password_hash = await get_password_hash_async(student_data.password)
 
-    # Update fields
-    for field, value in student_data.dict(exclude_unset=True).items():
-        if field == "password" and value:
-            setattr(student, "password_hash", get_password_hash(value))
-        elif value is not None:
-            setattr(student, field, value)
+    student = await run_db(db, UserService.update_user, student_id, "student", student_data, password_hash)
 
-    db.commit()
-    db.refresh(student)
-
-    return UserResponse.from_orm(student)
+    return UserResponse.model_validate(student)
 
 
 @router.delete("/students/{student_id}")
@@ -245,47 +160,26 @@ async def delete_student(
 ):
     """Delete student"""
 
-    student = db.query(User).filter(
-        User.id == student_id,
-        User.role == "student"
-    ).first()
-
-    if not student:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Student not found"
-        )
-
-    # Check if student has submissions
-    from ..models.submission import Submission
-    submission_count = db.query(Submission).filter(Submission.student_id == student_id).count()
-    if submission_count > 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot delete student with submissions"
-        )
-
-    db.delete(student)
-    db.commit()
+    await run_db(db, UserService.delete_student, student_id)
 
     return {"message": "Student deleted successfully"}
 
 
 # Groups CRUD
-@router.get("/groups", response_model=List[GroupResponse])
+@router.get("/groups", response_model=Page[GroupResponse])
 async def get_groups(
+        cursor: Optional[str] = None,
+        limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+        with_total: bool = False,
         current_user: User = Depends(get_current_admin),
         db: Session = Depends(get_db)
 ):
-    """Get all groups"""
+    """Get a page of groups"""
 
-    groups = db.query(Group).all()
+    page = await run_db(db, GroupService.get_groups, cursor, limit, with_total)
 
     response_data = []
-    for group in groups:
-        # Count students
-        student_count = db.query(User).filter(User.group_id == group.id).count()
-
+    for group in page["items"]:
         # Get teacher name
         teacher_name = None
         if group.teacher:
@@ -297,10 +191,10 @@ async def get_groups(
             teacher_id=group.teacher_id,
             created_at=group.created_at,
             teacher_name=teacher_name,
-            student_count=student_count
+            student_count=group.student_count
         ))
 
-    return response_data
+    return {**page, "items": response_data}
 
 
 @router.post("/groups", response_model=GroupResponse)
@@ -311,34 +205,14 @@ async def create_group(
 ):
     """Create new group"""
 
-    # Validate teacher
-    teacher = db.query(User).filter(
-        User.id == group_data.teacher_id,
-        User.role == "teacher"
-    ).first()
-
-    if not teacher:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Teacher not found"
-        )
-
-    # Create group
-    group = Group(
-        name=group_data.name,
-        teacher_id=group_data.teacher_id
-    )
-
-    db.add(group)
-    db.commit()
-    db.refresh(group)
+    group = await run_db(db, GroupService.create_group, group_data)
 
     return GroupResponse(
         id=group.id,
         name=group.name,
         teacher_id=group.teacher_id,
         created_at=group.created_at,
-        teacher_name=teacher.fullname,
+        teacher_name=group.teacher.fullname,
         student_count=0
     )
 
@@ -352,37 +226,9 @@ async def update_group(
 ):
     """Update group"""
 
-    group = db.query(Group).filter(Group.id == group_id).first()
-
-    if not group:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Group not found"
-        )
-
-    # Validate teacher if provided
-    if group_data.teacher_id:
-        teacher = db.query(User).filter(
-            User.id == group_data.teacher_id,
-            User.role == "teacher"
-        ).first()
-
-        if not teacher:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Teacher not found"
-            )
-
-    # Update fields
-    for field, value in group_data.dict(exclude_unset=True).items():
-        if value is not None:
-            setattr(group, field, value)
-
-    db.commit()
-    db.refresh(group)
+    group = await run_db(db, GroupService.update_group, group_id, group_data)
 
     # Get updated info
-    student_count = db.query(User).filter(User.group_id == group.id).count()
     teacher_name = group.teacher.fullname if group.teacher else None
 
     return GroupResponse(
@@ -391,7 +237,7 @@ async def update_group(
         teacher_id=group.teacher_id,
         created_at=group.created_at,
         teacher_name=teacher_name,
-        student_count=student_count
+        student_count=group.student_count
     )
 
 
@@ -403,33 +249,7 @@ async def delete_group(
 ):
     """Delete group"""
 
-    group = db.query(Group).filter(Group.id == group_id).first()
-
-    if not group:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Group not found"
-        )
-
-    # Check if group has students
-    student_count = db.query(User).filter(User.group_id == group_id).count()
-    if student_count > 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot delete group with assigned students"
-        )
-
-    # Check if group has homework
-    from ..models.homework import Homework
-    homework_count = db.query(Homework).filter(Homework.group_id == group_id).count()
-    if homework_count > 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot delete group with assigned homework"
-        )
-
-    db.delete(group)
-    db.commit()
+    await run_db(db, GroupService.delete_group, group_id)
 
     return {"message": "Group deleted successfully"}
 
@@ -444,30 +264,7 @@ async def move_student_to_group(
 ):
     """Move student to different group"""
 
-    # Get student
-    student = db.query(User).filter(
-        User.id == student_id,
-        User.role == "student"
-    ).first()
-
-    if not student:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Student not found"
-        )
-
-    # Validate group
-    if group_id:
-        group = db.query(Group).filter(Group.id == group_id).first()
-        if not group:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Group not found"
-            )
-
-    # Update student group
-    student.group_id = group_id
-    db.commit()
+    await run_db(db, UserService.move_student_to_group, student_id, group_id)
 
     return {"message": f"Student moved to group {group_id}" if group_id else "Student removed from group"}
 
@@ -481,29 +278,7 @@ async def assign_teacher_to_group(
 ):
     """Assign teacher to group"""
 
-    # Get group
-    group = db.query(Group).filter(Group.id == group_id).first()
-    if not group:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Group not found"
-        )
-
-    # Validate teacher
-    teacher = db.query(User).filter(
-        User.id == teacher_id,
-        User.role == "teacher"
-    ).first()
-
-    if not teacher:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Teacher not found"
-        )
-
-    # Update group teacher
-    group.teacher_id = teacher_id
-    db.commit()
+    group, teacher = await run_db(db, GroupService.assign_teacher, group_id, teacher_id)
 
     return {"message": f"Teacher {teacher.fullname} assigned to group {group.name}"}
 
@@ -512,18 +287,17 @@ async def assign_teacher_to_group(
 async def get_group_leaderboard(
         group_id: int,
         period: str = "all",
+        date_from: Optional[date] = Query(None, alias="from"),
+        date_to: Optional[date] = Query(None, alias="to"),
+        limit: Optional[int] = Query(None, ge=1, le=500),
+        offset: int = Query(0, ge=0),
         current_user: User = Depends(get_current_admin),
         db: Session = Depends(get_db)
 ):
     """Get leaderboard for any group (admin view)"""
 
     # Verify group exists
-    group = db.query(Group).filter(Group.id == group_id).first()
-    if not group:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Group not found"
-        )
+    group = await run_db(db, GroupService.get_group, group_id)
 
     if period not in ["day", "week", "month", "all"]:
         raise HTTPException(
@@ -531,11 +305,177 @@ async def get_group_leaderboard(
             detail="Period must be one of: day, week, month, all"
         )
 
-    leaderboard = GradeService.get_group_leaderboard(db, group_id, period)
+    leaderboard = await run_db(
+        db, LeaderboardService.get_group_leaderboard, group_id, period, date_from, date_to,
+        limit=limit,
+        offset=offset
+    )
 
     return {
         "group_id": group_id,
         "group_name": group.name,
         "period": period,
+        "from": date_from,
+        "to": date_to,
+        "limit": limit,
+        "offset": offset,
         "leaderboard": leaderboard
+    }
+
+
+@router.get("/leaderboard")
+async def get_global_leaderboard(
+        period: str = "all",
+        date_from: Optional[date] = Query(None, alias="from"),
+        date_to: Optional[date] = Query(None, alias="to"),
+        limit: Optional[int] = Query(100, ge=1, le=500),
+        offset: int = Query(0, ge=0),
+        current_user: User = Depends(get_current_admin),
+        db: Session = Depends(get_db)
+):
+    """Get leaderboard across all groups (admin view)"""
+
+    if period not in ["day", "week", "month", "all"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Period must be one of: day, week, month, all"
+        )
+
+    leaderboard = await run_db(
+        db, LeaderboardService.get_group_leaderboard, None, period, date_from, date_to,
+        limit=limit,
+        offset=offset
+    )
+
+    return {
+        "period": period,
+        "from": date_from,
+        "to": date_to,
+        "limit": limit,
+        "offset": offset,
+        "leaderboard": leaderboard
+    }
+
+
+@router.post(
+    "/homework/{homework_id}/regrade",
+    response_model=RegradeJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def regrade_homework(
+        homework_id: int,
+        regrade_data: Optional[RegradeRequest] = None,
+        current_user: User = Depends(get_current_admin),
+        db: Session = Depends(get_db)
+):
+    """Regrade submissions of any homework in the background"""
+
+    job = await run_db(
+        db, RegradeService.create_job, homework_id, current_user.id,
+        regrade_data or RegradeRequest()
+    )
+    regrade_runner.submit(job.id)
+
+    return RegradeJobResponse(**RegradeService.describe_job(job))
+
+
+@router.get("/regrade-jobs", response_model=List[RegradeJobResponse])
+async def get_regrade_jobs(
+        limit: int = Query(50, ge=1, le=500),
+        current_user: User = Depends(get_current_admin),
+        db: Session = Depends(get_db)
+):
+    """Get recent regrade jobs"""
+
+    jobs = await run_db(db, RegradeService.get_jobs, limit)
+
+    return [RegradeJobResponse(**RegradeService.describe_job(job)) for job in jobs]
+
+
+@router.get("/regrade-jobs/{job_id}", response_model=RegradeJobResponse)
+async def get_regrade_job(
+        job_id: int,
+        current_user: User = Depends(get_current_admin),
+        db: Session = Depends(get_db)
+):
+    """Get progress of a regrade job"""
+
+    job = await run_db(db, RegradeService.get_job, job_id)
+
+    return RegradeJobResponse(**RegradeService.describe_job(job))
+
+
+@router.get("/diagnostics")
+async def get_diagnostics(
+        current_user: User = Depends(get_current_admin)
+):
+    """Get runtime cache and performance counters"""
+
+    return {
+        "db_mode": get_db_mode(),
+        "db_pool": get_pool_stats(),
+        "auth_cache": auth_cache.stats(),
+        "ai_http_client": ai_http_client.stats(),
+        "grading_queue": grading_queue.stats(),
+        "grading_cache": grading_cache.stats(),
+        "ai_scheduler": ai_scheduler.stats(),
+        "ai_providers": provider_pool.stats(),
+        "ai_breaker": ai_breaker.stats(),
+        "regrade_runner": regrade_runner.stats(),
+        "grading_stream": grading_events.stats(),
+        "db_queries": query_stats.stats(),
+        "counters": counter_reconciler.stats()
+    }
+
+
+@router.post("/counters/reconcile")
+async def reconcile_counters(
+        current_user: User = Depends(get_current_admin)
+):
+    """Recount students per group and submissions per homework, fixing any drift"""
+
+    repaired = await counter_reconciler.reconcile()
+    return {"repaired": repaired}
+
+
+@router.get("/db-queries")
+async def get_db_query_report(
+        current_user: User = Depends(get_current_admin)
+):
+    """Get SQL statement counts and DB time per route, heaviest first"""
+
+    return {
+        "repeat_threshold": query_stats.repeat_threshold,
+        "routes": query_stats.report()
+    }
+
+
+@router.post("/db-queries/reset")
+async def reset_db_query_report(
+        current_user: User = Depends(get_current_admin)
+):
+    """Clear the per-route SQL statistics"""
+
+    query_stats.reset()
+    return {"message": "Query statistics reset"}
+
+
+@router.get("/grading")
+async def get_grading_status(
+        current_user: User = Depends(get_current_admin),
+        db: Session = Depends(get_db)
+):
+    """Get AI circuit breaker state and the regrade backlog"""
+
+    by_status = await run_db(db, GradingService.count_by_status)
+
+    return {
+        "breaker": ai_breaker.stats(),
+        "backlog": {
+            "pending": by_status.get("pending", 0) + by_status.get("grading", 0),
+            "needs_regrade": by_status.get("needs_regrade", 0),
+            "failed": by_status.get("failed", 0)
+        },
+        "submissions_by_status": by_status,
+        "queue": grading_queue.stats()
     }
\ No newline at end of file
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from typing import List
-from ..database import get_db
+from ..database import get_db, run_db
 from ..schemas.auth import LoginRequest, LoginResponse, SessionResponse, DeviceConflictResponse
 from ..schemas.user import UserResponse
 from ..services.auth_service import AuthService
 from ..dependencies.auth import get_current_active_user
 from ..models.user import User
+from ..utils.constants import MAX_SESSIONS_PER_USER
 
 router = APIRouter()
 
@@ -22,8 +23,10 @@ async def login(
     # Get client IP
     ip_address = request.client.host
 
-    # Authenticate user
-    user = AuthService.authenticate_user(db, login_data.username, login_data.password)
+    # Authenticate user (user row and active session count come from one query)
+    user, active_session_count = await AuthService.authenticate_user_with_session_count(
+        db, login_data.username, login_data.password
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -31,32 +34,21 @@ async def login(
         )
 
     # Check session limit
-    if AuthService.check_session_limit(db, user.id):
+    if active_session_count >= MAX_SESSIONS_PER_USER:
         # Return device conflict - frontend should handle this
-        active_sessions = AuthService.get_user_sessions(db, user.id)
-        sessions_data = [
-            SessionResponse(
-                id=s.id,
-                device_name=s.device_name,
-                ip_address=s.ip_address,
-                last_login=s.last_login,
-                expires_at=s.expires_at
-            ) for s in active_sessions
-        ]
-
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Maximum devices reached. Use /auth/login/force to override."
         )
 
     # Create new session
-    access_token, session = AuthService.create_session(
-        db, user, login_data.device_name, ip_address
+    access_token, session = await run_db(
+        db, AuthService.create_session, user, login_data.device_name, ip_address
     )
 
     return LoginResponse(
         access_token=access_token,
-        user=UserResponse.from_orm(user).dict()
+        user=UserResponse.model_validate(user).model_dump()
     )
 
 
@@ -73,7 +65,9 @@ async def force_login(
     ip_address = request.client.host
 
     # Authenticate user
-    user = AuthService.authenticate_user(db, login_data.username, login_data.password)
+    user, _ = await AuthService.authenticate_user_with_session_count(
+        db, login_data.username, login_data.password
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -81,20 +75,20 @@ async def force_login(
         )
 
     # Logout the specified session
-    if not AuthService.delete_session(db, logout_session_id, user.id):
+    if not await run_db(db, AuthService.delete_session, logout_session_id, user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Session not found"
         )
 
     # Create new session
-    access_token, session = AuthService.create_session(
-        db, user, login_data.device_name, ip_address
+    access_token, session = await run_db(
+        db, AuthService.create_session, user, login_data.device_name, ip_address
     )
 
     return LoginResponse(
         access_token=access_token,
-        user=UserResponse.from_orm(user).dict()
+        user=UserResponse.model_validate(user).model_dump()
     )
 
 
@@ -117,7 +111,7 @@ async def get_sessions(
         db: Session = Depends(get_db)
 ):
     """Get user's active sessions"""
-    sessions = AuthService.get_user_sessions(db, current_user.id)
+    sessions = await run_db(db, AuthService.get_user_sessions, current_user.id)
 
     return [
         SessionResponse(
@@ -138,7 +132,7 @@ async def delete_session(
 ):
     """Delete/logout a specific session"""
 
-    if not AuthService.delete_session(db, session_id, current_user.id):
+    if not await run_db(db, AuthService.delete_session, session_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Session not found"
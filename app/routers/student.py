@@ -1,25 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
+from typing import List, Optional
+from datetime import date
+from ..database import get_db, run_db, release_db, session_scope
 from ..dependencies.auth import get_current_student
 from ..schemas.homework import HomeworkResponse
-from ..schemas.submission import SubmissionCreate, SubmissionResponse
+from ..schemas.submission import SubmissionCreate, SubmissionResponse, SubmissionStatusResponse
 from ..schemas.grade import GradeResponse
+from ..schemas.page import Page
 from ..services.homework_service import HomeworkService
 from ..services.grade_service import GradeService
+from ..services.leaderboard_service import LeaderboardService
+from ..services.grading_stream import GRADING_STREAM_HEARTBEAT_SECONDS, grading_events, sse_event
+from ..models.submission import Submission
 from ..models.user import User
+from ..utils.fast_json import FAST_JSON_RESPONSES, FastJSONResponse
+from ..utils.pagination import PAGE_SIZE_MAX
 
 router = APIRouter()
 
+# Statuses after which a submission's event stream ends
+STREAM_END_STATUSES = ("graded", "needs_regrade", "failed")
+
+
+def submission_status(submission: Submission) -> SubmissionStatusResponse:
+    """Grading progress of a submission loaded with its grade"""
+    grade = submission.grade
+    graded = submission.grading_status == "graded"
+
+    return SubmissionStatusResponse(
+        submission_id=submission.id,
+        grading_status=submission.grading_status,
+        queued_at=submission.grading_queued_at,
+        grading_started_at=submission.grading_started_at,
+        graded_at=submission.graded_at,
+        queue_wait_ms=grade.queue_wait_ms if grade else None,
+        grading_ms=grade.grading_ms if grade else None,
+        final_grade=submission.final_grade if graded else None,
+        ai_feedback=submission.ai_feedback if graded else None,
+        error=submission.grading_error
+    )
+
 
 @router.get("/leaderboard")
 async def get_leaderboard(
         period: str = "all",
+        date_from: Optional[date] = Query(None, alias="from"),
+        date_to: Optional[date] = Query(None, alias="to"),
+        limit: Optional[int] = Query(None, ge=1, le=500),
+        offset: int = Query(0, ge=0),
+        around_me: Optional[int] = Query(None, ge=0, le=50),
         current_user: User = Depends(get_current_student),
         db: Session = Depends(get_db)
 ):
-    """Get leaderboard for student's group"""
+    """Get leaderboard for student's group
+
+    Use limit/offset for pages, or around_me=N for the N places above and
+    below the current student.
+    """
 
     if not current_user.group_id:
         raise HTTPException(
@@ -33,13 +73,58 @@ async def get_leaderboard(
             detail="Period must be one of: day, week, month, all"
         )
 
-    leaderboard = GradeService.get_group_leaderboard(
-        db, current_user.group_id, period
+    leaderboard = await run_db(
+        db, LeaderboardService.get_group_leaderboard, current_user.group_id, period, date_from, date_to,
+        limit=limit,
+        offset=offset,
+        around_student_id=current_user.id if around_me is not None else None,
+        around=around_me or 0
     )
 
     return {
         "group_id": current_user.group_id,
         "period": period,
+        "from": date_from,
+        "to": date_to,
+        "limit": limit,
+        "offset": offset,
+        "leaderboard": leaderboard
+    }
+
+
+@router.get("/leaderboard/global")
+async def get_global_leaderboard(
+        period: str = "all",
+        date_from: Optional[date] = Query(None, alias="from"),
+        date_to: Optional[date] = Query(None, alias="to"),
+        limit: Optional[int] = Query(100, ge=1, le=500),
+        offset: int = Query(0, ge=0),
+        around_me: Optional[int] = Query(None, ge=0, le=50),
+        current_user: User = Depends(get_current_student),
+        db: Session = Depends(get_db)
+):
+    """Get leaderboard across all groups"""
+
+    if period not in ["day", "week", "month", "all"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Period must be one of: day, week, month, all"
+        )
+
+    leaderboard = await run_db(
+        db, LeaderboardService.get_group_leaderboard, None, period, date_from, date_to,
+        limit=limit,
+        offset=offset,
+        around_student_id=current_user.id if around_me is not None else None,
+        around=around_me or 0
+    )
+
+    return {
+        "period": period,
+        "from": date_from,
+        "to": date_to,
+        "limit": limit,
+        "offset": offset,
         "leaderboard": leaderboard
     }
 
@@ -51,7 +136,11 @@ async def get_available_homework(
 ):
     """Get available homework for student"""
 
-    homework_list = HomeworkService.get_student_homework(db, current_user.id)
+    if FAST_JSON_RESPONSES:
+        rows = await run_db(db, HomeworkService.get_student_homework_rows, current_user.id)
+        return FastJSONResponse(List[HomeworkResponse], rows)
+
+    homework_list = await run_db(db, HomeworkService.get_student_homework, current_user.id)
 
     # Convert to response format
     response_data = []
@@ -77,14 +166,22 @@ async def get_available_homework(
     return response_data
 
 
-@router.post("/homework/{homework_id}/submit", response_model=SubmissionResponse)
+@router.post(
+    "/homework/{homework_id}/submit",
+    response_model=SubmissionResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
 async def submit_homework(
         homework_id: int,
         submission_data: SubmissionCreate,
         current_user: User = Depends(get_current_student),
         db: Session = Depends(get_db)
 ):
-    """Submit homework solution"""
+    """Submit homework solution
+
+    The submission is stored as pending and graded in the background;
+    poll /student/submissions/{id}/status for the result.
+    """
 
     homework_service = HomeworkService()
 
@@ -110,6 +207,7 @@ async def submit_homework(
             ai_grade=submission.ai_grade,
             final_grade=submission.final_grade,
             ai_feedback=submission.ai_feedback,
+            grading_status=submission.grading_status,
             homework_title=submission.homework.title if submission.homework else None,
             student_name=current_user.fullname,
             files=[]  # Files can be loaded separately if needed
@@ -124,18 +222,26 @@ async def submit_homework(
         )
 
 
-@router.get("/submissions", response_model=List[SubmissionResponse])
+@router.get("/submissions", response_model=Page[SubmissionResponse])
 async def get_submissions(
-        limit: int = 20,
+        cursor: Optional[str] = None,
+        limit: int = Query(20, ge=1, le=PAGE_SIZE_MAX),
+        with_total: bool = False,
         current_user: User = Depends(get_current_student),
         db: Session = Depends(get_db)
 ):
-    """Get student's submission history"""
+    """Get a page of the student's submission history, newest first"""
 
-    submissions = GradeService.get_student_submissions(db, current_user.id, limit)
+    if FAST_JSON_RESPONSES:
+        page = await run_db(
+            db, GradeService.get_student_submission_rows, current_user.id, limit, cursor, with_total
+        )
+        return FastJSONResponse(Page[SubmissionResponse], page)
+
+    page = await run_db(db, GradeService.get_student_submissions, current_user.id, limit, cursor, with_total)
 
     response_data = []
-    for submission in submissions:
+    for submission in page["items"]:
         response_data.append(SubmissionResponse(
             id=submission.id,
             homework_id=submission.homework_id,
@@ -144,12 +250,88 @@ async def get_submissions(
             ai_grade=submission.ai_grade,
             final_grade=submission.final_grade,
             ai_feedback=submission.ai_feedback,
+            grading_status=submission.grading_status,
             homework_title=submission.homework.title if submission.homework else None,
             student_name=current_user.fullname,
             files=[]  # Files can be loaded separately if needed
         ))
 
-    return response_data
+    return {**page, "items": response_data}
+
+
+@router.get("/submissions/{submission_id}/status", response_model=SubmissionStatusResponse)
+async def get_submission_status(
+        submission_id: int,
+        current_user: User = Depends(get_current_student),
+        db: Session = Depends(get_db)
+):
+    """Get grading progress for a submission"""
+
+    submission = await run_db(db, GradeService.get_student_submission, submission_id, current_user.id)
+
+    return submission_status(submission)
+
+
+@router.get("/submissions/{submission_id}/events")
+async def stream_submission_events(
+        submission_id: int,
+        current_user: User = Depends(get_current_student),
+        db: Session = Depends(get_db)
+):
+    """Follow grading as Server-Sent Events
+
+    Sends a "status" event straight away, "feedback" events ({field, text})
+    while the AI writes its feedback (with AI_STREAM_GRADING enabled),
+    "reset" if a retry restarts the feedback, and a final "status" event
+    once grading has ended.
+    """
+
+    await run_db(db, GradeService.get_student_submission, submission_id, current_user.id)
+    # The stream can outlive the request session by many seconds
+    await release_db(db)
+    student_id = current_user.id
+
+    async def current_status() -> dict:
+        async with session_scope() as status_db:
+            submission = await run_db(status_db, GradeService.get_student_submission, submission_id, student_id)
+        return submission_status(submission).model_dump(mode="json")
+
+    async def events():
+        # Subscribe before reading the status so no event falls in between
+        queue = grading_events.subscribe(submission_id)
+        try:
+            current = await current_status()
+            yield sse_event("status", current)
+            if current["grading_status"] in STREAM_END_STATUSES:
+                return
+
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), GRADING_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    current = await current_status()
+                    if current["grading_status"] in STREAM_END_STATUSES:
+                        yield sse_event("status", current)
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if item is None:
+                    current = await current_status()
+                    yield sse_event("status", current)
+                    if current["grading_status"] in STREAM_END_STATUSES:
+                        return
+                    continue
+
+                yield sse_event(*item)
+        finally:
+            grading_events.unsubscribe(submission_id, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/submissions/{submission_id}/grade", response_model=GradeResponse)
@@ -160,24 +342,6 @@ async def get_submission_grade(
 ):
     """Get detailed grade information for a submission"""
 
-    # Verify submission belongs to current student
-    from ..models.submission import Submission
-    submission = db.query(Submission).filter(
-        Submission.id == submission_id,
-        Submission.student_id == current_user.id
-    ).first()
-
-    if not submission:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Submission not found"
-        )
-
-    grade = GradeService.get_grade_by_submission(db, submission_id)
-    if not grade:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Grade not found"
-        )
+    grade = await run_db(db, GradeService.get_student_submission_grade, submission_id, current_user.id)
 
-    return GradeResponse.from_orm(grade)
\ No newline at end of file
+    return GradeResponse.model_validate(grade)
\ No newline at end of file
@@ -1,38 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ..database import get_db
+from datetime import date
+from ..database import get_db, run_db, release_db, session_scope
 from ..dependencies.auth import get_current_teacher
 from ..schemas.homework import HomeworkCreate, HomeworkUpdate, HomeworkResponse
 from ..schemas.submission import SubmissionResponse
 from ..schemas.grade import GradeUpdate, GradeResponse
 from ..schemas.group import GroupResponse
+from ..schemas.page import Page
+from ..schemas.regrade import RegradeRequest, RegradeJobResponse
 from ..services.homework_service import HomeworkService
 from ..services.grade_service import GradeService
+from ..services.leaderboard_service import LeaderboardService
+from ..services.group_service import GroupService
+from ..services.regrade_service import RegradeService, regrade_runner
+from ..services.export_service import EXPORT_FORMATS, EXPORT_VIEWS, ExportService
 from ..models.user import User
-from ..models.group import Group
+from ..utils.fast_json import FAST_JSON_RESPONSES, FastJSONResponse
+from ..utils.pagination import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
 
 router = APIRouter()
 
 
 # Homework CRUD
-@router.get("/homework", response_model=List[HomeworkResponse])
+@router.get("/homework", response_model=Page[HomeworkResponse])
 async def get_homework(
+        cursor: Optional[str] = None,
+        limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+        with_total: bool = False,
         current_user: User = Depends(get_current_teacher),
         db: Session = Depends(get_db)
 ):
-    """Get all homework created by the teacher"""
+    """Get a page of the homework created by the teacher, oldest first"""
 
-    homework_list = HomeworkService.get_teacher_homework(db, current_user.id)
+    if FAST_JSON_RESPONSES:
+        page = await run_db(
+            db, HomeworkService.get_teacher_homework_rows, current_user.id, cursor, limit, with_total
+        )
+        return FastJSONResponse(Page[HomeworkResponse], page)
 
-    response_data = []
-    for hw in homework_list:
-        # Count submissions
-        from ..models.submission import Submission
-        submission_count = db.query(Submission).filter(
-            Submission.homework_id == hw.id
-        ).count()
+    page = await run_db(db, HomeworkService.get_teacher_homework, current_user.id, cursor, limit, with_total)
 
+    response_data = []
+    for hw in page["items"]:
         hw_dict = {
             "id": hw.id,
             "title": hw.title,
@@ -45,13 +57,14 @@ async def get_homework(
             "teacher_id": hw.teacher_id,
             "group_id": hw.group_id,
             "created_at": hw.created_at,
+            "prompt_token_budget": hw.prompt_token_budget,
             "teacher_name": current_user.fullname,
             "group_name": hw.group.name if hw.group else None,
-            "submission_count": submission_count
+            "submission_count": hw.submission_count
         }
         response_data.append(HomeworkResponse(**hw_dict))
 
-    return response_data
+    return {**page, "items": response_data}
 
 
 @router.post("/homework", response_model=HomeworkResponse)
@@ -62,7 +75,7 @@ async def create_homework(
 ):
     """Create new homework"""
 
-    homework = HomeworkService.create_homework(db, homework_data, current_user.id)
+    homework = await run_db(db, HomeworkService.create_homework, homework_data, current_user.id)
 
     return HomeworkResponse(
         id=homework.id,
@@ -76,6 +89,7 @@ async def create_homework(
         teacher_id=homework.teacher_id,
         group_id=homework.group_id,
         created_at=homework.created_at,
+        prompt_token_budget=homework.prompt_token_budget,
         teacher_name=current_user.fullname,
         group_name=homework.group.name if homework.group else None,
         submission_count=0
@@ -91,7 +105,7 @@ async def update_homework(
 ):
     """Update existing homework"""
 
-    homework = HomeworkService.update_homework(db, homework_id, homework_data, current_user.id)
+    homework = await run_db(db, HomeworkService.update_homework, homework_id, homework_data, current_user.id)
 
     if not homework:
         raise HTTPException(
@@ -99,12 +113,6 @@ async def update_homework(
             detail="Homework not found or you don't have access"
         )
 
-    # Count submissions
-    from ..models.submission import Submission
-    submission_count = db.query(Submission).filter(
-        Submission.homework_id == homework.id
-    ).count()
-
     return HomeworkResponse(
         id=homework.id,
         title=homework.title,
@@ -117,9 +125,10 @@ async def update_homework(
         teacher_id=homework.teacher_id,
         group_id=homework.group_id,
         created_at=homework.created_at,
+        prompt_token_budget=homework.prompt_token_budget,
         teacher_name=current_user.fullname,
         group_name=homework.group.name if homework.group else None,
-        submission_count=submission_count
+        submission_count=homework.submission_count
     )
 
 
@@ -131,7 +140,7 @@ async def delete_homework(
 ):
     """Delete homework"""
 
-    success = HomeworkService.delete_homework(db, homework_id, current_user.id)
+    success = await run_db(db, HomeworkService.delete_homework, homework_id, current_user.id)
 
     if not success:
         raise HTTPException(
@@ -142,6 +151,45 @@ async def delete_homework(
     return {"message": "Homework deleted successfully"}
 
 
+# Regrade jobs
+@router.post(
+    "/homework/{homework_id}/regrade",
+    response_model=RegradeJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def regrade_homework(
+        homework_id: int,
+        regrade_data: Optional[RegradeRequest] = None,
+        current_user: User = Depends(get_current_teacher),
+        db: Session = Depends(get_db)
+):
+    """Regrade every (or a filtered set of) graded submission in the background
+
+    Grades changed by a teacher are left alone unless include_teacher_modified is set.
+    """
+
+    job = await run_db(
+        db, RegradeService.create_job, homework_id, current_user.id,
+        regrade_data or RegradeRequest(), current_user.id
+    )
+    regrade_runner.submit(job.id)
+
+    return RegradeJobResponse(**RegradeService.describe_job(job))
+
+
+@router.get("/regrade-jobs/{job_id}", response_model=RegradeJobResponse)
+async def get_regrade_job(
+        job_id: int,
+        current_user: User = Depends(get_current_teacher),
+        db: Session = Depends(get_db)
+):
+    """Get progress of a regrade job for one of the teacher's homework"""
+
+    job = await run_db(db, RegradeService.get_job, job_id, current_user.id)
+
+    return RegradeJobResponse(**RegradeService.describe_job(job))
+
+
 # Group management
 @router.get("/groups", response_model=List[GroupResponse])
 async def get_teacher_groups(
@@ -150,40 +198,48 @@ async def get_teacher_groups(
 ):
     """Get groups assigned to the teacher"""
 
-    groups = db.query(Group).filter(Group.teacher_id == current_user.id).all()
+    groups = await run_db(db, GroupService.get_teacher_groups, current_user.id)
 
     response_data = []
     for group in groups:
-        # Count students
-        student_count = db.query(User).filter(User.group_id == group.id).count()
-
         response_data.append(GroupResponse(
             id=group.id,
             name=group.name,
             teacher_id=group.teacher_id,
             created_at=group.created_at,
             teacher_name=current_user.fullname,
-            student_count=student_count
+            student_count=group.student_count
         ))
 
     return response_data
 
 
-@router.get("/groups/{group_id}/submissions", response_model=List[SubmissionResponse])
+@router.get("/groups/{group_id}/submissions", response_model=Page[SubmissionResponse])
 async def get_group_submissions(
         group_id: int,
         homework_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+        with_total: bool = False,
         current_user: User = Depends(get_current_teacher),
         db: Session = Depends(get_db)
 ):
-    """Get all submissions for a group"""
+    """Get a page of a group's submissions, newest first"""
 
-    submissions = GradeService.get_group_submissions(
-        db, group_id, current_user.id, homework_id
+    if FAST_JSON_RESPONSES:
+        page = await run_db(
+            db, GradeService.get_group_submission_rows, group_id, current_user.id, homework_id,
+            cursor, limit, with_total
+        )
+        return FastJSONResponse(Page[SubmissionResponse], page)
+
+    page = await run_db(
+        db, GradeService.get_group_submissions, group_id, current_user.id, homework_id,
+        cursor, limit, with_total
     )
 
     response_data = []
-    for submission in submissions:
+    for submission in page["items"]:
         response_data.append(SubmissionResponse(
             id=submission.id,
             homework_id=submission.homework_id,
@@ -192,34 +248,92 @@ async def get_group_submissions(
             ai_grade=submission.ai_grade,
             final_grade=submission.final_grade,
             ai_feedback=submission.ai_feedback,
+            grading_status=submission.grading_status,
             homework_title=submission.homework.title if submission.homework else None,
             student_name=submission.student.fullname if submission.student else None,
             files=[]  # Files can be loaded separately if needed
         ))
 
-    return response_data
+    return {**page, "items": response_data}
+
+
+@router.get("/groups/{group_id}/export")
+async def export_group_submissions(
+        group_id: int,
+        format: str = "ndjson",
+        view: str = "submissions",
+        homework_id: Optional[int] = None,
+        date_from: Optional[date] = Query(None, alias="from"),
+        date_to: Optional[date] = Query(None, alias="to"),
+        current_user: User = Depends(get_current_teacher),
+        db: Session = Depends(get_db)
+):
+    """Stream a group's submissions, or a students x homework gradebook, as NDJSON or CSV
+
+    Rows are read from a server-side cursor in EXPORT_BATCH_SIZE batches and
+    written as they arrive, so memory stays flat however large the group is.
+    from/to (inclusive days) filter by submission date.
+    """
+
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+
+    if view not in EXPORT_VIEWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"View must be one of: {', '.join(EXPORT_VIEWS)}"
+        )
+
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must not be after 'to'"
+        )
+
+    await run_db(db, GroupService.get_teacher_group, group_id, current_user.id)
+    homework = None
+    if view == "gradebook":
+        homework = await run_db(db, ExportService.get_gradebook_homework, group_id, current_user.id, homework_id)
+    # The export can outlive the request session; it reads through its own
+    await release_db(db)
+    teacher_id = current_user.id
+
+    async def rows():
+        async with session_scope() as export_db:
+            if homework is None:
+                chunks = ExportService.export_submissions(
+                    export_db, format, group_id, teacher_id, homework_id, date_from, date_to
+                )
+            else:
+                chunks = ExportService.export_gradebook(export_db, format, group_id, homework, date_from, date_to)
+            async for chunk in chunks:
+                yield chunk
+
+    return StreamingResponse(
+        rows(),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="group-{group_id}-{view}.{format}"'}
+    )
 
 
 @router.get("/groups/{group_id}/leaderboard")
 async def get_group_leaderboard(
         group_id: int,
         period: str = "all",
+        date_from: Optional[date] = Query(None, alias="from"),
+        date_to: Optional[date] = Query(None, alias="to"),
+        limit: Optional[int] = Query(None, ge=1, le=500),
+        offset: int = Query(0, ge=0),
         current_user: User = Depends(get_current_teacher),
         db: Session = Depends(get_db)
 ):
     """Get leaderboard for a group"""
 
     # Verify teacher has access to this group
-    group = db.query(Group).filter(
-        Group.id == group_id,
-        Group.teacher_id == current_user.id
-    ).first()
-
-    if not group:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Group not found or you don't have access"
-        )
+    group = await run_db(db, GroupService.get_teacher_group, group_id, current_user.id)
 
     if period not in ["day", "week", "month", "all"]:
         raise HTTPException(
@@ -227,12 +341,20 @@ async def get_group_leaderboard(
             detail="Period must be one of: day, week, month, all"
         )
 
-    leaderboard = GradeService.get_group_leaderboard(db, group_id, period)
+    leaderboard = await run_db(
+        db, LeaderboardService.get_group_leaderboard, group_id, period, date_from, date_to,
+        limit=limit,
+        offset=offset
+    )
 
     return {
         "group_id": group_id,
         "group_name": group.name,
         "period": period,
+        "from": date_from,
+        "to": date_to,
+        "limit": limit,
+        "offset": offset,
         "leaderboard": leaderboard
     }
 
@@ -247,9 +369,9 @@ async def update_grade(
 ):
     """Update/override AI grade for a submission"""
 
-    grade = GradeService.update_grade(db, submission_id, grade_data, current_user.id)
+    grade = await run_db(db, GradeService.update_grade, submission_id, grade_data, current_user.id)
 
-    return GradeResponse.from_orm(grade)
+    return GradeResponse.model_validate(grade)
 
 
 @router.get("/submissions/{submission_id}/grade", response_model=GradeResponse)
@@ -260,25 +382,6 @@ async def get_submission_grade(
 ):
     """Get detailed grade information for a submission"""
 
-    # Verify teacher has access to this submission
-    from ..models.submission import Submission
-    submission = db.query(Submission).join(
-        Submission.homework
-    ).filter(
-        Submission.id == submission_id
-    ).first()
-
-    if not submission or submission.homework.teacher_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Submission not found or you don't have access"
-        )
-
-    grade = GradeService.get_grade_by_submission(db, submission_id)
-    if not grade:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Grade not found"
-        )
+    grade = await run_db(db, GradeService.get_teacher_submission_grade, submission_id, current_user.id)
 
-    return GradeResponse.from_orm(grade)
\ No newline at end of file
+    return GradeResponse.model_validate(grade)
\ No newline at end of file
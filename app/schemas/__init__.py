@@ -5,6 +5,8 @@ from .homework import HomeworkBase, HomeworkCreate, HomeworkUpdate, HomeworkResp
 from .submission import SubmissionFileCreate, SubmissionCreate, SubmissionFileResponse, SubmissionResponse
 from .grade import GradeUpdate, GradeResponse
 from .session import SessionResponse as SessionDetailResponse
+from .regrade import RegradeRequest, RegradeJobResponse
+from .page import Page
 
 __all__ = [
     "LoginRequest", "LoginResponse", "SessionResponse", "DeviceConflictResponse",
@@ -13,5 +15,7 @@ __all__ = [
     "HomeworkBase", "HomeworkCreate", "HomeworkUpdate", "HomeworkResponse",
     "SubmissionFileCreate", "SubmissionCreate", "SubmissionFileResponse", "SubmissionResponse",
     "GradeUpdate", "GradeResponse",
-    "SessionDetailResponse"
+    "SessionDetailResponse",
+    "RegradeRequest", "RegradeJobResponse",
+    "Page"
 ]
\ No newline at end of file
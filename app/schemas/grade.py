@@ -1,4 +1,4 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, ConfigDict, field_validator
 from typing import Optional
 from datetime import datetime
 
@@ -8,7 +8,8 @@ class GradeUpdate(BaseModel):
     final_code_quality: Optional[int] = None
     final_correctness: Optional[int] = None
 
-    @validator('final_task_completeness', 'final_code_quality', 'final_correctness')
+    @field_validator('final_task_completeness', 'final_code_quality', 'final_correctness')
+    @classmethod
     def validate_scores(cls, v):
         if v is not None and (v < 0 or v > 100):
             raise ValueError('Scores must be between 0 and 100')
@@ -31,6 +32,8 @@ class GradeResponse(BaseModel):
     code_quality_feedback: str
     correctness_feedback: str
     modified_by_teacher: Optional[datetime] = None
+    queue_wait_ms: Optional[int] = None
+    grading_ms: Optional[int] = None
+    graded_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
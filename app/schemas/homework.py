@@ -1,4 +1,4 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, ConfigDict, field_validator
 from typing import Optional
 from datetime import datetime
 from ..utils.constants import LINE_LIMIT_OPTIONS, FILE_EXTENSION_OPTIONS
@@ -13,18 +13,28 @@ class HomeworkBase(BaseModel):
     line_limit: int
     file_extension: str
     ai_grading_prompt: str
+    prompt_token_budget: Optional[int] = None
 
 
 class HomeworkCreate(HomeworkBase):
     group_id: int
 
-    @validator('line_limit')
+    @field_validator('prompt_token_budget')
+    @classmethod
+    def validate_prompt_token_budget(cls, v):
+        if v is not None and v < 500:
+            raise ValueError('Prompt token budget must be at least 500')
+        return v
+
+    @field_validator('line_limit')
+    @classmethod
     def validate_line_limit(cls, v):
         if v not in LINE_LIMIT_OPTIONS:
             raise ValueError(f'Line limit must be one of {LINE_LIMIT_OPTIONS}')
         return v
 
-    @validator('file_extension')
+    @field_validator('file_extension')
+    @classmethod
     def validate_file_extension(cls, v):
         if v not in FILE_EXTENSION_OPTIONS:
             raise ValueError(f'File extension must be one of {FILE_EXTENSION_OPTIONS}')
@@ -40,6 +50,14 @@ class HomeworkUpdate(BaseModel):
     line_limit: Optional[int] = None
     file_extension: Optional[str] = None
     ai_grading_prompt: Optional[str] = None
+    prompt_token_budget: Optional[int] = None
+
+    @field_validator('prompt_token_budget')
+    @classmethod
+    def validate_prompt_token_budget(cls, v):
+        if v is not None and v < 500:
+            raise ValueError('Prompt token budget must be at least 500')
+        return v
 
 
 class HomeworkResponse(BaseModel):
@@ -54,9 +72,9 @@ class HomeworkResponse(BaseModel):
     teacher_id: int
     group_id: int
     created_at: datetime
+    prompt_token_budget: Optional[int] = None
     teacher_name: Optional[str] = None
     group_name: Optional[str] = None
     submission_count: int = 0
 
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page; null on the last page
+    total: Optional[int] = None  # Only with ?with_total=true; an estimate on PostgreSQL
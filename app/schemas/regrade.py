@@ -0,0 +1,38 @@
+from pydantic import BaseModel, ValidationInfo, field_validator
+from typing import List, Optional
+from datetime import datetime
+
+
+class RegradeRequest(BaseModel):
+    include_teacher_modified: bool = False  # Also overwrite teacher-adjusted grades
+    student_ids: Optional[List[int]] = None
+    submitted_from: Optional[datetime] = None
+    submitted_to: Optional[datetime] = None
+
+    @field_validator('submitted_to')
+    @classmethod
+    def validate_range(cls, v, info: ValidationInfo):
+        start = info.data.get('submitted_from')
+        if v is not None and start is not None and v < start:
+            raise ValueError('submitted_to must not be before submitted_from')
+        return v
+
+
+class RegradeJobResponse(BaseModel):
+    id: int
+    homework_id: int
+    requested_by: int
+    include_teacher_modified: bool
+    status: str
+    total: int
+    skipped: int
+    processed: int
+    succeeded: int
+    failed: int
+    progress_percent: float
+    submissions_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
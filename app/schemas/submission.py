@@ -1,4 +1,4 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, ConfigDict, field_validator
 from typing import List, Optional
 from datetime import datetime
 from ..utils.constants import MAX_FILES_PER_HOMEWORK, MAX_LINES_PER_FILE
@@ -8,10 +8,11 @@ class SubmissionFileCreate(BaseModel):
     file_name: str
     content: str
 
-    @validator('content')
+    @field_validator('content')
+    @classmethod
     def validate_content(cls, v):
-        lines = v.split('\n')
-        if len(lines) > MAX_LINES_PER_FILE:
+        # Counting newlines avoids building a list of every line
+        if v.count('\n') + 1 > MAX_LINES_PER_FILE:
             raise ValueError(f'File cannot exceed {MAX_LINES_PER_FILE} lines')
         return v
 
@@ -19,7 +20,8 @@ class SubmissionFileCreate(BaseModel):
 class SubmissionCreate(BaseModel):
     files: List[SubmissionFileCreate]
 
-    @validator('files')
+    @field_validator('files')
+    @classmethod
     def validate_files(cls, v):
         if len(v) == 0:
             raise ValueError('At least one file is required')
@@ -34,8 +36,7 @@ class SubmissionFileResponse(BaseModel):
     content: str
     line_count: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SubmissionResponse(BaseModel):
@@ -46,9 +47,21 @@ class SubmissionResponse(BaseModel):
     ai_grade: int
     final_grade: int
     ai_feedback: str
+    grading_status: str = "graded"
     homework_title: Optional[str] = None
     student_name: Optional[str] = None
     files: List[SubmissionFileResponse] = []
 
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class SubmissionStatusResponse(BaseModel):
+    submission_id: int
+    grading_status: str  # pending, grading, graded, failed
+    queued_at: Optional[datetime] = None
+    grading_started_at: Optional[datetime] = None
+    graded_at: Optional[datetime] = None
+    queue_wait_ms: Optional[int] = None
+    grading_ms: Optional[int] = None
+    final_grade: Optional[int] = None
+    ai_feedback: Optional[str] = None
+    error: Optional[str] = None
@@ -2,5 +2,14 @@ from .auth_service import AuthService
 from .ai_service import AIService
 from .homework_service import HomeworkService
 from .grade_service import GradeService
+from .group_service import GroupService
+from .user_service import UserService
+from .leaderboard_service import LeaderboardService
+from .grading_service import GradingService
+from .regrade_service import RegradeService
+from .counter_service import CounterService
+from .export_service import ExportService
 
-__all__ = ["AuthService", "AIService", "HomeworkService", "GradeService"]
\ No newline at end of file
+__all__ = ["AuthService", "AIService", "HomeworkService", "GradeService", "GroupService", "UserService",
+           "LeaderboardService", "GradingService", "RegradeService", "CounterService",
+           "ExportService"]
\ No newline at end of file
@@ -0,0 +1,117 @@
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+import httpx
+
+# Connection pool and timeouts for the AI grading endpoint
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "50"))
+AI_HTTP_MAX_KEEPALIVE = int(os.getenv("AI_HTTP_MAX_KEEPALIVE", "20"))
+AI_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("AI_HTTP_KEEPALIVE_EXPIRY", "60"))
+AI_HTTP2 = os.getenv("AI_HTTP2", "false").lower() == "true"
+
+DEEPSEEK_CONNECT_TIMEOUT = float(os.getenv("DEEPSEEK_CONNECT_TIMEOUT", "5"))
+DEEPSEEK_READ_TIMEOUT = float(os.getenv("DEEPSEEK_READ_TIMEOUT", os.getenv("DEEPSEEK_TIMEOUT", "30")))
+DEEPSEEK_WRITE_TIMEOUT = float(os.getenv("DEEPSEEK_WRITE_TIMEOUT", "10"))
+DEEPSEEK_POOL_TIMEOUT = float(os.getenv("DEEPSEEK_POOL_TIMEOUT", "10"))
+
+
+class AIHttpClient:
+    """One long-lived httpx client per process for AI API calls"""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self.http2 = False
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.errors = 0
+
+    async def start(self):
+        """Create the pooled client (called on app startup)"""
+        if self._client is not None:
+            return
+
+        self.http2 = AI_HTTP2
+        if self.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("⚠️  AI_HTTP2 requested but the 'h2' package is missing - using HTTP/1.1")
+                self.http2 = False
+
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=AI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=AI_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=AI_HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(
+                connect=DEEPSEEK_CONNECT_TIMEOUT,
+                read=DEEPSEEK_READ_TIMEOUT,
+                write=DEEPSEEK_WRITE_TIMEOUT,
+                pool=DEEPSEEK_POOL_TIMEOUT
+            )
+        )
+
+    async def close(self):
+        """Close pooled connections (called on app shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        """POST through the shared pool, recording connection reuse"""
+        if self._client is None:
+            # Scripts and tests that skip the startup hook still get a pooled client
+            await self.start()
+
+        self.requests += 1
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions["trace"] = self._trace
+        try:
+            return await self._client.post(url, extensions=extensions, **kwargs)
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+
+    @asynccontextmanager
+    async def stream(self, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """POST and read the response incrementally (server-sent events)"""
+        if self._client is None:
+            await self.start()
+
+        self.requests += 1
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions["trace"] = self._trace
+        try:
+            async with self._client.stream("POST", url, extensions=extensions, **kwargs) as response:
+                yield response
+        except httpx.HTTPError:
+            self.errors += 1
+            raise
+
+    async def _trace(self, event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.started":
+            self.new_connections += 1
+        elif event_name == "connection.start_tls.started":
+            self.tls_handshakes += 1
+
+    def stats(self) -> dict:
+        """Connection reuse counters for diagnostics"""
+        reused = max(0, self.requests - self.new_connections)
+        return {
+            "started": self._client is not None,
+            "http2": self.http2,
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "tls_handshakes": self.tls_handshakes,
+            "reused_connections": reused,
+            "reuse_rate": round(reused / self.requests, 4) if self.requests else 0.0,
+            "errors": self.errors,
+            "max_connections": AI_HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": AI_HTTP_MAX_KEEPALIVE
+        }
+
+
+ai_http_client = AIHttpClient()
@@ -0,0 +1,206 @@
+import asyncio
+import os
+import random
+import time
+from typing import Dict, List, Optional, Set
+import httpx
+from .ai_client import (
+    DEEPSEEK_CONNECT_TIMEOUT,
+    DEEPSEEK_POOL_TIMEOUT,
+    DEEPSEEK_READ_TIMEOUT,
+    DEEPSEEK_WRITE_TIMEOUT
+)
+
+# Comma-separated provider names; each reads AI_PROVIDER_<NAME>_URL, _API_KEY,
+# _MODEL, _WEIGHT, _MAX_CONCURRENCY and _TIMEOUT. Unset = the single DEEPSEEK_* endpoint.
+AI_PROVIDERS = os.getenv("AI_PROVIDERS", "")
+# Share of calls sent to a random (weighted) provider so every provider's stats stay current
+AI_PROVIDER_EXPLORE_RATE = float(os.getenv("AI_PROVIDER_EXPLORE_RATE", "0.05"))
+# Consecutive failures that take a provider out of rotation, and for how long
+AI_PROVIDER_EJECT_FAILURES = int(os.getenv("AI_PROVIDER_EJECT_FAILURES", "3"))
+AI_PROVIDER_EJECT_SECONDS = float(os.getenv("AI_PROVIDER_EJECT_SECONDS", "30"))
+
+# Weight of the newest sample in the moving averages
+EWMA_ALPHA = 0.2
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+class AIProvider:
+    """One OpenAI-compatible chat-completions endpoint and its recent health"""
+
+    def __init__(
+            self,
+            name: str,
+            url: str,
+            api_key: Optional[str],
+            model: str,
+            weight: float = 1.0,
+            max_concurrency: int = 16,
+            timeout: float = DEEPSEEK_READ_TIMEOUT
+    ):
+        self.name = name
+        self.url = url
+        self.api_key = api_key
+        self.model = model
+        self.weight = max(0.01, weight)
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = httpx.Timeout(
+            connect=DEEPSEEK_CONNECT_TIMEOUT,
+            read=timeout,
+            write=DEEPSEEK_WRITE_TIMEOUT,
+            pool=DEEPSEEK_POOL_TIMEOUT
+        )
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+
+        self.latency_ms: Optional[float] = None  # EWMA of successful calls
+        self.error_rate = 0.0  # EWMA of 1 (failed) / 0 (ok)
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+        self.requests = 0
+        self.failures = 0
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.errors: Dict[str, int] = {}
+
+    def is_ejected(self) -> bool:
+        return time.monotonic() < self.ejected_until
+
+    def score(self, default_latency_ms: float) -> float:
+        """Lower is better: recent latency, inflated by errors and load, divided by weight"""
+        latency = self.latency_ms if self.latency_ms is not None else default_latency_ms
+        load = 1 + self.in_flight / self.max_concurrency
+        return latency * (1 + 4 * self.error_rate) * load / self.weight
+
+    def record_success(self, elapsed_ms: float):
+        self.requests += 1
+        self._observe_latency(elapsed_ms)
+        self.latency_ms = elapsed_ms if self.latency_ms is None else (
+            EWMA_ALPHA * elapsed_ms + (1 - EWMA_ALPHA) * self.latency_ms
+        )
+        self.error_rate *= 1 - EWMA_ALPHA
+        self.consecutive_failures = 0
+
+    def record_failure(self, kind: str, elapsed_ms: float):
+        self.requests += 1
+        self.failures += 1
+        self._observe_latency(elapsed_ms)
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+        self.error_rate = EWMA_ALPHA + (1 - EWMA_ALPHA) * self.error_rate
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= AI_PROVIDER_EJECT_FAILURES:
+            self.ejected_until = time.monotonic() + AI_PROVIDER_EJECT_SECONDS
+
+    def _observe_latency(self, elapsed_ms: float):
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.latency_histogram[index] += 1
+                return
+        self.latency_histogram[-1] += 1
+
+    def stats(self) -> dict:
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "url": self.url,
+            "model": self.model,
+            "weight": self.weight,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout.read,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ewma_latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "ewma_error_rate": round(self.error_rate, 4),
+            "ejected": self.is_ejected(),
+            "latency_histogram": dict(zip(labels, self.latency_histogram)),
+            "errors": dict(self.errors)
+        }
+
+
+def load_providers() -> List[AIProvider]:
+    """Providers from AI_PROVIDERS, or the single DEEPSEEK_* endpoint"""
+    default_model = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
+    names = [name.strip() for name in AI_PROVIDERS.split(",") if name.strip()]
+
+    if not names:
+        api_key = os.getenv("DEEPSEEK_API_KEY")
+        if not api_key:
+            return []
+        return [AIProvider(
+            "deepseek",
+            os.getenv("DEEPSEEK_API_URL", "https://api.deepseek.com/v1/chat/completions"),
+            api_key,
+            default_model,
+            max_concurrency=int(os.getenv("AI_MAX_CONCURRENCY", "16"))
+        )]
+
+    providers = []
+    for name in names:
+        prefix = f"AI_PROVIDER_{name.upper()}_"
+        url = os.getenv(prefix + "URL")
+        if not url:
+            print(f"⚠️  AI provider '{name}' has no {prefix}URL - skipped")
+            continue
+        providers.append(AIProvider(
+            name,
+            url,
+            os.getenv(prefix + "API_KEY"),
+            os.getenv(prefix + "MODEL", default_model),
+            weight=float(os.getenv(prefix + "WEIGHT", "1")),
+            max_concurrency=int(os.getenv(prefix + "MAX_CONCURRENCY", "16")),
+            timeout=float(os.getenv(prefix + "TIMEOUT", str(DEEPSEEK_READ_TIMEOUT)))
+        ))
+    return providers
+
+
+class ProviderPool:
+    """Routes each AI call to the healthiest, fastest provider and fails over
+
+    Providers are ranked by score() (recent latency x error rate x load /
+    weight). Ones at their concurrency limit or ejected after repeated
+    failures are only used when nothing better is left. A small share
+    of calls explores a random provider so a recovered one is noticed.
+    """
+
+    def __init__(self, providers: List[AIProvider]):
+        self.providers = providers
+        self.failovers = 0
+
+    def ranked(self, exclude: Optional[Set[str]] = None) -> List[AIProvider]:
+        """Providers in the order they should be tried"""
+        exclude = exclude or set()
+        candidates = [provider for provider in self.providers if provider.name not in exclude]
+        if not candidates:
+            candidates = list(self.providers)
+
+        known = [p.latency_ms for p in self.providers if p.latency_ms is not None]
+        # Untried providers look as fast as the best known one, so they get traffic
+        default_latency = min(known) if known else 1.0
+
+        candidates.sort(key=lambda p: (p.is_ejected(), p.semaphore.locked(), p.score(default_latency)))
+
+        healthy = [p for p in candidates if not p.is_ejected()]
+        if len(healthy) > 1 and random.random() < AI_PROVIDER_EXPLORE_RATE:
+            explored = random.choices(healthy, weights=[p.weight for p in healthy])[0]
+            candidates.remove(explored)
+            candidates.insert(0, explored)
+
+        return candidates
+
+    def choose(self, exclude: Optional[Set[str]] = None) -> AIProvider:
+        return self.ranked(exclude)[0]
+
+    @property
+    def cache_signature(self) -> str:
+        """Models that may answer; part of the grading cache key"""
+        return "+".join(sorted({provider.model for provider in self.providers}))
+
+    def stats(self) -> dict:
+        return {
+            "failovers": self.failovers,
+            "providers": {provider.name: provider.stats() for provider in self.providers}
+        }
+
+
+provider_pool = ProviderPool(load_providers())
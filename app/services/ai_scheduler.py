@@ -0,0 +1,242 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Optional
+
+# Concurrency bounds for calls to the AI API; the live limit moves between them
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "16"))
+AI_MIN_CONCURRENCY = int(os.getenv("AI_MIN_CONCURRENCY", "1"))
+AI_INITIAL_CONCURRENCY = int(os.getenv("AI_INITIAL_CONCURRENCY", "4"))
+# Provider token budget per minute (0 disables token budgeting)
+AI_TOKENS_PER_MINUTE = int(os.getenv("AI_TOKENS_PER_MINUTE", "0"))
+# Minimum gap between two multiplicative decreases
+AI_BACKOFF_COOLDOWN_SECONDS = float(os.getenv("AI_BACKOFF_COOLDOWN_SECONDS", "2"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def is_overload_status(status_code: int) -> bool:
+    """Responses that mean the provider wants us to slow down"""
+    return status_code == 429 or status_code >= 500
+
+
+class AISlot:
+    """Permission to make one AI call; report the outcome with record()"""
+
+    def __init__(self, scheduler: "AIScheduler", tokens: int):
+        self.scheduler = scheduler
+        self.tokens = tokens
+        self.outcome: Optional[bool] = None  # True ok, False overloaded
+
+    def record(self, status_code: int, tokens_used: Optional[int] = None):
+        """Feed the response back into the limiter and token budget"""
+        self.outcome = not is_overload_status(status_code)
+        if tokens_used is not None:
+            self.scheduler.refund_tokens(self.tokens - tokens_used)
+
+    def close(self, exc_type=None):
+        """Give the slot back, treating transport failures as overload"""
+        if exc_type is not None and self.outcome is None and not issubclass(exc_type, asyncio.CancelledError):
+            # Timeouts and connection errors count as overload
+            self.outcome = False
+        self.scheduler.release(self.outcome)
+
+
+class AIScheduler:
+    """Fair, adaptive admission control for AI API calls
+
+    - Callers queue per group and are admitted round-robin, so one large
+      class at a deadline cannot starve the others.
+    - The concurrency limit follows AIMD: +1/limit per success, halved on
+      429/5xx/timeouts (at most once per cooldown).
+    - With AI_TOKENS_PER_MINUTE set, each call spends its estimated prompt
+      plus completion tokens from a bucket refilled continuously.
+    """
+
+    def __init__(
+            self,
+            max_concurrency: int = AI_MAX_CONCURRENCY,
+            min_concurrency: int = AI_MIN_CONCURRENCY,
+            initial_concurrency: int = AI_INITIAL_CONCURRENCY,
+            tokens_per_minute: int = AI_TOKENS_PER_MINUTE
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self.tokens_per_minute = tokens_per_minute
+        self._tokens = float(tokens_per_minute)
+        self._tokens_updated = time.monotonic()
+        self._queues: "OrderedDict[object, Deque[tuple]]" = OrderedDict()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._last_decrease = 0.0
+        self.in_flight = 0
+
+        # Metrics
+        self.admitted = 0
+        self.successes = 0
+        self.overloads = 0
+        self.decreases = 0
+        self.token_waits = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def slot(self, group_id, estimated_tokens: int) -> "_Acquire":
+        """async with scheduler.slot(group_id, tokens) as slot: ..."""
+        return _Acquire(self, group_id, estimated_tokens)
+
+    async def acquire(self, group_id, estimated_tokens: int) -> AISlot:
+        """Wait for this group's turn, a free slot and enough token budget"""
+        if self.tokens_per_minute:
+            estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.setdefault(group_id, deque())
+        entry = (future, estimated_tokens, time.monotonic(), group_id)
+        queue.append(entry)
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as we were cancelled; give the slot back
+                self.release(None)
+            else:
+                self._remove(group_id, entry)
+            raise
+
+        return AISlot(self, estimated_tokens)
+
+    def release(self, outcome: Optional[bool]):
+        """Return a slot and adjust the concurrency limit"""
+        self.in_flight -= 1
+
+        if outcome is True:
+            self.successes += 1
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        elif outcome is False:
+            self.overloads += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= AI_BACKOFF_COOLDOWN_SECONDS:
+                self._last_decrease = now
+                self.decreases += 1
+                self.limit = max(self.min_concurrency, self.limit / 2)
+
+        self._dispatch()
+
+    def refund_tokens(self, tokens: int):
+        """Correct the budget once the real token usage is known"""
+        if self.tokens_per_minute and tokens:
+            self._refill()
+            self._tokens = min(float(self.tokens_per_minute), self._tokens + tokens)
+            self._dispatch()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._tokens_updated
+        self._tokens_updated = now
+        self._tokens = min(
+            float(self.tokens_per_minute),
+            self._tokens + elapsed * self.tokens_per_minute / 60
+        )
+
+    def _remove(self, group_id, entry):
+        queue = self._queues.get(group_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(entry)
+        except ValueError:
+            pass
+        if not queue:
+            del self._queues[group_id]
+
+    def _dispatch(self):
+        """Admit queued callers round-robin across groups while capacity lasts"""
+        while self._queues and self.in_flight < int(self.limit):
+            group_id, queue = next(iter(self._queues.items()))
+            future, tokens, queued_at, _ = queue[0]
+
+            if future.cancelled():
+                queue.popleft()
+                if not queue:
+                    del self._queues[group_id]
+                continue
+
+            if self.tokens_per_minute:
+                self._refill()
+                if self._tokens < tokens:
+                    # Wake up once enough budget has accumulated
+                    self.token_waits += 1
+                    self._schedule((tokens - self._tokens) * 60 / self.tokens_per_minute)
+                    return
+                self._tokens -= tokens
+
+            queue.popleft()
+            # This group goes to the back of the line
+            del self._queues[group_id]
+            if queue:
+                self._queues[group_id] = queue
+
+            wait_ms = (time.monotonic() - queued_at) * 1000
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+            self.in_flight += 1
+            self.admitted += 1
+            future.set_result(None)
+
+    def _schedule(self, delay: float):
+        if self._timer is not None and not self._timer.cancelled():
+            return
+
+        def fire():
+            self._timer = None
+            self._dispatch()
+
+        self._timer = asyncio.get_running_loop().call_later(max(delay, 0.01), fire)
+
+    def stats(self) -> dict:
+        """Queue depth, wait times and limiter state for diagnostics"""
+        if self.tokens_per_minute:
+            self._refill()
+        return {
+            "limit": round(self.limit, 2),
+            "min_concurrency": self.min_concurrency,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": sum(len(queue) for queue in self._queues.values()),
+            "queued_groups": len(self._queues),
+            "admitted": self.admitted,
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "decreases": self.decreases,
+            "avg_wait_ms": round(self.total_wait_ms / self.admitted, 1) if self.admitted else 0.0,
+            "max_wait_ms": round(self.max_wait_ms, 1),
+            "tokens_per_minute": self.tokens_per_minute,
+            "tokens_available": int(self._tokens) if self.tokens_per_minute else None,
+            "token_waits": self.token_waits
+        }
+
+
+class _Acquire:
+    def __init__(self, scheduler: AIScheduler, group_id, estimated_tokens: int):
+        self.scheduler = scheduler
+        self.group_id = group_id
+        self.estimated_tokens = estimated_tokens
+        self._slot: Optional[AISlot] = None
+
+    async def __aenter__(self) -> AISlot:
+        self._slot = await self.scheduler.acquire(self.group_id, self.estimated_tokens)
+        return self._slot
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._slot.close(exc_type)
+        return False
+
+
+ai_scheduler = AIScheduler()
@@ -1,134 +1,323 @@
-import httpx
+import asyncio
 import json
 import os
-from typing import Dict, Any
+import random
+import time
+from typing import Callable, Dict, Any, Optional, Set, Tuple
+import httpx
 from ..models.homework import Homework
 from ..models.submission import SubmissionFile
+from .ai_client import ai_http_client
+from .ai_providers import AIProvider, provider_pool
+from .ai_scheduler import ai_scheduler, estimate_tokens, is_overload_status
+from .circuit_breaker import ai_breaker
+from .grading_cache import grading_cache, grading_cache_key
+from .prompt_builder import AI_PROMPT_STRIP_COMMENTS, build_prompt, token_budget
+
+# Retries for transient AI failures (exponential backoff with full jitter)
+AI_RETRY_ATTEMPTS = int(os.getenv("AI_RETRY_ATTEMPTS", "3"))
+AI_RETRY_BASE_DELAY = float(os.getenv("AI_RETRY_BASE_DELAY", "0.5"))
+AI_RETRY_MAX_DELAY = float(os.getenv("AI_RETRY_MAX_DELAY", "8"))
+# Request the completion as server-sent events so feedback can be shown as it arrives
+AI_STREAM_GRADING = os.getenv("AI_STREAM_GRADING", "false").lower() == "true"
+
+# Called with each streamed content delta, or None when a retry restarts the stream
+DeltaCallback = Callable[[Optional[str]], None]
+
+
+class AIGradingError(Exception):
+    """Grading could not complete; the submission should be regraded later"""
+
+
+class AIUnavailableError(AIGradingError):
+    """The AI API failed, timed out, or the circuit breaker is open"""
+
+
+class AIResponseError(AIGradingError, ValueError):
+    """The AI answered, but not with usable grades"""
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Backoff before retry number attempt (0-based), honouring Retry-After"""
+    delay = random.uniform(0, min(AI_RETRY_MAX_DELAY, AI_RETRY_BASE_DELAY * (2 ** attempt)))
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return min(delay, AI_RETRY_MAX_DELAY)
 
 
 class AIService:
     def __init__(self):
-        self.api_key = os.getenv("DEEPSEEK_API_KEY")
-        self.api_url = os.getenv("DEEPSEEK_API_URL", "https://api.deepseek.com/v1/chat/completions")
+        self.pool = provider_pool
+        self.temperature = float(os.getenv("DEEPSEEK_TEMPERATURE", "0.3"))
+        self.max_tokens = int(os.getenv("DEEPSEEK_MAX_TOKENS", "1000"))
+
+        if not self.pool.providers:
+            raise ValueError("DEEPSEEK_API_KEY environment variable is required (or configure AI_PROVIDERS)")
 
-        if not self.api_key:
-            raise ValueError("DEEPSEEK_API_KEY environment variable is required")
+        # Grades from any configured model are interchangeable for caching
+        self.model = self.pool.cache_signature
 
     async def grade_submission(
             self,
             homework: Homework,
-            files: list[SubmissionFile]
+            files: list[SubmissionFile],
+            on_delta: Optional[DeltaCallback] = None
     ) -> Dict[str, Any]:
-        """Grade submission using DeepSeek AI"""
-
-        # Prepare file contents
-        file_contents = ""
-        for file in files:
-            file_contents += f"=== {file.file_name} ===\n{file.content}\n\n"
-
-        # Create grading prompt
-        prompt = f"""
-You are an expert programming instructor. Grade this {homework.file_extension} code submission.
-
-HOMEWORK: {homework.title}
-DESCRIPTION: {homework.description}
-POINTS: {homework.points}
-GRADING CRITERIA: {homework.ai_grading_prompt}
-
-SUBMITTED FILES:
-{file_contents}
-
-Please grade this submission on 3 criteria (0-100 each):
-1. Task Completeness - How well does the code fulfill the requirements?
-2. Code Quality - Code structure, readability, best practices
-3. Correctness - Does the code work correctly and handle edge cases?
-
-Return your response as JSON in this exact format:
-{{
-    "task_completeness": <score 0-100>,
-    "code_quality": <score 0-100>, 
-    "correctness": <score 0-100>,
-    "total": <average of the three scores>,
-    "overall_feedback": "<brief 2-3 sentence summary>",
-    "task_completeness_feedback": "<specific feedback on task completion>",
-    "code_quality_feedback": "<specific feedback on code quality>",
-    "correctness_feedback": "<specific feedback on correctness>"
-}}
-
-Be constructive and specific in your feedback. Focus on what the student did well and areas for improvement.
-"""
+        """Grade submission using DeepSeek AI
 
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.api_url,
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "deepseek-chat",
-                        "messages": [
-                            {
-                                "role": "user",
-                                "content": prompt
-                            }
-                        ],
-                        "temperature": 0.3,
-                        "max_tokens": 1000
-                    },
-                    timeout=30.0
+        Identical submissions to the same homework share one cached
+        result. Raises AIGradingError when no real grade could be produced;
+        callers mark the submission for regrading instead of inventing a score.
+        With AI_STREAM_GRADING, on_delta receives the response text as it is
+        generated (cache hits and coalesced calls only get the final result).
+        """
+
+        key = grading_cache_key(
+            homework, files, self.model, self.temperature,
+            prompt_settings={
+                "strip_comments": AI_PROMPT_STRIP_COMMENTS,
+                "token_budget": token_budget(homework)
+            }
+        )
+
+        return await grading_cache.get_or_compute(
+            key, lambda: self.request_grades(homework, files, on_delta)
+        )
+
+    async def request_grades(
+            self,
+            homework: Homework,
+            files: list[SubmissionFile],
+            on_delta: Optional[DeltaCallback] = None
+    ) -> Dict[str, Any]:
+        """Call the AI API; raises AIGradingError on failure or unusable output"""
+
+        # Compacted, budgeted prompt around a memoized instruction block
+        prompt, prompt_tokens = build_prompt(homework, files)
+
+        result = await self.post_with_retries(
+            homework.group_id, prompt, prompt_tokens,
+            on_delta=on_delta if AI_STREAM_GRADING else None
+        )
+        return self.parse_grades(result)
+
+    async def post_with_retries(
+            self,
+            group_id: Optional[int],
+            prompt: str,
+            prompt_tokens: Optional[int] = None,
+            on_delta: Optional[DeltaCallback] = None
+    ) -> dict:
+        """Send the prompt, retrying transient failures behind the circuit breaker
+
+        Each attempt goes to the best-ranked provider; a failure moves on to
+        the next one immediately and backs off only once all have failed.
+        With on_delta the completion is streamed; the returned dict has the
+        same shape as a non-streamed completion either way.
+        """
+        error = None
+        if prompt_tokens is None:
+            prompt_tokens = estimate_tokens(prompt)
+
+        payload = {
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens
+        }
+
+        providers = len(self.pool.providers)
+        failed: Set[str] = set()  # providers that failed in the current round
+        fatal: Set[str] = set()  # providers that rejected the request outright (4xx)
+        rounds = 0
+        previous = None
+
+        for attempt in range(max(1, AI_RETRY_ATTEMPTS, providers)):
+            if not ai_breaker.allow_request():
+                if error is not None:
+                    # An earlier attempt of this call failed (e.g. the half-open probe): count it
+                    ai_breaker.record_failure(error)
+                raise AIUnavailableError(
+                    f"AI grading is temporarily unavailable (circuit open). Last error: {ai_breaker.last_error}"
                 )
 
-                if response.status_code != 200:
-                    raise Exception(f"AI API error: {response.status_code} - {response.text}")
+            retry_after = None
+            try:
+                # Wait for a fair share of the global AI capacity and token budget
+                async with ai_scheduler.slot(
+                        group_id, prompt_tokens + self.max_tokens
+                ) as slot:
+                    # Picked once admitted, so the ranking sees current provider load
+                    provider = self.pool.choose(exclude=failed)
+                    if previous is not None and provider is not previous:
+                        self.pool.failovers += 1
+                    previous = provider
+
+                    async with provider.semaphore:
+                        started = time.perf_counter()
+                        provider.in_flight += 1
+                        try:
+                            if on_delta is not None:
+                                if attempt:
+                                    on_delta(None)
+                                status_code, result, headers, text = await self._send_streaming(
+                                    provider, payload, on_delta
+                                )
+                            else:
+                                status_code, result, headers, text = await self._send(provider, payload)
+                        finally:
+                            provider.in_flight -= 1
+
+                    if status_code == 200 and isinstance(result, dict):
+                        usage = (result.get("usage") or {}).get("total_tokens")
+                        slot.record(status_code, usage)
+                    else:
+                        slot.record(status_code)
+
+            except httpx.HTTPError as e:
+                error = f"{provider.name}: {type(e).__name__}: {e}"
+                provider.record_failure(type(e).__name__, (time.perf_counter() - started) * 1000)
+            else:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if status_code == 200:
+                    if not isinstance(result, dict):
+                        # Upstream is healthy; the body just isn't usable
+                        provider.record_failure("malformed", elapsed_ms)
+                        ai_breaker.record_success()
+                        raise AIResponseError("AI API returned an unusable body")
+                    provider.record_success(elapsed_ms)
+                    ai_breaker.record_success()
+                    return result
+
+                provider.record_failure(f"http_{status_code}", elapsed_ms)
+                error = f"{provider.name}: AI API error: {status_code} - {text[:200]}"
+                if not is_overload_status(status_code):
+                    # Bad request or credentials: retrying this provider will not help
+                    fatal.add(provider.name)
+                retry_after = headers.get("Retry-After")
+
+            if len(fatal) >= providers:
+                break
+
+            # Fail over to the next provider at once; back off only after all have failed
+            failed.add(provider.name)
+            if len(failed) >= providers:
+                failed = set(fatal)
+                if attempt + 1 < max(AI_RETRY_ATTEMPTS, providers):
+                    await asyncio.sleep(retry_delay(rounds, retry_after))
+                rounds += 1
+
+        ai_breaker.record_failure(error)
+        raise AIUnavailableError(error)
+
+    @staticmethod
+    def _headers(provider: AIProvider) -> dict:
+        return {
+            "Authorization": f"Bearer {provider.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    async def _send(self, provider: AIProvider, payload: dict) -> Tuple[int, Optional[dict], httpx.Headers, str]:
+        """One non-streamed request: (status, parsed body or None, headers, error text)"""
+        # Shared pooled client: connections are reused across submissions
+        response = await ai_http_client.post(
+            provider.url,
+            headers=self._headers(provider),
+            json={**payload, "model": provider.model},
+            timeout=provider.timeout
+        )
+        if response.status_code != 200:
+            return response.status_code, None, response.headers, response.text
+
+        try:
+            result = response.json()
+        except ValueError:
+            result = None
+        return response.status_code, result, response.headers, ""
 
-                result = response.json()
-                ai_response = result["choices"][0]["message"]["content"]
+    async def _send_streaming(
+            self,
+            provider: AIProvider,
+            payload: dict,
+            on_delta: DeltaCallback
+    ) -> Tuple[int, Optional[dict], httpx.Headers, str]:
+        """One streamed request, reassembled into a regular chat completion"""
+        async with ai_http_client.stream(
+                provider.url,
+                headers=self._headers(provider),
+                json={**payload, "model": provider.model, "stream": True, "stream_options": {"include_usage": True}},
+                timeout=provider.timeout
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                return response.status_code, None, response.headers, response.text
 
-                # Parse JSON response
+            parts = []
+            usage = None
+            finished = False
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    finished = True
+                    break
                 try:
-                    grades = json.loads(ai_response)
-
-                    # Validate required fields
-                    required_fields = [
-                        "task_completeness", "code_quality", "correctness", "total",
-                        "overall_feedback", "task_completeness_feedback",
-                        "code_quality_feedback", "correctness_feedback"
-                    ]
-
-                    for field in required_fields:
-                        if field not in grades:
-                            raise ValueError(f"Missing field: {field}")
-
-                    # Ensure scores are integers between 0-100
-                    for score_field in ["task_completeness", "code_quality", "correctness", "total"]:
-                        grades[score_field] = max(0, min(100, int(grades[score_field])))
-
-                    return grades
-
-                except (json.JSONDecodeError, ValueError) as e:
-                    # Fallback if AI response is not valid JSON
-                    return {
-                        "task_completeness": 70,
-                        "code_quality": 70,
-                        "correctness": 70,
-                        "total": 70,
-                        "overall_feedback": "Automatic grading encountered an issue. Please review manually.",
-                        "task_completeness_feedback": "Unable to assess automatically.",
-                        "code_quality_feedback": "Unable to assess automatically.",
-                        "correctness_feedback": "Unable to assess automatically."
-                    }
-
-        except Exception as e:
-            # Fallback scoring in case of API failure
-            return {
-                "task_completeness": 50,
-                "code_quality": 50,
-                "correctness": 50,
-                "total": 50,
-                "overall_feedback": f"AI grading service unavailable. Error: {str(e)}",
-                "task_completeness_feedback": "Manual review required.",
-                "code_quality_feedback": "Manual review required.",
-                "correctness_feedback": "Manual review required."
-            }
\ No newline at end of file
+                    chunk = json.loads(data)
+                    choices = chunk.get("choices") or []
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                except (ValueError, AttributeError, IndexError):
+                    return response.status_code, None, response.headers, ""
+
+                usage = chunk.get("usage") or usage
+                if delta:
+                    parts.append(delta)
+                    on_delta(delta)
+
+            if not finished:
+                # The stream ended without [DONE]; whatever arrived is incomplete
+                return response.status_code, None, response.headers, ""
+
+        return response.status_code, {
+            "choices": [{"message": {"role": "assistant", "content": "".join(parts)}}],
+            "usage": usage or {}
+        }, response.headers, ""
+
+    @staticmethod
+    def parse_grades(result: dict) -> Dict[str, Any]:
+        """Extract and validate the grades JSON from a chat completion"""
+        try:
+            ai_response = result["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as e:
+            raise AIResponseError(f"Unexpected AI response shape: {e}")
+
+        # Parse JSON response
+        try:
+            grades = json.loads(ai_response)
+
+            # Validate required fields
+            required_fields = [
+                "task_completeness", "code_quality", "correctness", "total",
+                "overall_feedback", "task_completeness_feedback",
+                "code_quality_feedback", "correctness_feedback"
+            ]
+
+            for field in required_fields:
+                if field not in grades:
+                    raise ValueError(f"Missing field: {field}")
+
+            # Ensure scores are integers between 0-100
+            for score_field in ["task_completeness", "code_quality", "correctness", "total"]:
+                grades[score_field] = max(0, min(100, int(grades[score_field])))
+
+            return grades
+
+        except (json.JSONDecodeError, TypeError, ValueError) as e:
+            raise AIResponseError(str(e))
@@ -1,11 +1,14 @@
 from datetime import datetime, timedelta
 from typing import Optional, List
 from sqlalchemy.orm import Session
+from sqlalchemy import func, select
 from fastapi import HTTPException, status
+from ..database import run_db
 from ..models.user import User
 from ..models.session import Session as UserSession
-from ..utils.security import verify_password, create_access_token
+from ..utils.security import verify_password, verify_password_async, create_access_token
 from ..utils.constants import ACCESS_TOKEN_EXPIRE_HOURS, MAX_SESSIONS_PER_USER
+from ..utils.auth_cache import auth_cache
 import secrets
 
 
@@ -18,6 +21,31 @@ class AuthService:
             return None
         return user
 
+    @staticmethod
+    def get_user_with_session_count(db: Session, username: str) -> tuple[Optional[User], int]:
+        """Load a user and their active session count in one query"""
+        active_sessions = select(func.count(UserSession.id)).where(
+            UserSession.user_id == User.id,
+            UserSession.expires_at > datetime.utcnow()
+        ).correlate(User).scalar_subquery()
+
+        row = db.query(User, active_sessions).filter(User.username == username).first()
+        if not row:
+            return None, 0
+        return row[0], row[1]
+
+    @staticmethod
+    async def authenticate_user_with_session_count(
+            db: Session,
+            username: str,
+            password: str
+    ) -> tuple[Optional[User], int]:
+        """Authenticate without blocking the event loop on bcrypt"""
+        user, active_session_count = await run_db(db, AuthService.get_user_with_session_count, username)
+        if not user or not await verify_password_async(password, user.password_hash):
+            return None, 0
+        return user, active_session_count
+
     @staticmethod
     def get_user_sessions(db: Session, user_id: int) -> List[UserSession]:
         """Get all active sessions for a user"""
@@ -43,6 +71,7 @@ class AuthService:
         if session:
             db.delete(session)
             db.commit()
+            auth_cache.evict_user(user_id)
             return True
         return False
 
@@ -80,8 +109,10 @@ class AuthService:
         """Logout current session"""
         session = db.query(UserSession).filter(UserSession.token == token).first()
         if session:
+            user_id = session.user_id
             db.delete(session)
             db.commit()
+            auth_cache.evict_user(user_id)
             return True
         return False
 
@@ -91,4 +122,5 @@ class AuthService:
         db.query(UserSession).filter(
             UserSession.expires_at <= datetime.utcnow()
         ).delete()
-        db.commit()
\ No newline at end of file
+        db.commit()
+        auth_cache.evict_expired()
\ No newline at end of file
@@ -0,0 +1,94 @@
+import os
+import time
+from typing import Optional
+
+# Consecutive failed AI calls that open the breaker
+AI_BREAKER_FAILURE_THRESHOLD = int(os.getenv("AI_BREAKER_FAILURE_THRESHOLD", "5"))
+# How long the breaker stays open before letting a probe call through
+AI_BREAKER_RESET_SECONDS = float(os.getenv("AI_BREAKER_RESET_SECONDS", "30"))
+
+
+class CircuitBreaker:
+    """closed -> open after repeated failures -> half_open probe -> closed
+
+    While open, callers fail immediately instead of waiting for the full
+    upstream timeout. After reset_seconds one probe call is allowed; its
+    outcome closes the breaker again or restarts the open period.
+    """
+
+    def __init__(
+            self,
+            failure_threshold: int = AI_BREAKER_FAILURE_THRESHOLD,
+            reset_seconds: float = AI_BREAKER_RESET_SECONDS
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_started: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def allow_request(self) -> bool:
+        """Whether a call may go upstream right now"""
+        if self.state == "closed":
+            return True
+
+        now = time.monotonic()
+        if self.state == "open":
+            if now - self.opened_at < self.reset_seconds:
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+            self._probe_started = None
+
+        # half_open: a single probe at a time (a stuck probe is replaced)
+        if self._probe_started is None or now - self._probe_started > self.reset_seconds:
+            self._probe_started = now
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_started = None
+
+    def record_failure(self, error: str = None):
+        self.last_error = error
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self._probe_started = None
+
+    def current_state(self) -> str:
+        """State as callers would see it (open turns half_open once the timeout passes)"""
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return self.state
+
+    def stats(self) -> dict:
+        """Breaker state for admin diagnostics"""
+        retry_in = None
+        if self.state == "open":
+            retry_in = max(0.0, round(self.reset_seconds - (time.monotonic() - self.opened_at), 1))
+        return {
+            "state": self.current_state(),
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_seconds": self.reset_seconds,
+            "retry_in_seconds": retry_in,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected,
+            "last_error": self.last_error
+        }
+
+
+ai_breaker = CircuitBreaker()
@@ -0,0 +1,119 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from ..database import run_db, session_scope
+from ..models.group import Group
+from ..models.homework import Homework
+from ..models.submission import Submission
+from ..models.user import User
+
+# Seconds between counter repair sweeps (0 = only once at startup)
+COUNTER_RECONCILE_INTERVAL_SECONDS = float(os.getenv("COUNTER_RECONCILE_INTERVAL_SECONDS", "3600"))
+
+
+class CounterService:
+    """Denormalized Group.student_count and Homework.submission_count
+
+    Callers adjust the counters in the same transaction as the change they
+    count, with relative UPDATEs so concurrent writers never overwrite each
+    other. reconcile() recomputes them from the source rows.
+    """
+
+    @staticmethod
+    def adjust_students(db: Session, group_id: Optional[int], delta: int):
+        if group_id and delta:
+            db.query(Group).filter(Group.id == group_id).update(
+                {Group.student_count: Group.student_count + delta}, synchronize_session=False
+            )
+
+    @staticmethod
+    def move_student(db: Session, old_group_id: Optional[int], new_group_id: Optional[int]):
+        """Count a student that left one group (or none) for another"""
+        if old_group_id != new_group_id:
+            CounterService.adjust_students(db, old_group_id, -1)
+            CounterService.adjust_students(db, new_group_id, 1)
+
+    @staticmethod
+    def adjust_submissions(db: Session, homework_id: int, delta: int):
+        db.query(Homework).filter(Homework.id == homework_id).update(
+            {Homework.submission_count: Homework.submission_count + delta}, synchronize_session=False
+        )
+
+    @staticmethod
+    def reconcile(db: Session) -> Dict[str, int]:
+        """Rewrite counters that disagree with a live COUNT; returns rows repaired per table"""
+        students = select(func.count(User.id)).where(User.group_id == Group.id).scalar_subquery()
+        submissions = select(func.count(Submission.id)).where(Submission.homework_id == Homework.id).scalar_subquery()
+
+        repaired = {}
+        for name, model, column, actual in (
+                ("groups", Group, Group.student_count, students),
+                ("homework", Homework, Homework.submission_count, submissions)
+        ):
+            drifted = [row.id for row in db.query(model.id).filter(column != actual).all()]
+            if drifted:
+                # Recounted inside the UPDATE so changes since the SELECT are included
+                db.query(model).filter(model.id.in_(drifted)).update(
+                    {column: actual}, synchronize_session=False
+                )
+            repaired[name] = len(drifted)
+
+        db.commit()
+        return repaired
+
+
+class CounterReconciler:
+    """Repairs counter drift at startup (which also fills them after a migration) and periodically"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.repaired = {"groups": 0, "homework": 0}
+        self.last_run_at: Optional[datetime] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def reconcile(self) -> Dict[str, int]:
+        """Run one repair sweep now"""
+        async with session_scope() as db:
+            repaired = await run_db(db, CounterService.reconcile)
+
+        self.runs += 1
+        self.last_run_at = datetime.utcnow()
+        for name, count in repaired.items():
+            self.repaired[name] += count
+        if any(repaired.values()):
+            print(f"🔧 Repaired counters on {repaired['groups']} group(s) and {repaired['homework']} homework")
+        return repaired
+
+    async def _run(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                print(f"⚠️  Counter reconciliation failed: {e}")
+            if COUNTER_RECONCILE_INTERVAL_SECONDS <= 0:
+                return
+            await asyncio.sleep(COUNTER_RECONCILE_INTERVAL_SECONDS)
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": COUNTER_RECONCILE_INTERVAL_SECONDS,
+            "runs": self.runs,
+            "repaired": dict(self.repaired),
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None
+        }
+
+
+counter_reconciler = CounterReconciler()
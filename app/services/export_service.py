@@ -0,0 +1,215 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+from ..database import stream_db
+from ..models.grade import Grade
+from ..models.homework import Homework
+from ..models.submission import Submission
+from ..models.user import User
+
+# Rows fetched per server-side cursor batch while exporting
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+# Format -> media type
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_VIEWS = ("submissions", "gradebook")
+# Leading characters that make a spreadsheet treat a CSV cell as a formula
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+SUBMISSION_EXPORT_FIELDS = [
+    "submission_id", "homework_id", "homework_title", "student_id", "student_name", "submitted_at",
+    "grading_status", "ai_grade", "final_grade", "teacher_total", "modified_by_teacher", "graded_at",
+    "ai_feedback"
+]
+
+
+def export_value(value):
+    """Dates as ISO 8601, everything else unchanged"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def csv_value(value):
+    """export_value, with text that would start a formula quoted with a leading '"""
+    value = export_value(value)
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class ExportWriter:
+    """Encodes export rows (dicts keyed by the header fields) as NDJSON or CSV text"""
+
+    def __init__(self, export_format: str, fields: List[str]):
+        self.export_format = export_format
+        self.fields = fields
+
+    def header(self) -> str:
+        """CSV header line (NDJSON has none)"""
+        return self.rows([dict(zip(self.fields, self.fields))]) if self.export_format == "csv" else ""
+
+    def rows(self, rows: List[dict]) -> str:
+        if self.export_format == "ndjson":
+            return "".join(
+                json.dumps({field: export_value(row[field]) for field in self.fields}) + "\n" for row in rows
+            )
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([csv_value(row[field]) for field in self.fields])
+        return buffer.getvalue()
+
+
+class ExportService:
+    @staticmethod
+    def submitted_between(date_from: Optional[date], date_to: Optional[date]) -> list:
+        """Submission date conditions; both ends are inclusive days"""
+        midnight = datetime.min.time()
+        conditions = []
+        if date_from is not None:
+            conditions.append(Submission.submitted_at >= datetime.combine(date_from, midnight))
+        if date_to is not None:
+            conditions.append(Submission.submitted_at < datetime.combine(date_to + timedelta(days=1), midnight))
+        return conditions
+
+    @staticmethod
+    def submissions_statement(
+            group_id: int,
+            teacher_id: int,
+            homework_id: Optional[int] = None,
+            date_from: Optional[date] = None,
+            date_to: Optional[date] = None
+    ):
+        """One row per submission, oldest first"""
+        statement = select(
+            Submission.id.label("submission_id"),
+            Submission.homework_id,
+            Homework.title.label("homework_title"),
+            Submission.student_id,
+            User.fullname.label("student_name"),
+            Submission.submitted_at,
+            Submission.grading_status,
+            Submission.ai_grade,
+            Submission.final_grade,
+            Grade.teacher_total,
+            Grade.modified_by_teacher,
+            Submission.graded_at,
+            Submission.ai_feedback
+        ).join(
+            Homework, Submission.homework_id == Homework.id
+        ).join(
+            User, Submission.student_id == User.id
+        ).outerjoin(
+            Grade, Grade.submission_id == Submission.id
+        ).where(
+            Homework.group_id == group_id,
+            Homework.teacher_id == teacher_id,
+            *ExportService.submitted_between(date_from, date_to)
+        )
+
+        if homework_id:
+            statement = statement.where(Submission.homework_id == homework_id)
+
+        return statement.order_by(Submission.submitted_at, Submission.id)
+
+    @staticmethod
+    def get_gradebook_homework(
+            db: Session,
+            group_id: int,
+            teacher_id: int,
+            homework_id: Optional[int] = None
+    ) -> List[Tuple[int, str]]:
+        """(id, title) of the gradebook's homework columns, in assignment order"""
+        query = db.query(Homework.id, Homework.title).filter(
+            Homework.group_id == group_id,
+            Homework.teacher_id == teacher_id
+        )
+        if homework_id:
+            query = query.filter(Homework.id == homework_id)
+        return [(row.id, row.title) for row in query.order_by(Homework.start_date, Homework.id).all()]
+
+    @staticmethod
+    def gradebook_statement(
+            group_id: int,
+            homework_ids: List[int],
+            date_from: Optional[date] = None,
+            date_to: Optional[date] = None
+    ):
+        """Students of the group, each followed by their submissions to the gradebook homework"""
+        return select(
+            User.id.label("student_id"),
+            User.fullname.label("student_name"),
+            Submission.homework_id,
+            Submission.grading_status,
+            Submission.final_grade
+        ).outerjoin(
+            Submission,
+            and_(
+                Submission.student_id == User.id,
+                Submission.homework_id.in_(homework_ids),
+                *ExportService.submitted_between(date_from, date_to)
+            )
+        ).where(
+            User.group_id == group_id,
+            User.role == "student"
+        ).order_by(User.id)
+
+    @staticmethod
+    def gradebook_fields(homework: List[Tuple[int, str]]) -> Dict[int, str]:
+        """Homework id -> gradebook column name (titles may repeat, so the id is included)"""
+        return {homework_id: f"{title} (#{homework_id})" for homework_id, title in homework}
+
+    @staticmethod
+    async def export_submissions(db, export_format: str, group_id: int, teacher_id: int,
+                                 homework_id: Optional[int] = None, date_from: Optional[date] = None,
+                                 date_to: Optional[date] = None) -> AsyncIterator[str]:
+        """Submission rows as export text, one chunk per batch"""
+        writer = ExportWriter(export_format, SUBMISSION_EXPORT_FIELDS)
+        if writer.header():
+            yield writer.header()
+
+        statement = ExportService.submissions_statement(group_id, teacher_id, homework_id, date_from, date_to)
+        async for batch in stream_db(db, statement, EXPORT_BATCH_SIZE):
+            yield writer.rows([row._mapping for row in batch])
+
+    @staticmethod
+    async def export_gradebook(db, export_format: str, group_id: int, homework: List[Tuple[int, str]],
+                               date_from: Optional[date] = None,
+                               date_to: Optional[date] = None) -> AsyncIterator[str]:
+        """One row per student with a graded final score per homework and their total
+
+        Rows arrive ordered by student, so only the current student is held
+        while the cursor moves on.
+        """
+        columns = ExportService.gradebook_fields(homework)
+        writer = ExportWriter(export_format, ["student_id", "student_name", *columns.values(), "total"])
+        if writer.header():
+            yield writer.header()
+
+        def new_row(row) -> dict:
+            return {"student_id": row.student_id, "student_name": row.student_name,
+                    **{column: None for column in columns.values()}, "total": 0}
+
+        current = None
+        statement = ExportService.gradebook_statement(group_id, list(columns), date_from, date_to)
+        async for batch in stream_db(db, statement, EXPORT_BATCH_SIZE):
+            finished = []
+            for row in batch:
+                if current is None or current["student_id"] != row.student_id:
+                    if current is not None:
+                        finished.append(current)
+                    current = new_row(row)
+                if row.homework_id is not None and row.grading_status == "graded":
+                    current[columns[row.homework_id]] = row.final_grade
+                    current["total"] += row.final_grade
+            if finished:
+                yield writer.rows(finished)
+
+        if current is not None:
+            yield writer.rows([current])
@@ -1,13 +1,24 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func, desc
+from sqlalchemy.orm import Session, joinedload, load_only
+from sqlalchemy import and_, func, desc, select
 from fastapi import HTTPException, status
 from ..models.grade import Grade
 from ..models.submission import Submission
 from ..models.homework import Homework
 from ..models.user import User
 from ..schemas.grade import GradeUpdate
+from ..utils.fast_json import row_dicts
+from ..utils.pagination import PAGE_SIZE_DEFAULT, paginate
+from .leaderboard_service import LeaderboardService
+
+# Columns behind SubmissionResponse; list queries leave grading bookkeeping and files unread
+SUBMISSION_LIST_COLUMNS = (
+    Submission.id, Submission.homework_id, Submission.student_id, Submission.submitted_at,
+    Submission.ai_grade, Submission.final_grade, Submission.ai_feedback, Submission.grading_status
+)
+# Submission pages run newest first; the student's follow ix_submissions_student_submitted
+SUBMISSION_PAGE_KEYS = (Submission.submitted_at, Submission.id)
 
 
 class GradeService:
@@ -16,6 +27,72 @@ class GradeService:
         """Get grade by submission ID"""
         return db.query(Grade).filter(Grade.submission_id == submission_id).first()
 
+    @staticmethod
+    def get_student_submission(db: Session, submission_id: int, student_id: int) -> Submission:
+        """Get a submission owned by the student (with its grade) or raise 404"""
+        submission = db.query(Submission).options(
+            joinedload(Submission.grade)
+        ).filter(
+            Submission.id == submission_id,
+            Submission.student_id == student_id
+        ).first()
+
+        if not submission:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Submission not found"
+            )
+        return submission
+
+    @staticmethod
+    def get_student_submission_grade(db: Session, submission_id: int, student_id: int) -> Grade:
+        """Get grade of a submission owned by the student or raise 404"""
+
+        # Verify submission belongs to current student
+        submission = db.query(Submission).filter(
+            Submission.id == submission_id,
+            Submission.student_id == student_id
+        ).first()
+
+        if not submission:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Submission not found"
+            )
+
+        grade = GradeService.get_grade_by_submission(db, submission_id)
+        if not grade:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Grade not found"
+            )
+        return grade
+
+    @staticmethod
+    def get_teacher_submission_grade(db: Session, submission_id: int, teacher_id: int) -> Grade:
+        """Get grade of a submission to the teacher's homework or raise 404"""
+
+        # Verify teacher has access to this submission
+        submission = db.query(Submission).options(
+            joinedload(Submission.homework)
+        ).filter(
+            Submission.id == submission_id
+        ).first()
+
+        if not submission or submission.homework.teacher_id != teacher_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Submission not found or you don't have access"
+            )
+
+        grade = GradeService.get_grade_by_submission(db, submission_id)
+        if not grade:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Grade not found"
+            )
+        return grade
+
     @staticmethod
     def update_grade(
             db: Session,
@@ -52,7 +129,7 @@ class GradeService:
 
         # Update scores
         updated = False
-        for field, value in grade_data.dict(exclude_unset=True).items():
+        for field, value in grade_data.model_dump(exclude_unset=True).items():
             if value is not None:
                 setattr(grade, field, value)
                 updated = True
@@ -66,9 +143,16 @@ class GradeService:
                                   ) // 3
 
             # Update submission final grade
+            points_delta = grade.teacher_total - submission.final_grade
             submission.final_grade = grade.teacher_total
             grade.modified_by_teacher = datetime.utcnow()
 
+            if points_delta:
+                LeaderboardService.record_points(
+                    db, submission.homework.group_id, submission.student_id,
+                    submission.submitted_at, points_delta
+                )
+
             db.commit()
             db.refresh(grade)
 
@@ -80,7 +164,11 @@ class GradeService:
             group_id: int,
             period: str = "all"
     ) -> List[dict]:
-        """Get leaderboard for a group"""
+        """Get leaderboard for a group aggregated live from submissions
+
+        Routers read LeaderboardService; this stays as the reference
+        aggregate for spot checks.
+        """
 
         # Calculate time filter
         time_filter = None
@@ -102,8 +190,6 @@ class GradeService:
             func.count(Submission.id).label('submission_count')
         ).join(
             Submission, User.id == Submission.student_id
-        ).join(
-            Homework, Submission.homework_id == Homework.id
         ).filter(
             User.group_id == group_id
         )
@@ -132,31 +218,60 @@ class GradeService:
     def get_student_submissions(
             db: Session,
             student_id: int,
-            limit: int = 20
-    ) -> List[Submission]:
-        """Get student's recent submissions with grades"""
-        return db.query(Submission).options(
-            joinedload(Submission.homework),
-            joinedload(Submission.grade)
+            limit: int = 20,
+            cursor: Optional[str] = None,
+            with_total: bool = False
+    ) -> dict:
+        """Page of the student's submissions, newest first (list columns only)"""
+        query = db.query(Submission).options(
+            load_only(*SUBMISSION_LIST_COLUMNS),
+            joinedload(Submission.homework).load_only(Homework.id, Homework.title)
         ).filter(
             Submission.student_id == student_id
-        ).order_by(
-            desc(Submission.submitted_at)
-        ).limit(limit).all()
+        )
+        return paginate(db, query, SUBMISSION_PAGE_KEYS, cursor, limit, with_total, descending=True)
+
+    @staticmethod
+    def get_student_submission_rows(
+            db: Session,
+            student_id: int,
+            limit: int = 20,
+            cursor: Optional[str] = None,
+            with_total: bool = False
+    ) -> dict:
+        """get_student_submissions with plain SubmissionResponse-shaped dicts as items"""
+        statement = select(
+            *SUBMISSION_LIST_COLUMNS,
+            Homework.title.label("homework_title"),
+            User.fullname.label("student_name")
+        ).join(
+            Homework, Submission.homework_id == Homework.id
+        ).join(
+            User, Submission.student_id == User.id
+        ).where(
+            Submission.student_id == student_id
+        )
+        return paginate(
+            db, statement, SUBMISSION_PAGE_KEYS, cursor, limit, with_total, descending=True,
+            fetch=lambda paged: row_dicts(db.execute(paged), files=[])
+        )
 
     @staticmethod
     def get_group_submissions(
             db: Session,
             group_id: int,
             teacher_id: int,
-            homework_id: Optional[int] = None
-    ) -> List[Submission]:
-        """Get all submissions for a group (teacher view)"""
+            homework_id: Optional[int] = None,
+            cursor: Optional[str] = None,
+            limit: int = PAGE_SIZE_DEFAULT,
+            with_total: bool = False
+    ) -> dict:
+        """Page of a group's submissions, newest first (teacher view)"""
 
         query = db.query(Submission).options(
-            joinedload(Submission.student),
-            joinedload(Submission.homework),
-            joinedload(Submission.grade)
+            load_only(*SUBMISSION_LIST_COLUMNS),
+            joinedload(Submission.student).load_only(User.id, User.fullname),
+            joinedload(Submission.homework).load_only(Homework.id, Homework.title)
         ).join(
             Homework, Submission.homework_id == Homework.id
         ).filter(
@@ -169,4 +284,36 @@ class GradeService:
         if homework_id:
             query = query.filter(Submission.homework_id == homework_id)
 
-        return query.order_by(desc(Submission.submitted_at)).all()
\ No newline at end of file
+        return paginate(db, query, SUBMISSION_PAGE_KEYS, cursor, limit, with_total, descending=True)
+
+    @staticmethod
+    def get_group_submission_rows(
+            db: Session,
+            group_id: int,
+            teacher_id: int,
+            homework_id: Optional[int] = None,
+            cursor: Optional[str] = None,
+            limit: int = PAGE_SIZE_DEFAULT,
+            with_total: bool = False
+    ) -> dict:
+        """get_group_submissions with plain SubmissionResponse-shaped dicts as items"""
+        statement = select(
+            *SUBMISSION_LIST_COLUMNS,
+            Homework.title.label("homework_title"),
+            User.fullname.label("student_name")
+        ).join(
+            Homework, Submission.homework_id == Homework.id
+        ).join(
+            User, Submission.student_id == User.id
+        ).where(
+            Homework.group_id == group_id,
+            Homework.teacher_id == teacher_id
+        )
+
+        if homework_id:
+            statement = statement.where(Submission.homework_id == homework_id)
+
+        return paginate(
+            db, statement, SUBMISSION_PAGE_KEYS, cursor, limit, with_total, descending=True,
+            fetch=lambda paged: row_dicts(db.execute(paged), files=[])
+        )
@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+# Results of identical (homework, files, model) gradings are reused
+GRADING_CACHE_ENABLED = os.getenv("GRADING_CACHE_ENABLED", "true").lower() == "true"
+GRADING_CACHE_MAX_ENTRIES = int(os.getenv("GRADING_CACHE_MAX_ENTRIES", "2000"))
+GRADING_CACHE_DIR = os.getenv("GRADING_CACHE_DIR", "")  # Empty keeps the cache in memory only
+
+
+def normalize_content(content: str) -> str:
+    """Ignore line endings and trailing whitespace when comparing code"""
+    lines = [line.rstrip() for line in content.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    return "\n".join(lines).strip("\n")
+
+
+def grading_cache_key(homework, files, model: str, temperature: float, prompt_settings: dict = None) -> str:
+    """Hash of everything that influences the AI's grade"""
+    payload = {
+        "prompt_settings": prompt_settings or {},
+        "title": homework.title,
+        "description": homework.description,
+        "ai_grading_prompt": homework.ai_grading_prompt,
+        "file_extension": homework.file_extension,
+        "model": model,
+        "temperature": temperature,
+        "files": sorted(
+            [file.file_name, normalize_content(file.content)] for file in files
+        )
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class GradingCache:
+    """LRU of AI grading results with an optional on-disk tier
+
+    Concurrent lookups of a key that is still being graded wait on the
+    same upstream call instead of starting their own.
+    """
+
+    def __init__(
+            self,
+            max_entries: int = GRADING_CACHE_MAX_ENTRIES,
+            directory: str = GRADING_CACHE_DIR,
+            enabled: bool = GRADING_CACHE_ENABLED
+    ):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.saved_api_seconds = 0.0
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[dict]]) -> dict:
+        """Return cached grades for key, calling compute() at most once per key"""
+        if not self.enabled:
+            return await compute()
+
+        entry = self._get_memory(key)
+        if entry is None and self.directory:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self.disk_hits += 1
+                self._set_memory(key, entry)
+        if entry is not None:
+            self.hits += 1
+            self.saved_api_seconds += entry["api_seconds"]
+            return dict(entry["grades"])
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                entry = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The leading call was cancelled; take over the work
+                self.coalesced -= 1
+                return await self.get_or_compute(key, compute)
+            self.hits += 1
+            self.saved_api_seconds += entry["api_seconds"]
+            return dict(entry["grades"])
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            started = time.perf_counter()
+            grades = await compute()
+            entry = {
+                "grades": grades,
+                "api_seconds": round(time.perf_counter() - started, 3),
+                "created_at": time.time()
+            }
+            self._set_memory(key, entry)
+            if self.directory:
+                await asyncio.to_thread(self._write_disk, key, entry)
+            future.set_result(entry)
+            return dict(grades)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            # Waiters see the same failure; nothing is cached
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody was waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+    def _get_memory(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _set_memory(self, key: str, entry: dict):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, entry: dict):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)  # Readers never see a half-written file
+        except OSError as e:
+            print(f"⚠️  Could not persist grading cache entry: {e}")
+
+    def clear(self):
+        """Drop in-memory entries (the disk tier is left alone)"""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit rate and upstream time saved, for diagnostics"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "disk_tier": bool(self.directory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_api_seconds": round(self.saved_api_seconds, 2)
+        }
+
+
+grading_cache = GradingCache()
@@ -0,0 +1,414 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from ..database import run_db, session_scope
+from ..models.grade import Grade
+from ..models.submission import Submission, SubmissionFile
+from .ai_service import AIService, AIGradingError
+from .circuit_breaker import ai_breaker
+from .grading_stream import FeedbackStreamParser, grading_events
+from .leaderboard_service import LeaderboardService
+
+# Number of submissions graded concurrently by background workers
+GRADING_WORKERS = int(os.getenv("GRADING_WORKERS", "4"))
+# Deferred (needs_regrade) submissions are retried on this interval once the AI recovers
+AI_REGRADE_INTERVAL_SECONDS = float(os.getenv("AI_REGRADE_INTERVAL_SECONDS", "30"))
+AI_REGRADE_BATCH_SIZE = int(os.getenv("AI_REGRADE_BATCH_SIZE", "20"))
+AI_REGRADE_MAX_ATTEMPTS = int(os.getenv("AI_REGRADE_MAX_ATTEMPTS", "5"))
+# A submission left "grading" this long (its worker died) may be claimed again
+GRADING_CLAIM_TIMEOUT_SECONDS = float(os.getenv("GRADING_CLAIM_TIMEOUT_SECONDS", "600"))
+
+# Requeued automatically on startup
+UNFINISHED_STATUSES = ("pending", "grading")
+# Any status a worker may pick up
+GRADABLE_STATUSES = ("pending", "grading", "needs_regrade")
+# Statuses a worker may claim (plus "grading" once it has gone stale)
+CLAIMABLE_STATUSES = ("pending", "needs_regrade")
+
+
+def elapsed_ms(start: Optional[datetime], end: Optional[datetime]) -> Optional[int]:
+    """Milliseconds between two timestamps (None if either is missing)"""
+    if start is None or end is None:
+        return None
+    return max(0, int((end - start).total_seconds() * 1000))
+
+
+class GradingService:
+    @staticmethod
+    def start_grading(db: Session, submission_id: int) -> Optional[Submission]:
+        """Claim a queued submission for grading and load what the AI needs
+
+        The claim is one conditional UPDATE, so when several processes queue
+        the same submission only one of them grades it (None for the rest).
+        """
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=GRADING_CLAIM_TIMEOUT_SECONDS)
+        claimed = db.query(Submission).filter(
+            Submission.id == submission_id,
+            or_(
+                Submission.grading_status.in_(CLAIMABLE_STATUSES),
+                and_(
+                    Submission.grading_status == "grading",
+                    or_(Submission.grading_started_at.is_(None), Submission.grading_started_at < stale)
+                )
+            )
+        ).update({
+            Submission.grading_status: "grading",
+            Submission.grading_started_at: now,
+            Submission.grading_attempts: func.coalesce(Submission.grading_attempts, 0) + 1
+        }, synchronize_session=False)
+        db.commit()
+        if not claimed:
+            return None
+
+        # Loaded eagerly so the objects stay usable after the session closes
+        return db.query(Submission).options(
+            joinedload(Submission.homework),
+            selectinload(Submission.files).undefer(SubmissionFile.content)
+        ).filter(Submission.id == submission_id).first()
+
+    @staticmethod
+    def finish_grading(db: Session, submission_id: int, ai_grades: dict, grading_ms: int) -> Optional[dict]:
+        """Store AI scores for a submission and credit its points
+
+        Returns the recorded timings, or None if the submission was already
+        finished elsewhere.
+        """
+        submission = db.query(Submission).options(
+            joinedload(Submission.homework)
+        ).filter(Submission.id == submission_id).first()
+
+        if not submission or submission.grading_status not in GRADABLE_STATUSES:
+            return None
+
+        now = datetime.utcnow()
+        queue_wait_ms = elapsed_ms(submission.grading_queued_at, submission.grading_started_at)
+
+        grade = Grade(
+            submission_id=submission.id,
+            ai_task_completeness=ai_grades["task_completeness"],
+            ai_code_quality=ai_grades["code_quality"],
+            ai_correctness=ai_grades["correctness"],
+            ai_total=ai_grades["total"],
+            final_task_completeness=ai_grades["task_completeness"],
+            final_code_quality=ai_grades["code_quality"],
+            final_correctness=ai_grades["correctness"],
+            ai_feedback=ai_grades["overall_feedback"],
+            task_completeness_feedback=ai_grades["task_completeness_feedback"],
+            code_quality_feedback=ai_grades["code_quality_feedback"],
+            correctness_feedback=ai_grades["correctness_feedback"],
+            queue_wait_ms=queue_wait_ms,
+            grading_ms=grading_ms,
+            graded_at=now
+        )
+        db.add(grade)
+
+        # The submission was counted with 0 points when it was accepted
+        points_delta = ai_grades["total"] - submission.final_grade
+
+        submission.ai_grade = ai_grades["total"]
+        submission.final_grade = ai_grades["total"]
+        submission.ai_feedback = ai_grades["overall_feedback"]
+        submission.grading_status = "graded"
+        submission.graded_at = now
+        submission.grading_error = None
+
+        LeaderboardService.record_points(
+            db, submission.homework.group_id, submission.student_id,
+            submission.submitted_at, points_delta
+        )
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker stored the grade first (grades.submission_id is unique)
+            db.rollback()
+            return None
+
+        return {"queue_wait_ms": queue_wait_ms, "grading_ms": grading_ms}
+
+    @staticmethod
+    def defer_grading(db: Session, submission_id: int, error: str) -> Optional[str]:
+        """Leave a submission ungraded (0 points) for the regrader to retry
+
+        Returns the new status: needs_regrade, or failed once the attempt
+        limit is reached.
+        """
+        submission = db.query(Submission).filter(Submission.id == submission_id).first()
+        if not submission or submission.grading_status not in GRADABLE_STATUSES:
+            return None
+
+        if (submission.grading_attempts or 0) >= AI_REGRADE_MAX_ATTEMPTS:
+            submission.grading_status = "failed"
+        else:
+            submission.grading_status = "needs_regrade"
+        submission.grading_error = error
+        db.commit()
+
+        return submission.grading_status
+
+    @staticmethod
+    def fail_grading(db: Session, submission_id: int, error: str):
+        """Record that grading could not complete"""
+        submission = db.query(Submission).filter(Submission.id == submission_id).first()
+        if not submission or submission.grading_status not in GRADABLE_STATUSES:
+            return
+
+        submission.grading_status = "failed"
+        submission.grading_error = error
+        db.commit()
+
+    @staticmethod
+    def get_regrade_submission_ids(db: Session, limit: int) -> List[int]:
+        """Oldest submissions waiting for the AI to come back"""
+        rows = db.query(Submission.id).filter(
+            Submission.grading_status == "needs_regrade"
+        ).order_by(Submission.id).limit(limit).all()
+        return [row.id for row in rows]
+
+    @staticmethod
+    def mark_requeued(db: Session, submission_ids: List[int]):
+        """Restart the queue-wait clock of deferred submissions going back on the queue"""
+        if not submission_ids:
+            return
+        db.query(Submission).filter(
+            Submission.id.in_(submission_ids),
+            Submission.grading_status == "needs_regrade"
+        ).update({Submission.grading_queued_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def get_stale_grading_submission_ids(db: Session, limit: int) -> List[int]:
+        """Submissions whose worker stopped mid-grading (claimable again)"""
+        stale = datetime.utcnow() - timedelta(seconds=GRADING_CLAIM_TIMEOUT_SECONDS)
+        rows = db.query(Submission.id).filter(
+            Submission.grading_status == "grading",
+            or_(Submission.grading_started_at.is_(None), Submission.grading_started_at < stale)
+        ).order_by(Submission.id).limit(limit).all()
+        return [row.id for row in rows]
+
+    @staticmethod
+    def count_by_status(db: Session) -> dict:
+        """Number of submissions in each grading status"""
+        rows = db.query(
+            Submission.grading_status, func.count(Submission.id)
+        ).group_by(Submission.grading_status).all()
+        return {grading_status: count for grading_status, count in rows}
+
+    @staticmethod
+    def get_unfinished_submission_ids(db: Session) -> List[int]:
+        """Submissions accepted but not yet graded (e.g. before a restart)"""
+        rows = db.query(Submission.id).filter(
+            Submission.grading_status.in_(UNFINISHED_STATUSES)
+        ).all()
+        # Sorted here: ORDER BY id makes SQLite walk the whole table instead of the status index
+        return sorted(row.id for row in rows)
+
+
+class GradingQueue:
+    """asyncio workers that grade accepted submissions in the background
+
+    Each job opens its own short database sessions before and after the AI
+    call, so no pooled connection is held while waiting on the API.
+    """
+
+    def __init__(self, workers: int = GRADING_WORKERS):
+        self.worker_count = max(1, workers)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._regrader: Optional[asyncio.Task] = None
+        self._ai_service: Optional[AIService] = None
+        self._queued_ids = set()  # Queued or in flight, so a job never runs twice
+        self.enqueued = 0
+        self.completed = 0
+        self.failed = 0
+        self.deferred = 0
+        self.regrades_queued = 0
+        self.total_wait_ms = 0
+        self.total_grading_ms = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self):
+        """Spawn the workers and requeue anything left unfinished"""
+        if self.running:
+            return
+
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.worker_count)
+        ]
+        self._regrader = asyncio.create_task(self._regrade_loop())
+
+        async with session_scope() as db:
+            unfinished = await run_db(db, GradingService.get_unfinished_submission_ids)
+        for submission_id in unfinished:
+            self._put(submission_id)
+        if unfinished:
+            print(f"🔁 Requeued {len(unfinished)} ungraded submission(s)")
+
+    async def stop(self):
+        """Cancel the workers; unfinished jobs are requeued on next start"""
+        tasks = self._workers + ([self._regrader] if self._regrader else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._regrader = None
+        self._queue = None
+        self._queued_ids.clear()
+
+    async def enqueue(self, submission_id: int):
+        """Queue a saved submission for grading"""
+        if not self.running:
+            # Scripts and tests that skip the startup hook still get workers
+            await self.start()
+        if self._put(submission_id):
+            self.enqueued += 1
+
+    def _put(self, submission_id: int) -> bool:
+        if submission_id in self._queued_ids:
+            return False
+        self._queued_ids.add(submission_id)
+        self._queue.put_nowait(submission_id)
+        return True
+
+    async def join(self):
+        """Wait until every queued job has been processed"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _worker(self):
+        while True:
+            submission_id = await self._queue.get()
+            try:
+                await self.grade(submission_id)
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ Grading submission {submission_id} failed: {e}")
+                async with session_scope() as db:
+                    await run_db(db, GradingService.fail_grading, submission_id, str(e))
+            finally:
+                self._queued_ids.discard(submission_id)
+                self._queue.task_done()
+
+    async def grade(self, submission_id: int):
+        """Grade one submission end to end"""
+        async with session_scope() as db:
+            submission = await run_db(db, GradingService.start_grading, submission_id)
+        if submission is None:
+            return
+
+        if self._ai_service is None:
+            self._ai_service = AIService()
+
+        # Event-stream subscribers see feedback while the AI writes it
+        grading_events.open(submission_id)
+        grading_events.publish(submission_id, "status", {"grading_status": "grading"})
+        try:
+            await self._grade(submission, self._feedback_publisher(submission_id))
+        finally:
+            grading_events.close(submission_id)
+
+    @staticmethod
+    def _feedback_publisher(submission_id: int):
+        parser = FeedbackStreamParser()
+
+        def on_delta(text: Optional[str]):
+            if text is None:
+                parser.reset()
+                grading_events.publish(submission_id, "reset", {})
+                return
+            for field, fragment in parser.feed(text):
+                grading_events.publish(submission_id, "feedback", {"field": field, "text": fragment})
+
+        return on_delta
+
+    async def _grade(self, submission: Submission, on_delta):
+        submission_id = submission.id
+        started = time.perf_counter()
+        try:
+            ai_grades = await self._ai_service.grade_submission(
+                submission.homework, submission.files, on_delta=on_delta
+            )
+        except AIGradingError as e:
+            # No made-up score: park it for the regrader
+            self.deferred += 1
+            async with session_scope() as db:
+                await run_db(db, GradingService.defer_grading, submission_id, str(e))
+            return
+        grading_ms = int((time.perf_counter() - started) * 1000)
+
+        async with session_scope() as db:
+            timings = await run_db(db, GradingService.finish_grading, submission_id, ai_grades, grading_ms)
+
+        if timings is not None:
+            self.completed += 1
+            self.total_wait_ms += timings["queue_wait_ms"] or 0
+            self.total_grading_ms += grading_ms
+
+    async def _regrade_loop(self):
+        """Requeue needs_regrade submissions whenever the AI looks healthy"""
+        while True:
+            await asyncio.sleep(AI_REGRADE_INTERVAL_SECONDS)
+            try:
+                await self.requeue_deferred()
+                await self.requeue_stale()
+            except Exception as e:
+                print(f"⚠️  Regrade sweep failed: {e}")
+
+    async def requeue_deferred(self) -> int:
+        """Queue a batch of deferred submissions unless the breaker is open"""
+        breaker_state = ai_breaker.current_state()
+        if breaker_state == "open" or not self.running:
+            return 0
+
+        # A half-open breaker only lets one probe through, so send just one
+        limit = 1 if breaker_state == "half_open" else AI_REGRADE_BATCH_SIZE
+
+        async with session_scope() as db:
+            submission_ids = await run_db(db, GradingService.get_regrade_submission_ids, limit)
+            submission_ids = [i for i in submission_ids if i not in self._queued_ids]
+            # Before queueing, so queue wait covers this pass and not the whole deferral
+            await run_db(db, GradingService.mark_requeued, submission_ids)
+
+        queued = 0
+        for submission_id in submission_ids:
+            if self._put(submission_id):
+                queued += 1
+        self.regrades_queued += queued
+        return queued
+
+    async def requeue_stale(self) -> int:
+        """Queue submissions left "grading" by a worker that died (e.g. in another process)"""
+        if not self.running:
+            return 0
+
+        async with session_scope() as db:
+            submission_ids = await run_db(db, GradingService.get_stale_grading_submission_ids, AI_REGRADE_BATCH_SIZE)
+
+        return sum(1 for submission_id in submission_ids if self._put(submission_id))
+
+    def stats(self) -> dict:
+        """Queue depth and timing counters for diagnostics"""
+        return {
+            "running": self.running,
+            "workers": self.worker_count,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "deferred": self.deferred,
+            "regrades_queued": self.regrades_queued,
+            "avg_queue_wait_ms": round(self.total_wait_ms / self.completed, 1) if self.completed else 0.0,
+            "avg_grading_ms": round(self.total_grading_ms / self.completed, 1) if self.completed else 0.0
+        }
+
+
+grading_queue = GradingQueue()
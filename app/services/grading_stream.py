@@ -0,0 +1,172 @@
+import asyncio
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Seconds between keep-alive comments (and status re-checks) on idle event streams
+GRADING_STREAM_HEARTBEAT_SECONDS = float(os.getenv("GRADING_STREAM_HEARTBEAT_SECONDS", "15"))
+
+FEEDBACK_FIELDS = (
+    "overall_feedback",
+    "task_completeness_feedback",
+    "code_quality_feedback",
+    "correctness_feedback"
+)
+
+ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class FeedbackStreamParser:
+    """Pull feedback text out of the grading JSON while it is still being generated
+
+    Fed arbitrary chunks of the model output, it returns (field, text)
+    fragments for the string values of FEEDBACK_FIELDS as soon as they
+    arrive. Scores are not parsed here; the complete JSON is validated
+    once the stream ends, exactly like a non-streamed response.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._in_string = False
+        self._escape = None  # None, "" after a backslash, or collected \\u hex digits
+        self._expect_value = False
+        self._is_value = False
+        self._key = ""
+        self._buffer: List[str] = []
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        fragments = []
+        for char in text:
+            if not self._in_string:
+                if char == '"':
+                    self._in_string = True
+                    self._is_value = self._expect_value
+                    self._buffer = []
+                elif char == ":":
+                    self._expect_value = True
+                elif char in ",{}":
+                    self._expect_value = False
+                continue
+
+            if self._escape is not None:
+                char = self._unescape(char)
+                if char is None:
+                    continue
+            elif char == "\\":
+                self._escape = ""
+                continue
+            elif char == '"':
+                self._in_string = False
+                if self._is_value:
+                    self._expect_value = False
+                else:
+                    self._key = "".join(self._buffer)
+                self._flush(fragments)
+                continue
+
+            self._buffer.append(char)
+
+        self._flush(fragments)
+        return fragments
+
+    def _unescape(self, char: str) -> Optional[str]:
+        """Decode one character of an escape sequence (None while incomplete)"""
+        if self._escape == "":
+            if char == "u":
+                self._escape = "u"
+                return None
+            self._escape = None
+            return ESCAPES.get(char, char)
+
+        self._escape += char
+        if len(self._escape) < 5:
+            return None
+        try:
+            decoded = chr(int(self._escape[1:], 16))
+        except ValueError:
+            decoded = ""
+        self._escape = None
+        return decoded
+
+    def _flush(self, fragments: List[Tuple[str, str]]):
+        if self._is_value and self._key in FEEDBACK_FIELDS and self._buffer:
+            fragments.append((self._key, "".join(self._buffer)))
+            self._buffer = []
+        elif self._is_value:
+            self._buffer = []
+
+
+def sse_event(event: str, data) -> str:
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class GradingEvents:
+    """In-process fan-out of grading progress to event-stream subscribers
+
+    The grading worker opens a channel per submission, publishes events
+    while the AI response streams in and closes it when grading ends.
+    Late subscribers replay what was published so far.
+    """
+
+    def __init__(self):
+        self._channels: Dict[int, dict] = {}
+        self.published = 0
+
+    def _channel(self, submission_id: int) -> dict:
+        channel = self._channels.get(submission_id)
+        if channel is None:
+            channel = {"open": False, "history": [], "subscribers": set()}
+            self._channels[submission_id] = channel
+        return channel
+
+    def open(self, submission_id: int):
+        """Start collecting events for a submission being graded"""
+        channel = self._channel(submission_id)
+        channel["open"] = True
+        channel["history"] = []
+
+    def publish(self, submission_id: int, event: str, data: dict):
+        channel = self._channels.get(submission_id)
+        if channel is None or not channel["open"]:
+            return
+        self.published += 1
+        channel["history"].append((event, data))
+        for queue in channel["subscribers"]:
+            queue.put_nowait((event, data))
+
+    def close(self, submission_id: int):
+        """Grading finished; subscribers receive None and should re-read the status"""
+        channel = self._channels.pop(submission_id, None)
+        if channel is None:
+            return
+        for queue in channel["subscribers"]:
+            queue.put_nowait(None)
+
+    def subscribe(self, submission_id: int) -> asyncio.Queue:
+        channel = self._channel(submission_id)
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in channel["history"]:
+            queue.put_nowait(item)
+        channel["subscribers"].add(queue)
+        return queue
+
+    def unsubscribe(self, submission_id: int, queue: asyncio.Queue):
+        channel = self._channels.get(submission_id)
+        if channel is None:
+            return
+        channel["subscribers"].discard(queue)
+        if not channel["subscribers"] and not channel["open"]:
+            del self._channels[submission_id]
+
+    def stats(self) -> dict:
+        return {
+            "active_channels": sum(1 for channel in self._channels.values() if channel["open"]),
+            "subscribers": sum(len(channel["subscribers"]) for channel in self._channels.values()),
+            "published": self.published
+        }
+
+
+grading_events = GradingEvents()
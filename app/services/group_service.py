@@ -0,0 +1,146 @@
+from typing import List, Optional
+from sqlalchemy.orm import Session, joinedload
+from fastapi import HTTPException, status
+from ..models.group import Group
+from ..models.homework import Homework
+from ..models.user import User
+from ..schemas.group import GroupCreate, GroupUpdate
+from ..utils.pagination import PAGE_SIZE_DEFAULT, paginate
+
+
+class GroupService:
+    @staticmethod
+    def get_group(db: Session, group_id: int) -> Group:
+        """Get group by ID or raise 404"""
+        group = db.query(Group).options(
+            joinedload(Group.teacher)
+        ).filter(Group.id == group_id).first()
+
+        if not group:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Group not found"
+            )
+        return group
+
+    @staticmethod
+    def get_teacher_group(db: Session, group_id: int, teacher_id: int) -> Group:
+        """Get a group the teacher is assigned to or raise 404"""
+        group = db.query(Group).filter(
+            Group.id == group_id,
+            Group.teacher_id == teacher_id
+        ).first()
+
+        if not group:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Group not found or you don't have access"
+            )
+        return group
+
+    @staticmethod
+    def get_groups(
+            db: Session,
+            cursor: Optional[str] = None,
+            limit: int = PAGE_SIZE_DEFAULT,
+            with_total: bool = False
+    ) -> dict:
+        """Page of groups by id with their teachers (student_count is a stored counter)"""
+        query = db.query(Group).options(
+            joinedload(Group.teacher).load_only(User.id, User.fullname)
+        )
+        return paginate(db, query, (Group.id,), cursor, limit, with_total)
+
+    @staticmethod
+    def get_teacher_groups(db: Session, teacher_id: int) -> List[Group]:
+        """Get groups assigned to a teacher (student_count is a stored counter)"""
+        return db.query(Group).filter(Group.teacher_id == teacher_id).all()
+
+    @staticmethod
+    def count_students(db: Session, group_id: int) -> int:
+        """Count students in a group"""
+        return db.query(User).filter(User.group_id == group_id).count()
+
+    @staticmethod
+    def get_teacher(db: Session, teacher_id: int) -> User:
+        """Get a teacher for assignment or raise 400"""
+        teacher = db.query(User).filter(
+            User.id == teacher_id,
+            User.role == "teacher"
+        ).first()
+
+        if not teacher:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Teacher not found"
+            )
+        return teacher
+
+    @staticmethod
+    def create_group(db: Session, group_data: GroupCreate) -> Group:
+        """Create new group"""
+        teacher = GroupService.get_teacher(db, group_data.teacher_id)
+
+        group = Group(
+            name=group_data.name,
+            teacher_id=teacher.id
+        )
+
+        db.add(group)
+        db.commit()
+
+        return GroupService.get_group(db, group.id)
+
+    @staticmethod
+    def update_group(db: Session, group_id: int, group_data: GroupUpdate) -> Group:
+        """Update group"""
+        group = GroupService.get_group(db, group_id)
+
+        # Validate teacher if provided
+        if group_data.teacher_id:
+            GroupService.get_teacher(db, group_data.teacher_id)
+
+        # Update fields
+        for field, value in group_data.model_dump(exclude_unset=True).items():
+            if value is not None:
+                setattr(group, field, value)
+
+        db.commit()
+
+        # Reload so the teacher relationship reflects a changed teacher_id
+        db.expire(group)
+        return GroupService.get_group(db, group_id)
+
+    @staticmethod
+    def delete_group(db: Session, group_id: int):
+        """Delete a group without students or homework"""
+        group = GroupService.get_group(db, group_id)
+
+        # Check if group has students
+        if GroupService.count_students(db, group_id) > 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot delete group with assigned students"
+            )
+
+        # Check if group has homework
+        homework_count = db.query(Homework).filter(Homework.group_id == group_id).count()
+        if homework_count > 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot delete group with assigned homework"
+            )
+
+        db.delete(group)
+        db.commit()
+
+    @staticmethod
+    def assign_teacher(db: Session, group_id: int, teacher_id: int) -> tuple[Group, User]:
+        """Assign teacher to group"""
+        group = GroupService.get_group(db, group_id)
+        teacher = GroupService.get_teacher(db, teacher_id)
+
+        group.teacher_id = teacher_id
+        db.commit()
+
+        return group, teacher
@@ -1,21 +1,32 @@
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, func
+from sqlalchemy.orm import Session, joinedload, load_only
+from sqlalchemy import and_, select
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
+from ..database import run_db
 from ..models.homework import Homework
 from ..models.submission import Submission, SubmissionFile
-from ..models.grade import Grade
 from ..models.user import User
 from ..models.group import Group
 from ..schemas.homework import HomeworkCreate, HomeworkUpdate
-from .ai_service import AIService
+from ..utils.fast_json import row_dicts
+from ..utils.pagination import PAGE_SIZE_DEFAULT, paginate
+from .counter_service import CounterService
+from .grading_service import grading_queue
+from .leaderboard_service import LeaderboardService
+
+# Columns behind HomeworkResponse; list queries skip the rest (the grading prompt above all)
+HOMEWORK_LIST_COLUMNS = (
+    Homework.id, Homework.title, Homework.description, Homework.points, Homework.start_date,
+    Homework.deadline, Homework.line_limit, Homework.file_extension, Homework.teacher_id,
+    Homework.group_id, Homework.prompt_token_budget, Homework.submission_count, Homework.created_at
+)
+# Teacher homework pages follow ix_homework_teacher_created
+HOMEWORK_PAGE_KEYS = (Homework.created_at, Homework.id)
 
 
 class HomeworkService:
-    def __init__(self):
-        self.ai_service = AIService()
-
     @staticmethod
     def get_homework_by_id(db: Session, homework_id: int, user_id: int = None, role: str = None) -> Optional[Homework]:
         """Get homework by ID with access control"""
@@ -41,11 +52,19 @@ class HomeworkService:
         return homework
 
     @staticmethod
-    def get_teacher_homework(db: Session, teacher_id: int) -> List[Homework]:
-        """Get all homework created by a teacher"""
-        return db.query(Homework).options(
-            joinedload(Homework.group)
-        ).filter(Homework.teacher_id == teacher_id).all()
+    def get_teacher_homework(
+            db: Session,
+            teacher_id: int,
+            cursor: Optional[str] = None,
+            limit: int = PAGE_SIZE_DEFAULT,
+            with_total: bool = False
+    ) -> dict:
+        """Page of homework created by a teacher, oldest first (submission_count is a stored counter)"""
+        query = db.query(Homework).options(
+            load_only(*HOMEWORK_LIST_COLUMNS),
+            joinedload(Homework.group).load_only(Group.id, Group.name)
+        ).filter(Homework.teacher_id == teacher_id)
+        return paginate(db, query, HOMEWORK_PAGE_KEYS, cursor, limit, with_total)
 
     @staticmethod
     def get_student_homework(db: Session, student_id: int) -> List[Homework]:
@@ -56,7 +75,11 @@ class HomeworkService:
 
         now = datetime.utcnow()
 
-        return db.query(Homework).filter(
+        return db.query(Homework).options(
+            load_only(*HOMEWORK_LIST_COLUMNS),
+            joinedload(Homework.teacher).load_only(User.id, User.fullname),
+            joinedload(Homework.group).load_only(Group.id, Group.name)
+        ).filter(
             and_(
                 Homework.group_id == student.group_id,
                 Homework.start_date <= now,
@@ -64,6 +87,44 @@ class HomeworkService:
             )
         ).all()
 
+    @staticmethod
+    def get_teacher_homework_rows(
+            db: Session,
+            teacher_id: int,
+            cursor: Optional[str] = None,
+            limit: int = PAGE_SIZE_DEFAULT,
+            with_total: bool = False
+    ) -> dict:
+        """get_teacher_homework with plain HomeworkResponse-shaped dicts as items"""
+        statement = select(
+            *HOMEWORK_LIST_COLUMNS, User.fullname.label("teacher_name"), Group.name.label("group_name")
+        ).join(
+            User, Homework.teacher_id == User.id
+        ).outerjoin(
+            Group, Homework.group_id == Group.id
+        ).where(Homework.teacher_id == teacher_id)
+        return paginate(
+            db, statement, HOMEWORK_PAGE_KEYS, cursor, limit, with_total,
+            fetch=lambda paged: row_dicts(db.execute(paged))
+        )
+
+    @staticmethod
+    def get_student_homework_rows(db: Session, student_id: int) -> List[dict]:
+        """get_student_homework as plain HomeworkResponse-shaped dicts"""
+        group_id = db.execute(select(User.group_id).where(User.id == student_id)).scalar()
+        if not group_id:
+            return []
+
+        now = datetime.utcnow()
+        result = db.execute(
+            select(*HOMEWORK_LIST_COLUMNS, User.fullname.label("teacher_name"), Group.name.label("group_name"))
+            .outerjoin(User, Homework.teacher_id == User.id)
+            .outerjoin(Group, Homework.group_id == Group.id)
+            .where(Homework.group_id == group_id, Homework.start_date <= now, Homework.deadline > now)
+        )
+        # Same fields the ORM path leaves out of the student view
+        return row_dicts(result, prompt_token_budget=None, submission_count=0)
+
     @staticmethod
     def create_homework(db: Session, homework_data: HomeworkCreate, teacher_id: int) -> Homework:
         """Create new homework"""
@@ -82,15 +143,16 @@ class HomeworkService:
             )
 
         homework = Homework(
-            **homework_data.dict(),
+            **homework_data.model_dump(),
             teacher_id=teacher_id
         )
 
         db.add(homework)
         db.commit()
-        db.refresh(homework)
 
-        return homework
+        return db.query(Homework).options(
+            joinedload(Homework.group)
+        ).filter(Homework.id == homework.id).first()
 
     @staticmethod
     def update_homework(db: Session, homework_id: int, homework_data: HomeworkUpdate, teacher_id: int) -> Optional[
@@ -107,13 +169,19 @@ class HomeworkService:
             return None
 
         # Update fields
-        for field, value in homework_data.dict(exclude_unset=True).items():
+        for field, value in homework_data.model_dump(exclude_unset=True).items():
             setattr(homework, field, value)
 
         db.commit()
-        db.refresh(homework)
 
-        return homework
+        return db.query(Homework).options(
+            joinedload(Homework.group)
+        ).filter(Homework.id == homework_id).first()
+
+    @staticmethod
+    def count_submissions(db: Session, homework_id: int) -> int:
+        """Count submissions for a homework"""
+        return db.query(Submission).filter(Submission.homework_id == homework_id).count()
 
     @staticmethod
     def delete_homework(db: Session, homework_id: int, teacher_id: int) -> bool:
@@ -148,10 +216,32 @@ class HomeworkService:
             student_id: int,
             files_data: List[dict]
     ) -> Submission:
-        """Submit homework with AI grading"""
+        """Accept a submission and queue it for AI grading"""
+
+        homework, submission_files = await run_db(
+            db, self.prepare_submission, homework_id, student_id, files_data
+        )
+
+        submission = await run_db(
+            db, self.save_submission, homework, student_id, submission_files
+        )
+
+        # Grading happens in background workers; the request returns right away
+        await grading_queue.enqueue(submission.id)
+
+        return submission
+
+    @staticmethod
+    def prepare_submission(
+            db: Session,
+            homework_id: int,
+            student_id: int,
+            files_data: List[dict]
+    ) -> tuple[Homework, List[SubmissionFile]]:
+        """Validate a submission and build its file rows"""
 
         # Get homework and validate
-        homework = self.get_homework_by_id(db, homework_id, student_id, "student")
+        homework = HomeworkService.get_homework_by_id(db, homework_id, student_id, "student")
         if not homework:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -180,7 +270,7 @@ class HomeworkService:
             )
 
         # Validate total line count
-        total_lines = sum(len(file_data["content"].split('\n')) for file_data in files_data)
+        total_lines = sum(file_data["content"].count('\n') + 1 for file_data in files_data)
         if total_lines > homework.line_limit:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -193,48 +283,60 @@ class HomeworkService:
             file_obj = SubmissionFile(
                 file_name=file_data["file_name"],
                 content=file_data["content"],
-                line_count=len(file_data["content"].split('\n'))
+                line_count=file_data["content"].count('\n') + 1
             )
             submission_files.append(file_obj)
 
-        # Get AI grading
-        ai_grades = await self.ai_service.grade_submission(homework, submission_files)
+        return homework, submission_files
+
+    @staticmethod
+    def save_submission(
+            db: Session,
+            homework: Homework,
+            student_id: int,
+            submission_files: List[SubmissionFile]
+    ) -> Submission:
+        """Store a pending submission with its files"""
+
+        now = datetime.utcnow()
 
-        # Create submission
+        # Create submission; scores are filled in once grading finishes
         submission = Submission(
-            homework_id=homework_id,
+            homework_id=homework.id,
             student_id=student_id,
-            ai_grade=ai_grades["total"],
-            final_grade=ai_grades["total"],
-            ai_feedback=ai_grades["overall_feedback"]
+            submitted_at=now,
+            ai_grade=0,
+            final_grade=0,
+            ai_feedback="Grading in progress",
+            grading_status="pending",
+            grading_queued_at=now
         )
 
         db.add(submission)
-        db.flush()  # Get submission ID
+        try:
+            db.flush()  # Get submission ID
+        except IntegrityError:
+            # A concurrent request stored this student's submission first
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You have already submitted this homework"
+            )
 
         # Add files to submission
         for file_obj in submission_files:
             file_obj.submission_id = submission.id
             db.add(file_obj)
 
-        # Create detailed grade record
-        grade = Grade(
-            submission_id=submission.id,
-            ai_task_completeness=ai_grades["task_completeness"],
-            ai_code_quality=ai_grades["code_quality"],
-            ai_correctness=ai_grades["correctness"],
-            ai_total=ai_grades["total"],
-            final_task_completeness=ai_grades["task_completeness"],
-            final_code_quality=ai_grades["code_quality"],
-            final_correctness=ai_grades["correctness"],
-            ai_feedback=ai_grades["overall_feedback"],
-            task_completeness_feedback=ai_grades["task_completeness_feedback"],
-            code_quality_feedback=ai_grades["code_quality_feedback"],
-            correctness_feedback=ai_grades["correctness_feedback"]
-        )
+        CounterService.adjust_submissions(db, homework.id, 1)
 
-        db.add(grade)
+        # Count the submission now; points are added when it is graded
+        LeaderboardService.record_points(
+            db, homework.group_id, student_id, submission.submitted_at,
+            0, count_delta=1
+        )
         db.commit()
-        db.refresh(submission)
 
-        return submission
\ No newline at end of file
+        return db.query(Submission).options(
+            joinedload(Submission.homework)
+        ).filter(Submission.id == submission.id).first()
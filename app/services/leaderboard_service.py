@@ -0,0 +1,320 @@
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, desc, func, insert, or_
+from fastapi import HTTPException, status
+from ..models.leaderboard import LeaderboardEntry
+from ..models.submission import Submission
+from ..models.user import User
+
+# Buckets maintained on write; weeks and custom ranges are summed from them
+PERIODS = ["day", "month", "all"]
+ALL_TIME_START = date(1970, 1, 1)
+MAX_RANGE_DAYS = 366 * 5
+
+BucketKey = Tuple[int, str, date]
+
+
+def bucket_start(period: str, when: datetime) -> date:
+    """First day of the bucket that contains when"""
+    day = when.date() if isinstance(when, datetime) else when
+    if period == "day":
+        return day
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return ALL_TIME_START
+
+
+def month_end(day: date) -> date:
+    """Last day of the month containing day"""
+    next_month = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def split_range(start: date, end: date) -> Tuple[List[date], List[Tuple[date, date]]]:
+    """Cover [start, end] with whole-month buckets plus day spans at the edges"""
+    months = []
+    day_spans = []
+    cursor = start
+    while cursor <= end:
+        last_day = month_end(cursor)
+        if cursor.day == 1 and last_day <= end:
+            months.append(cursor)
+        else:
+            day_spans.append((cursor, min(last_day, end)))
+        cursor = last_day + timedelta(days=1)
+    return months, day_spans
+
+
+class LeaderboardService:
+    @staticmethod
+    def record_points(
+            db: Session,
+            group_id: Optional[int],
+            student_id: int,
+            submitted_at: datetime,
+            points_delta: int,
+            count_delta: int = 0
+    ):
+        """Add points to every bucket containing submitted_at
+
+        Runs inside the caller's transaction, so the leaderboard commits or
+        rolls back together with the submission or grade change.
+        """
+        now = datetime.utcnow()
+        rows = [
+            {
+                "group_id": group_id,
+                "student_id": student_id,
+                "period": period,
+                "period_start": bucket_start(period, submitted_at),
+                "total_points": points_delta,
+                "submission_count": count_delta,
+                "updated_at": now
+            } for period in PERIODS
+        ]
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            upsert = None
+
+        if upsert is not None:
+            stmt = upsert(LeaderboardEntry).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["student_id", "period", "period_start"],
+                set_={
+                    "total_points": LeaderboardEntry.total_points + stmt.excluded.total_points,
+                    "submission_count": LeaderboardEntry.submission_count + stmt.excluded.submission_count,
+                    "updated_at": stmt.excluded.updated_at
+                }
+            )
+            db.execute(stmt)
+            return
+
+        # Generic fallback: update existing buckets, insert missing ones
+        for row in rows:
+            updated = db.query(LeaderboardEntry).filter(
+                LeaderboardEntry.student_id == student_id,
+                LeaderboardEntry.period == row["period"],
+                LeaderboardEntry.period_start == row["period_start"]
+            ).update({
+                LeaderboardEntry.total_points: LeaderboardEntry.total_points + points_delta,
+                LeaderboardEntry.submission_count: LeaderboardEntry.submission_count + count_delta,
+                LeaderboardEntry.updated_at: now
+            }, synchronize_session=False)
+            if not updated:
+                db.execute(insert(LeaderboardEntry), [row])
+
+    @staticmethod
+    def move_student(db: Session, student_id: int, group_id: Optional[int]):
+        """Carry a student's buckets over to their new group"""
+        db.query(LeaderboardEntry).filter(
+            LeaderboardEntry.student_id == student_id
+        ).update({LeaderboardEntry.group_id: group_id}, synchronize_session=False)
+
+    @staticmethod
+    def get_group_leaderboard(
+            db: Session,
+            group_id: Optional[int],
+            period: str = "all",
+            date_from: Optional[date] = None,
+            date_to: Optional[date] = None,
+            limit: Optional[int] = None,
+            offset: int = 0,
+            around_student_id: Optional[int] = None,
+            around: int = 0
+    ) -> List[dict]:
+        """Get leaderboard for a group (or every group when group_id is None)
+
+        day/month/all read their own bucket row. week and explicit
+        date_from/date_to ranges sum whole months plus edge-day rows, so
+        each student contributes at most a few dozen small rows.
+
+        Ranking happens in SQL with DENSE_RANK, so equal totals share a
+        rank and pages or an around-me window are cut in the database
+        instead of serializing the whole group.
+        """
+        today = datetime.utcnow().date()
+
+        if date_from is not None or date_to is not None:
+            if date_from is None or date_to is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Both 'from' and 'to' are required for a date range"
+                )
+            if date_from > date_to:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="'from' must not be after 'to'"
+                )
+            if (date_to - date_from).days > MAX_RANGE_DAYS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Date range cannot exceed {MAX_RANGE_DAYS} days"
+                )
+            months, day_spans = split_range(date_from, date_to)
+        elif period == "week":
+            months, day_spans = [], [(bucket_start("week", today), today)]
+        else:
+            months, day_spans = None, None
+
+        if months is None:
+            bucket_filter = and_(
+                LeaderboardEntry.period == period,
+                LeaderboardEntry.period_start == bucket_start(period, today)
+            )
+        else:
+            conditions = [
+                and_(
+                    LeaderboardEntry.period == "day",
+                    LeaderboardEntry.period_start.between(first_day, last_day)
+                ) for first_day, last_day in day_spans
+            ]
+            if months:
+                conditions.append(and_(
+                    LeaderboardEntry.period == "month",
+                    LeaderboardEntry.period_start.in_(months)
+                ))
+            bucket_filter = or_(*conditions)
+
+        total_points = func.sum(LeaderboardEntry.total_points)
+        query = db.query(
+            LeaderboardEntry.student_id,
+            LeaderboardEntry.group_id,
+            User.fullname,
+            total_points.label("total_points"),
+            func.sum(LeaderboardEntry.submission_count).label("submission_count"),
+            func.dense_rank().over(order_by=desc(total_points)).label("rank"),
+            func.row_number().over(
+                order_by=(desc(total_points), LeaderboardEntry.student_id)
+            ).label("position")
+        ).join(
+            User, User.id == LeaderboardEntry.student_id
+        ).filter(bucket_filter)
+
+        if group_id is not None:
+            query = query.filter(LeaderboardEntry.group_id == group_id)
+
+        ranked = query.group_by(
+            LeaderboardEntry.student_id, LeaderboardEntry.group_id, User.fullname
+        ).subquery()
+
+        results = db.query(ranked)
+
+        if around_student_id is not None:
+            # Window of `around` places on either side of the student
+            my_position = db.query(ranked.c.position).filter(
+                ranked.c.student_id == around_student_id
+            ).scalar_subquery()
+            results = results.filter(
+                ranked.c.position.between(my_position - around, my_position + around)
+            )
+
+        results = results.order_by(ranked.c.position)
+        if offset:
+            results = results.offset(offset)
+        if limit is not None:
+            results = results.limit(limit)
+
+        # Format leaderboard
+        leaderboard = []
+        for result in results.all():
+            leaderboard.append({
+                "rank": result.rank,
+                "student_id": result.student_id,
+                "student_name": result.fullname,
+                "group_id": result.group_id,
+                "total_points": result.total_points or 0,
+                "submission_count": result.submission_count
+            })
+
+        return leaderboard
+
+    @staticmethod
+    def compute_entries(db: Session) -> Dict[BucketKey, dict]:
+        """Aggregate every bucket straight from the submissions table"""
+        entries: Dict[BucketKey, dict] = {}
+
+        rows = db.query(
+            Submission.student_id,
+            User.group_id,
+            Submission.submitted_at,
+            Submission.final_grade
+        ).join(
+            User, User.id == Submission.student_id
+        ).yield_per(1000)
+
+        for student_id, group_id, submitted_at, final_grade in rows:
+            for period in PERIODS:
+                key = (student_id, period, bucket_start(period, submitted_at))
+                entry = entries.get(key)
+                if entry is None:
+                    entry = entries[key] = {
+                        "group_id": group_id,
+                        "student_id": student_id,
+                        "period": period,
+                        "period_start": key[2],
+                        "total_points": 0,
+                        "submission_count": 0
+                    }
+                entry["total_points"] += final_grade
+                entry["submission_count"] += 1
+
+        return entries
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Recompute the whole table from submissions (backfill)"""
+        entries = LeaderboardService.compute_entries(db)
+        now = datetime.utcnow()
+
+        db.query(LeaderboardEntry).delete(synchronize_session=False)
+        rows = [dict(entry, updated_at=now) for entry in entries.values()]
+        if rows:
+            db.execute(insert(LeaderboardEntry), rows)
+        db.commit()
+
+        return len(rows)
+
+    @staticmethod
+    def check_consistency(db: Session) -> List[dict]:
+        """Compare the table against the live aggregate and list differences"""
+        expected = LeaderboardService.compute_entries(db)
+
+        actual = {
+            (entry.student_id, entry.period, entry.period_start): entry
+            for entry in db.query(LeaderboardEntry).all()
+        }
+
+        mismatches = []
+        for key in sorted(set(expected) | set(actual), key=lambda k: (k[0], k[1], k[2])):
+            want = expected.get(key)
+            have = actual.get(key)
+
+            want_values = (
+                (want["group_id"], want["total_points"], want["submission_count"]) if want else None
+            )
+            have_values = (
+                (have.group_id, have.total_points, have.submission_count) if have else None
+            )
+
+            # Empty buckets left behind are harmless
+            if want_values is None and have_values is not None and have_values[2] == 0:
+                continue
+
+            if want_values != have_values:
+                mismatches.append({
+                    "student_id": key[0],
+                    "period": key[1],
+                    "period_start": key[2].isoformat(),
+                    "expected": want_values,
+                    "actual": have_values
+                })
+
+        return mismatches
@@ -0,0 +1,229 @@
+import os
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from ..models.homework import Homework
+from ..models.submission import SubmissionFile
+
+# Prompt size limits; a homework's prompt_token_budget overrides the default
+AI_PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "6000"))
+AI_PROMPT_STRIP_COMMENTS = os.getenv("AI_PROMPT_STRIP_COMMENTS", "false").lower() == "true"
+
+# Average characters per token by language (code tokenizes denser than prose)
+CHARS_PER_TOKEN = {
+    ".py": 3.6,
+    ".js": 3.4,
+    ".ts": 3.4,
+    ".java": 3.8,
+    ".kt": 3.6,
+    ".swift": 3.6,
+    ".dart": 3.6,
+    ".go": 3.4,
+    ".rs": 3.3,
+    ".c": 3.2,
+    ".cpp": 3.2,
+}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# Full-line comment markers; block comments are handled for C-style languages
+HASH_COMMENT_EXTENSIONS = {".py"}
+SLASH_COMMENT_EXTENSIONS = {".js", ".ts", ".java", ".kt", ".swift", ".dart", ".go", ".rs", ".c", ".cpp"}
+
+BLANK_RUN = re.compile(r"\n{3,}")
+
+
+def estimate_tokens(text: str, file_extension: Optional[str] = None) -> int:
+    """Token estimate using the language's characters-per-token ratio"""
+    ratio = CHARS_PER_TOKEN.get(file_extension, DEFAULT_CHARS_PER_TOKEN)
+    return int(len(text) / ratio) + 1
+
+
+def python_string_state(line: str, quote: Optional[str] = None) -> Optional[str]:
+    """Triple quote still open at the end of line (given the one open at its start)"""
+    i = 0
+    while i < len(line):
+        if quote:
+            end = line.find(quote, i)
+            if end < 0:
+                return quote
+            quote, i = None, end + 3
+            continue
+        char = line[i]
+        if char == "#":
+            break
+        if line.startswith(('"""', "'''"), i):
+            quote, i = line[i:i + 3], i + 3
+            continue
+        if char in "'\"":
+            # One-line string: skip to its unescaped closing quote
+            i += 1
+            while i < len(line) and line[i] != char:
+                i += 2 if line[i] == "\\" else 1
+        i += 1
+    return quote
+
+
+def strip_comment_lines(content: str, file_extension: str) -> str:
+    """Drop lines that are only a comment (code with trailing comments is kept)
+
+    Python lines inside triple-quoted strings are string content and are
+    kept. A C-style block comment is removed from the start of a line, and
+    any code after its closing */ stays.
+    """
+    if file_extension in HASH_COMMENT_EXTENSIONS:
+        kept = []
+        quote = None
+        for line in content.split("\n"):
+            if quote or not line.lstrip().startswith("#"):
+                kept.append(line)
+            quote = python_string_state(line, quote)
+        return "\n".join(kept)
+
+    if file_extension not in SLASH_COMMENT_EXTENSIONS:
+        return content
+
+    kept = []
+    in_block = False
+    for line in content.split("\n"):
+        indent = line[:len(line) - len(line.lstrip())]
+        code = line.strip()
+        if in_block:
+            end = code.find("*/")
+            if end < 0:
+                continue
+            in_block = False
+            # The comment's indentation says nothing about the code after it
+            indent, code = "", code[end + 2:].lstrip()
+        # Leading block comments, possibly followed by code
+        while code.startswith("/*"):
+            end = code.find("*/", 2)
+            if end < 0:
+                in_block = True
+                code = ""
+                break
+            code = code[end + 2:].lstrip()
+        if code.startswith("//") or (not code and line.strip()):
+            continue
+        kept.append(line if code == line.strip() else indent + code)
+    return "\n".join(kept)
+
+
+def compact_code(content: str, file_extension: str, strip_comments: bool = AI_PROMPT_STRIP_COMMENTS) -> str:
+    """Remove whitespace (and optionally comments) that carry no grading signal"""
+    content = content.replace("\r\n", "\n").replace("\r", "\n")
+    if strip_comments:
+        content = strip_comment_lines(content, file_extension)
+    content = "\n".join(line.rstrip() for line in content.split("\n"))
+    # Keep at most one blank line between blocks
+    return BLANK_RUN.sub("\n\n", content).strip("\n")
+
+
+def truncate_to_budget(files: List[Tuple[str, str]], budget: int, file_extension: str) -> List[Tuple[str, str]]:
+    """Trim the largest files line by line until the file section fits the budget
+
+    Every file keeps its beginning plus a marker saying how much was cut,
+    so the grader knows the submission was abridged.
+    """
+    sizes = [estimate_tokens(content, file_extension) for _, content in files]
+    if sum(sizes) <= budget:
+        return files
+
+    lines = [content.split("\n") for _, content in files]
+    keep = [len(file_lines) for file_lines in lines]
+    tokens_per_line = [size / max(1, len(file_lines)) for size, file_lines in zip(sizes, lines)]
+
+    overflow = sum(sizes) - budget
+    while overflow > 0:
+        # Shrink whichever file is currently the biggest
+        index = max(range(len(files)), key=lambda i: keep[i] * tokens_per_line[i])
+        if keep[index] <= 1:
+            break
+        step = max(1, keep[index] // 10)
+        keep[index] -= step
+        overflow -= step * tokens_per_line[index]
+
+    trimmed = []
+    for (file_name, content), file_lines, kept in zip(files, lines, keep):
+        if kept < len(file_lines):
+            content = "\n".join(file_lines[:kept]) + f"\n... [{len(file_lines) - kept} more lines truncated]"
+        trimmed.append((file_name, content))
+    return trimmed
+
+
+@lru_cache(maxsize=512)
+def instruction_blocks(
+        file_extension: str,
+        title: str,
+        description: str,
+        points: int,
+        ai_grading_prompt: str
+) -> Tuple[str, str, int]:
+    """Static text around the files, built once per homework version
+
+    Returns (header, footer, estimated tokens of both).
+    """
+    header = f"""
+You are an expert programming instructor. Grade this {file_extension} code submission.
+
+HOMEWORK: {title}
+DESCRIPTION: {description}
+POINTS: {points}
+GRADING CRITERIA: {ai_grading_prompt}
+
+SUBMITTED FILES:
+"""
+    footer = """
+Please grade this submission on 3 criteria (0-100 each):
+1. Task Completeness - How well does the code fulfill the requirements?
+2. Code Quality - Code structure, readability, best practices
+3. Correctness - Does the code work correctly and handle edge cases?
+
+Return your response as JSON in this exact format:
+{
+    "task_completeness": <score 0-100>,
+    "code_quality": <score 0-100>,
+    "correctness": <score 0-100>,
+    "total": <average of the three scores>,
+    "overall_feedback": "<brief 2-3 sentence summary>",
+    "task_completeness_feedback": "<specific feedback on task completion>",
+    "code_quality_feedback": "<specific feedback on code quality>",
+    "correctness_feedback": "<specific feedback on correctness>"
+}
+
+Be constructive and specific in your feedback. Focus on what the student did well and areas for improvement.
+"""
+    return header, footer, estimate_tokens(header + footer)
+
+
+def token_budget(homework: Homework) -> int:
+    """Prompt token budget for a homework"""
+    return getattr(homework, "prompt_token_budget", None) or AI_PROMPT_TOKEN_BUDGET
+
+
+def build_prompt(
+        homework: Homework,
+        files: List[SubmissionFile],
+        strip_comments: bool = AI_PROMPT_STRIP_COMMENTS
+) -> Tuple[str, int]:
+    """Grading prompt for a submission and its estimated token count"""
+    header, footer, static_tokens = instruction_blocks(
+        homework.file_extension, homework.title, homework.description,
+        homework.points, homework.ai_grading_prompt
+    )
+
+    compacted = [
+        (file.file_name, compact_code(file.content, homework.file_extension, strip_comments))
+        for file in files
+    ]
+    # Allow for the per-file "=== name ===" separators as well
+    separator_tokens = sum(estimate_tokens(f"=== {name} ===\n\n\n") for name, _ in compacted)
+    file_budget = max(0, token_budget(homework) - static_tokens - separator_tokens)
+    compacted = truncate_to_budget(compacted, file_budget, homework.file_extension)
+
+    file_contents = "".join(f"=== {name} ===\n{content}\n\n" for name, content in compacted)
+    prompt = header + file_contents + footer
+
+    tokens = static_tokens + separator_tokens + sum(
+        estimate_tokens(content, homework.file_extension) for _, content in compacted
+    )
+    return prompt, tokens
@@ -0,0 +1,344 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session, joinedload, selectinload
+from fastapi import HTTPException, status
+from ..database import run_db, session_scope
+from ..models.grade import Grade
+from ..models.homework import Homework
+from ..models.regrade_job import RegradeJob
+from ..models.submission import Submission, SubmissionFile
+from ..schemas.regrade import RegradeRequest
+from .ai_service import AIService, AIGradingError, AIUnavailableError
+from .circuit_breaker import ai_breaker
+from .leaderboard_service import LeaderboardService
+
+# Concurrent AI calls per regrade job (the AI scheduler still applies globally)
+REGRADE_CONCURRENCY = int(os.getenv("REGRADE_CONCURRENCY", "4"))
+# Submissions graded and written per transaction
+REGRADE_BATCH_SIZE = int(os.getenv("REGRADE_BATCH_SIZE", "20"))
+# Attempts per submission while the AI is unavailable
+REGRADE_MAX_ATTEMPTS = int(os.getenv("REGRADE_MAX_ATTEMPTS", "3"))
+
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+
+class RegradeService:
+    @staticmethod
+    def _submissions_query(db: Session, job: RegradeJob):
+        """Graded submissions of the job's homework that match its filters"""
+        query = db.query(Submission).join(
+            Grade, Grade.submission_id == Submission.id
+        ).filter(
+            Submission.homework_id == job.homework_id,
+            Submission.grading_status == "graded"
+        )
+
+        filters = job.filters or {}
+        if filters.get("student_ids"):
+            query = query.filter(Submission.student_id.in_(filters["student_ids"]))
+        if filters.get("submitted_from"):
+            query = query.filter(Submission.submitted_at >= datetime.fromisoformat(filters["submitted_from"]))
+        if filters.get("submitted_to"):
+            query = query.filter(Submission.submitted_at <= datetime.fromisoformat(filters["submitted_to"]))
+
+        return query
+
+    @staticmethod
+    def create_job(
+            db: Session,
+            homework_id: int,
+            requested_by: int,
+            request: RegradeRequest,
+            teacher_id: Optional[int] = None
+    ) -> RegradeJob:
+        """Record a regrade job and count the submissions it will touch
+
+        With teacher_id the homework must belong to that teacher.
+        """
+        query = db.query(Homework).filter(Homework.id == homework_id)
+        if teacher_id is not None:
+            query = query.filter(Homework.teacher_id == teacher_id)
+        homework = query.first()
+
+        if not homework:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Homework not found or you don't have access"
+            )
+
+        existing = db.query(RegradeJob).filter(
+            RegradeJob.homework_id == homework.id,
+            RegradeJob.status.in_(ACTIVE_JOB_STATUSES)
+        ).first()
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Regrade job {existing.id} is already running for this homework"
+            )
+
+        job = RegradeJob(
+            homework_id=homework.id,
+            requested_by=requested_by,
+            include_teacher_modified=request.include_teacher_modified,
+            filters={
+                "student_ids": request.student_ids,
+                "submitted_from": request.submitted_from.isoformat() if request.submitted_from else None,
+                "submitted_to": request.submitted_to.isoformat() if request.submitted_to else None
+            },
+            status="queued"
+        )
+
+        matching = RegradeService._submissions_query(db, job)
+        teacher_modified = matching.filter(Grade.modified_by_teacher.isnot(None)).count()
+        job.total = matching.count()
+        if not request.include_teacher_modified:
+            job.skipped = teacher_modified
+            job.total -= teacher_modified
+
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        return job
+
+    @staticmethod
+    def get_job(db: Session, job_id: int, teacher_id: Optional[int] = None) -> RegradeJob:
+        """Get a job (limited to the teacher's homework when teacher_id is given) or raise 404"""
+        query = db.query(RegradeJob).filter(RegradeJob.id == job_id)
+        if teacher_id is not None:
+            query = query.join(Homework, Homework.id == RegradeJob.homework_id).filter(
+                Homework.teacher_id == teacher_id
+            )
+
+        job = query.first()
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Regrade job not found"
+            )
+        return job
+
+    @staticmethod
+    def get_jobs(db: Session, limit: int = 50) -> List[RegradeJob]:
+        """Most recent regrade jobs"""
+        return db.query(RegradeJob).order_by(RegradeJob.id.desc()).limit(limit).all()
+
+    @staticmethod
+    def get_active_job_ids(db: Session) -> List[int]:
+        """Jobs to resume after a restart"""
+        rows = db.query(RegradeJob.id).filter(
+            RegradeJob.status.in_(ACTIVE_JOB_STATUSES)
+        ).order_by(RegradeJob.id).all()
+        return [row.id for row in rows]
+
+    @staticmethod
+    def next_batch(db: Session, job_id: int, batch_size: int) -> List[Submission]:
+        """Mark the job running and load the next submissions after its cursor"""
+        job = db.query(RegradeJob).filter(RegradeJob.id == job_id).first()
+        if not job or job.status not in ACTIVE_JOB_STATUSES:
+            return []
+
+        if job.status == "queued":
+            job.status = "running"
+            job.started_at = job.started_at or datetime.utcnow()
+            db.commit()
+
+        query = RegradeService._submissions_query(db, job).filter(
+            Submission.id > job.last_submission_id
+        )
+        if not job.include_teacher_modified:
+            query = query.filter(Grade.modified_by_teacher.is_(None))
+
+        # Loaded eagerly so the objects stay usable after the session closes
+        return query.options(
+            joinedload(Submission.homework),
+            selectinload(Submission.files).undefer(SubmissionFile.content)
+        ).order_by(Submission.id).limit(batch_size).all()
+
+    @staticmethod
+    def apply_batch(db: Session, job_id: int, results: Dict[int, Optional[dict]], cursor: int):
+        """Write a batch of new AI grades and advance the job cursor in one transaction"""
+        job = db.query(RegradeJob).filter(RegradeJob.id == job_id).first()
+
+        submissions = db.query(Submission).options(
+            joinedload(Submission.grade),
+            joinedload(Submission.homework)
+        ).filter(Submission.id.in_(list(results))).all()
+
+        now = datetime.utcnow()
+        for submission in submissions:
+            ai_grades = results[submission.id]
+            grade = submission.grade
+            if ai_grades is None or grade is None:
+                job.failed += 1
+                continue
+
+            grade.ai_task_completeness = ai_grades["task_completeness"]
+            grade.ai_code_quality = ai_grades["code_quality"]
+            grade.ai_correctness = ai_grades["correctness"]
+            grade.ai_total = ai_grades["total"]
+            grade.ai_feedback = ai_grades["overall_feedback"]
+            grade.task_completeness_feedback = ai_grades["task_completeness_feedback"]
+            grade.code_quality_feedback = ai_grades["code_quality_feedback"]
+            grade.correctness_feedback = ai_grades["correctness_feedback"]
+            grade.graded_at = now
+
+            new_final = submission.final_grade
+            if grade.modified_by_teacher is None or job.include_teacher_modified:
+                grade.final_task_completeness = ai_grades["task_completeness"]
+                grade.final_code_quality = ai_grades["code_quality"]
+                grade.final_correctness = ai_grades["correctness"]
+                grade.teacher_total = None
+                grade.modified_by_teacher = None
+                new_final = ai_grades["total"]
+
+            points_delta = new_final - submission.final_grade
+            submission.ai_grade = ai_grades["total"]
+            submission.ai_feedback = ai_grades["overall_feedback"]
+            submission.final_grade = new_final
+            submission.graded_at = now
+
+            if points_delta:
+                LeaderboardService.record_points(
+                    db, submission.homework.group_id, submission.student_id,
+                    submission.submitted_at, points_delta
+                )
+            job.succeeded += 1
+
+        job.processed += len(results)
+        job.last_submission_id = max(job.last_submission_id, cursor)
+        db.commit()
+
+    @staticmethod
+    def finish_job(db: Session, job_id: int, error: Optional[str] = None):
+        """Mark a job completed (or failed with an error)"""
+        job = db.query(RegradeJob).filter(RegradeJob.id == job_id).first()
+        if not job:
+            return
+        job.status = "failed" if error else "completed"
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+    @staticmethod
+    def describe_job(job: RegradeJob) -> dict:
+        """Job fields plus progress and throughput"""
+        progress = 100.0 if not job.total else round(100 * job.processed / job.total, 1)
+
+        rate = None
+        eta = None
+        if job.started_at and job.processed:
+            elapsed = ((job.finished_at or datetime.utcnow()) - job.started_at).total_seconds()
+            if elapsed > 0:
+                rate = round(job.processed / elapsed, 2)
+                if job.status in ACTIVE_JOB_STATUSES:
+                    eta = round(max(0, job.total - job.processed) / rate, 1)
+
+        return {
+            "id": job.id,
+            "homework_id": job.homework_id,
+            "requested_by": job.requested_by,
+            "include_teacher_modified": job.include_teacher_modified,
+            "status": job.status,
+            "total": job.total,
+            "skipped": job.skipped,
+            "processed": job.processed,
+            "succeeded": job.succeeded,
+            "failed": job.failed,
+            "progress_percent": progress,
+            "submissions_per_second": rate,
+            "eta_seconds": eta,
+            "error": job.error,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at
+        }
+
+
+class RegradeRunner:
+    """Runs regrade jobs as background tasks, resuming unfinished ones on startup"""
+
+    def __init__(self):
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._ai_service: Optional[AIService] = None
+
+    async def start(self):
+        """Resume jobs left queued or running by a previous process"""
+        async with session_scope() as db:
+            job_ids = await run_db(db, RegradeService.get_active_job_ids)
+        for job_id in job_ids:
+            self.submit(job_id)
+        if job_ids:
+            print(f"🔁 Resumed {len(job_ids)} regrade job(s)")
+
+    async def stop(self):
+        """Cancel running jobs; their cursors let them resume on next start"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def submit(self, job_id: int):
+        """Start processing a job in the background"""
+        if job_id in self._tasks:
+            return
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id))
+
+    async def _run(self, job_id: int):
+        semaphore = asyncio.Semaphore(max(1, REGRADE_CONCURRENCY))
+        try:
+            while True:
+                async with session_scope() as db:
+                    submissions = await run_db(db, RegradeService.next_batch, job_id, REGRADE_BATCH_SIZE)
+                if not submissions:
+                    break
+
+                graded = await asyncio.gather(*[
+                    self._grade(semaphore, submission) for submission in submissions
+                ])
+
+                async with session_scope() as db:
+                    await run_db(
+                        db, RegradeService.apply_batch, job_id,
+                        dict(graded), submissions[-1].id
+                    )
+
+            async with session_scope() as db:
+                await run_db(db, RegradeService.finish_job, job_id)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Regrade job {job_id} failed: {e}")
+            async with session_scope() as db:
+                await run_db(db, RegradeService.finish_job, job_id, str(e))
+        finally:
+            self._tasks.pop(job_id, None)
+
+    async def _grade(self, semaphore: asyncio.Semaphore, submission: Submission) -> Tuple[int, Optional[dict]]:
+        """New AI grades for one submission, or None if it could not be graded"""
+        if self._ai_service is None:
+            self._ai_service = AIService()
+
+        async with semaphore:
+            for attempt in range(max(1, REGRADE_MAX_ATTEMPTS)):
+                try:
+                    return submission.id, await self._ai_service.grade_submission(
+                        submission.homework, submission.files
+                    )
+                except AIUnavailableError:
+                    # Wait out an open breaker instead of burning through the job
+                    while ai_breaker.current_state() == "open":
+                        await asyncio.sleep(1)
+                except AIGradingError:
+                    break
+        return submission.id, None
+
+    def stats(self) -> dict:
+        return {"running_jobs": sorted(self._tasks)}
+
+
+regrade_runner = RegradeRunner()
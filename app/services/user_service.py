@@ -0,0 +1,175 @@
+from typing import Optional
+from sqlalchemy.orm import Session, load_only
+from fastapi import HTTPException, status
+from ..models.user import User
+from ..models.group import Group
+from ..models.submission import Submission
+from ..schemas.user import UserCreate, UserUpdate
+from ..utils.auth_cache import auth_cache
+from ..utils.pagination import PAGE_SIZE_DEFAULT, paginate
+from .counter_service import CounterService
+from .leaderboard_service import LeaderboardService
+
+
+class UserService:
+    @staticmethod
+    def get_users(
+            db: Session,
+            role: str,
+            group_id: Optional[int] = None,
+            cursor: Optional[str] = None,
+            limit: int = PAGE_SIZE_DEFAULT,
+            with_total: bool = False
+    ) -> dict:
+        """Page of users with a role by id, optionally filtered by group (password hashes not loaded)"""
+        query = db.query(User).options(
+            load_only(User.id, User.fullname, User.username, User.role, User.group_id, User.created_at)
+        ).filter(User.role == role)
+
+        if group_id:
+            query = query.filter(User.group_id == group_id)
+
+        return paginate(db, query, (User.id,), cursor, limit, with_total)
+
+    @staticmethod
+    def get_user(db: Session, user_id: int, role: str) -> User:
+        """Get a user with a role or raise 404"""
+        user = db.query(User).filter(
+            User.id == user_id,
+            User.role == role
+        ).first()
+
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"{role.capitalize()} not found"
+            )
+        return user
+
+    @staticmethod
+    def validate_group(db: Session, group_id: Optional[int]):
+        """Raise 400 if a group id is given but does not exist"""
+        if group_id:
+            group = db.query(Group).filter(Group.id == group_id).first()
+            if not group:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Group not found"
+                )
+
+    @staticmethod
+    def create_user(db: Session, user_data: UserCreate, password_hash: str) -> User:
+        """Create a user after checking the username is free"""
+
+        # Check if username already exists
+        existing_user = db.query(User).filter(User.username == user_data.username).first()
+        if existing_user:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username already exists"
+            )
+
+        # Validate group if provided
+        if user_data.role == "student":
+            UserService.validate_group(db, user_data.group_id)
+
+        user = User(
+            fullname=user_data.fullname,
+            username=user_data.username,
+            password_hash=password_hash,
+            role=user_data.role,
+            group_id=user_data.group_id
+        )
+
+        db.add(user)
+        CounterService.adjust_students(db, user.group_id, 1)
+        db.commit()
+        db.refresh(user)
+
+        return user
+
+    @staticmethod
+    def update_user(
+            db: Session,
+            user_id: int,
+            role: str,
+            user_data: UserUpdate,
+            password_hash: Optional[str] = None
+    ) -> User:
+        """Update a user's fields"""
+        user = UserService.get_user(db, user_id, role)
+
+        # Validate group if provided
+        if role == "student":
+            UserService.validate_group(db, user_data.group_id)
+
+        previous_group_id = user.group_id
+
+        # Update fields
+        for field, value in user_data.model_dump(exclude_unset=True).items():
+            if field == "password":
+                if password_hash:
+                    user.password_hash = password_hash
+            elif value is not None:
+                setattr(user, field, value)
+
+        if user.group_id != previous_group_id:
+            LeaderboardService.move_student(db, user.id, user.group_id)
+            CounterService.move_student(db, previous_group_id, user.group_id)
+
+        db.commit()
+        db.refresh(user)
+        auth_cache.evict_user(user.id)
+
+        return user
+
+    @staticmethod
+    def delete_teacher(db: Session, teacher_id: int):
+        """Delete a teacher without assigned groups"""
+        teacher = UserService.get_user(db, teacher_id, "teacher")
+
+        # Check if teacher has assigned groups
+        group_count = db.query(Group).filter(Group.teacher_id == teacher_id).count()
+        if group_count > 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot delete teacher with assigned groups"
+            )
+
+        # Counters and the reconciler count every user with a group_id, teachers included
+        CounterService.adjust_students(db, teacher.group_id, -1)
+        db.delete(teacher)
+        db.commit()
+        auth_cache.evict_user(teacher_id)
+
+    @staticmethod
+    def delete_student(db: Session, student_id: int):
+        """Delete a student without submissions"""
+        student = UserService.get_user(db, student_id, "student")
+
+        # Check if student has submissions
+        submission_count = db.query(Submission).filter(Submission.student_id == student_id).count()
+        if submission_count > 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot delete student with submissions"
+            )
+
+        CounterService.adjust_students(db, student.group_id, -1)
+        db.delete(student)
+        db.commit()
+        auth_cache.evict_user(student_id)
+
+    @staticmethod
+    def move_student_to_group(db: Session, student_id: int, group_id: Optional[int]):
+        """Move student to a different group (or out of any group)"""
+        student = UserService.get_user(db, student_id, "student")
+
+        UserService.validate_group(db, group_id)
+
+        # Update student group
+        CounterService.move_student(db, student.group_id, group_id)
+        student.group_id = group_id
+        LeaderboardService.move_student(db, student_id, group_id)
+        db.commit()
+        auth_cache.evict_user(student_id)
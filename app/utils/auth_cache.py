@@ -0,0 +1,136 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.session import make_transient_to_detached
+from ..models.user import User
+
+# Seconds a resolved identity stays valid before the database is consulted again
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+
+def token_digest(token: str) -> str:
+    """Hash a bearer token so raw JWTs are never kept in memory as keys"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class CachedIdentity:
+    __slots__ = ("user_data", "session_expires_at", "cached_until")
+
+    def __init__(self, user_data: dict, session_expires_at: datetime, cached_until: float):
+        self.user_data = user_data
+        self.session_expires_at = session_expires_at
+        self.cached_until = cached_until
+
+
+class AuthCache:
+    """TTL cache of resolved identities keyed by token digest"""
+
+    def __init__(self, ttl_seconds: int = AUTH_CACHE_TTL_SECONDS, max_entries: int = AUTH_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, CachedIdentity] = {}
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, db: Session, token: str) -> Optional[User]:
+        """Return the cached user attached to db, or None on a miss"""
+        digest = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and (
+                    entry.cached_until <= time.monotonic()
+                    or entry.session_expires_at <= datetime.utcnow()
+            ):
+                self._remove(digest)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            user_data = entry.user_data
+
+        # Rebuild the row without a SELECT and attach it to the request session
+        user = User(**user_data)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def set(self, token: str, user: User, session_expires_at: datetime):
+        """Remember a user resolved from the database"""
+        digest = token_digest(token)
+        user_data = {key: getattr(user, key) for key in USER_COLUMNS}
+
+        with self._lock:
+            if digest not in self._entries and len(self._entries) >= self.max_entries:
+                # Drop the entry closest to expiry to stay within bounds
+                oldest = min(self._entries, key=lambda d: self._entries[d].cached_until)
+                self._remove(oldest)
+
+            self._entries[digest] = CachedIdentity(
+                user_data=user_data,
+                session_expires_at=session_expires_at,
+                cached_until=time.monotonic() + self.ttl_seconds
+            )
+            self._by_user.setdefault(user.id, set()).add(digest)
+
+    def evict_user(self, user_id: int):
+        """Forget every cached token of a user"""
+        with self._lock:
+            for digest in list(self._by_user.get(user_id, ())):
+                self._remove(digest)
+
+    def evict_expired(self):
+        """Forget entries whose TTL or session expiry has passed"""
+        now = datetime.utcnow()
+        deadline = time.monotonic()
+        with self._lock:
+            for digest, entry in list(self._entries.items()):
+                if entry.cached_until <= deadline or entry.session_expires_at <= now:
+                    self._remove(digest)
+
+    def clear(self):
+        """Forget everything"""
+        with self._lock:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for diagnostics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "ttl_seconds": self.ttl_seconds
+            }
+
+    def _remove(self, digest: str):
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        self.evictions += 1
+        user_id = entry.user_data["id"]
+        digests = self._by_user.get(user_id)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[user_id]
+
+
+auth_cache = AuthCache()
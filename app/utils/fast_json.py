@@ -0,0 +1,52 @@
+import os
+from functools import lru_cache
+from typing import Any, List
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+# Serve list endpoints from Core rows rendered straight to JSON instead of per-row models
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    if FAST_JSON_RESPONSES:
+        print("⚠️  FAST_JSON_RESPONSES is on but the 'orjson' package is missing - rendering with Pydantic")
+
+
+@lru_cache(maxsize=None)
+def type_adapter(response_type) -> TypeAdapter:
+    """TypeAdapter for a response type such as Page[SubmissionResponse], built once per type"""
+    return TypeAdapter(response_type)
+
+
+def row_dicts(result, **fields) -> List[dict]:
+    """Plain dicts from a Core result labelled like the response schema
+
+    fields are set on every row, replacing a selected column of the same name.
+    """
+    return [{**row, **fields} for row in result.mappings()]
+
+
+class FastJSONResponse(Response):
+    """JSON response of plain rows rendered without building a model per row
+
+    The content must already match response_type (rows from row_dicts,
+    or a page of them). With orjson it is dumped as it is; without it, it
+    is validated once through the type's cached TypeAdapter.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, response_type, content: Any, **kwargs):
+        self.response_type = response_type
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        adapter = type_adapter(self.response_type)
+        return adapter.dump_json(adapter.validate_python(content))
+
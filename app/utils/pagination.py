@@ -0,0 +1,92 @@
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Callable, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, tuple_
+
+# Page size when a list request gives no limit, and the largest it may ask for
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "500"))
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Opaque cursor holding the sort key values of a page's last row"""
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence) -> list:
+    """Sort key values from a cursor, or 400 if it was not made for these keys"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if key.type.python_type is datetime else key.type.python_type(value)
+            for key, value in zip(keys, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset(query, keys: Sequence, cursor: Optional[str], limit: int, descending: bool = False):
+    """Order by keys, start after the cursor's row and fetch one row past the page
+
+    Works on ORM queries and Core selects. The keys must be unique together
+    (end with the primary key) and lead an index, so every page is an index
+    range read however deep it is.
+    """
+    if cursor:
+        columns, values = tuple_(*keys), tuple_(*decode_cursor(cursor, keys))
+        query = query.filter(columns < values if descending else columns > values)
+    return query.order_by(*(key.desc() for key in keys) if descending else keys).limit(limit + 1)
+
+
+def approximate_total(db, query) -> int:
+    """Rows the unpaged query matches: the planner's estimate on PostgreSQL, COUNT(*) elsewhere"""
+    statement = getattr(query, "statement", query).order_by(None)
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql":
+        try:
+            sql = statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+            with db.begin_nested():
+                plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+        except Exception:
+            pass  # Not renderable with literal values; count instead
+    return db.execute(select(func.count()).select_from(statement.subquery())).scalar()
+
+
+def paginate(
+        db,
+        query,
+        keys: Sequence,
+        cursor: Optional[str],
+        limit: int,
+        with_total: bool = False,
+        descending: bool = False,
+        fetch: Optional[Callable] = None
+) -> dict:
+    """One keyset page of query as {"items", "next_cursor", "total"}
+
+    fetch turns the paged statement into rows (default: ORM Query.all());
+    rows may be objects or dicts keyed like the sort keys.
+    """
+    total = approximate_total(db, query) if with_total else None
+    paged = keyset(query, keys, cursor, limit, descending)
+    rows = fetch(paged) if fetch else paged.all()
+    items, next_cursor = rows[:limit], None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor([
+            last[key.key] if isinstance(last, dict) else getattr(last, key.key) for key in keys
+        ])
+    return {"items": items, "next_cursor": next_cursor, "total": total}
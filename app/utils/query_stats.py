@@ -0,0 +1,185 @@
+import os
+import re
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Warn when one statement shape runs more than this many times in a request (0 = never)
+DB_QUERY_REPEAT_THRESHOLD = int(os.getenv("DB_QUERY_REPEAT_THRESHOLD", "5"))
+# Repeated shapes remembered per route in the report
+DB_QUERY_REPORT_SHAPES = int(os.getenv("DB_QUERY_REPORT_SHAPES", "5"))
+
+IN_LIST = re.compile(r"\bIN \([^()]*\)", re.IGNORECASE)
+WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """SQL with expanded IN lists collapsed, so one query with different ids reads the same"""
+    return IN_LIST.sub("IN (...)", WHITESPACE.sub(" ", statement).strip())
+
+
+class RequestQueries:
+    """Statements run while serving one request"""
+
+    __slots__ = ("count", "db_ms", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.db_ms = 0.0
+        self.shapes: Dict[str, int] = {}
+
+
+class RouteQueries:
+    """Aggregate of every request served by one route"""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_ms = 0.0
+        self.max_db_ms = 0.0
+        self.repeat_warnings = 0
+        self.repeated: Dict[str, int] = {}  # shape -> most runs seen in one request
+
+    def add(self, request: RequestQueries, repeated: Dict[str, int]):
+        self.requests += 1
+        self.queries += request.count
+        self.max_queries = max(self.max_queries, request.count)
+        self.db_ms += request.db_ms
+        self.max_db_ms = max(self.max_db_ms, request.db_ms)
+        if repeated:
+            self.repeat_warnings += 1
+        for shape, count in repeated.items():
+            if shape in self.repeated or len(self.repeated) < DB_QUERY_REPORT_SHAPES:
+                self.repeated[shape] = max(count, self.repeated.get(shape, 0))
+
+    def report(self) -> dict:
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "avg_queries": round(self.queries / self.requests, 2) if self.requests else 0.0,
+            "max_queries": self.max_queries,
+            "db_ms": round(self.db_ms, 1),
+            "avg_db_ms": round(self.db_ms / self.requests, 2) if self.requests else 0.0,
+            "max_db_ms": round(self.max_db_ms, 1),
+            "repeat_warnings": self.repeat_warnings,
+            "repeated_statements": [
+                {"statement": shape[:300], "max_per_request": count}
+                for shape, count in sorted(self.repeated.items(), key=lambda item: -item[1])
+            ]
+        }
+
+
+class QueryStats:
+    """Counts SQL statements and database time per request and per route
+
+    Engine event hooks add every statement to the request being served
+    (tracked in a context variable, so background grading work is not
+    counted). Statement shapes repeated more than DB_QUERY_REPEAT_THRESHOLD
+    times in one request - usually an N+1 loop - are printed as warnings.
+    """
+
+    def __init__(self, repeat_threshold: int = DB_QUERY_REPEAT_THRESHOLD):
+        self.repeat_threshold = repeat_threshold
+        self._current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+        self._routes: Dict[str, RouteQueries] = {}
+
+    def instrument(self, engine: Engine):
+        """Attach the statement hooks to a (sync) engine"""
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the execution context, which is discarded with a failed statement
+        if self._current.get() is not None and context is not None:
+            context.query_started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        request = self._current.get()
+        started = getattr(context, "query_started", None)
+        if request is None or started is None:
+            return
+        request.count += 1
+        request.db_ms += (time.perf_counter() - started) * 1000
+        shape = statement_shape(statement)
+        request.shapes[shape] = request.shapes.get(shape, 0) + 1
+
+    def begin(self) -> RequestQueries:
+        """Start counting for the current request"""
+        request = RequestQueries()
+        self._current.set(request)
+        return request
+
+    def finish(self, route: Optional[str], request: RequestQueries):
+        """Fold a finished request into its route and warn about repeated statements"""
+        self._current.set(None)
+        if route is None:
+            return
+
+        repeated = {}
+        if self.repeat_threshold > 0:
+            repeated = {shape: count for shape, count in request.shapes.items() if count > self.repeat_threshold}
+        for shape, count in repeated.items():
+            print(f"⚠️  {route} ran the same statement {count} times (possible N+1): {shape[:200]}")
+
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = RouteQueries()
+        stats.add(request, repeated)
+
+    def report(self) -> dict:
+        """Per-route aggregates, heaviest total database time first"""
+        routes = sorted(self._routes.items(), key=lambda item: -item[1].db_ms)
+        return {route: stats.report() for route, stats in routes}
+
+    def reset(self):
+        self._routes.clear()
+
+    def stats(self) -> dict:
+        return {
+            "routes": len(self._routes),
+            "requests": sum(stats.requests for stats in self._routes.values()),
+            "queries": sum(stats.queries for stats in self._routes.values()),
+            "repeat_warnings": sum(stats.repeat_warnings for stats in self._routes.values()),
+            "repeat_threshold": self.repeat_threshold
+        }
+
+
+query_stats = QueryStats()
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware that scopes query counting to each HTTP request
+
+    With add_headers (debug mode) responses carry X-DB-Queries and
+    X-DB-Time (milliseconds) for the statements run before the response
+    started.
+    """
+
+    def __init__(self, app, add_headers: bool = False):
+        self.app = app
+        self.add_headers = add_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = query_stats.begin()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(request.count).encode()),
+                    (b"x-db-time", f"{request.db_ms:.1f}".encode())
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers if self.add_headers else send)
+        finally:
+            route = scope.get("route")
+            query_stats.finish(f"{scope['method']} {route.path}" if route is not None else None, request)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+AI grading throughput benchmark for Homework Management System
+Creates a throwaway teacher, group, homework and N students through the
+admin API, then submits N solutions concurrently and waits for each one
+to be graded. Reports submissions/sec, submit and end-to-end latency
+percentiles, DB pool saturation and the fallback rate (submissions left
+needs_regrade/failed instead of graded).
+
+Run it against a started server whose DEEPSEEK_API_URL points at
+mock_deepseek.py, so no real API credit is spent:
+
+    python mock_deepseek.py --latency-ms 1000 --rate-429 0.02 &
+    DEEPSEEK_API_URL=http://localhost:8100/v1/chat/completions python run.py &
+    python bench_grading.py --submissions 200 --concurrency 50 --mock-url http://localhost:8100
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+
+from bench_login import BASE_URL, percentile
+from bench_requests import login
+
+TERMINAL_STATUSES = ("graded", "needs_regrade", "failed")
+STUDENT_PASSWORD = "bench-password"
+
+
+def solution(index, same_content):
+    """Source of one submission; distinct per student unless same_content"""
+    seed = 0 if same_content else index
+    return (
+        f"def solve(values):\n"
+        f"    # student {seed}\n"
+        f"    total = 0\n"
+        f"    for value in values:\n"
+        f"        if value % {seed % 7 + 2} == 0:\n"
+        f"            total += value * {seed % 5 + 1}\n"
+        f"    return total\n\n\n"
+        f"print(solve(range({seed + 10})))\n"
+    )
+
+
+async def setup(client, admin, args):
+    """Create the teacher, group, homework and students; return student credentials"""
+    run_id = uuid.uuid4().hex[:6]
+    teacher_name = f"bench_t_{run_id}"
+
+    response = await client.post("/admin/teachers", headers=admin, json={
+        "fullname": "Benchmark Teacher", "username": teacher_name,
+        "password": STUDENT_PASSWORD, "role": "teacher"
+    })
+    response.raise_for_status()
+    teacher_id = response.json()["id"]
+
+    response = await client.post("/admin/groups", headers=admin, json={
+        "name": f"Benchmark {run_id}", "teacher_id": teacher_id
+    })
+    response.raise_for_status()
+    group_id = response.json()["id"]
+
+    teacher, _ = await login(client, teacher_name, STUDENT_PASSWORD)
+    now = datetime.utcnow()
+    response = await client.post("/teacher/homework", headers=teacher, json={
+        "title": f"Benchmark homework {run_id}",
+        "description": "Sum the values divisible by the step and scale them.",
+        "points": 100,
+        "start_date": (now - timedelta(hours=1)).isoformat(),
+        "deadline": (now + timedelta(days=1)).isoformat(),
+        "line_limit": 300,
+        "file_extension": ".py",
+        "group_id": group_id,
+        "ai_grading_prompt": "Check correctness, naming and edge cases."
+    })
+    response.raise_for_status()
+    homework_id = response.json()["id"]
+
+    semaphore = asyncio.Semaphore(args.setup_concurrency)
+
+    async def create_student(index):
+        username = f"bench_s_{run_id}_{index}"
+        async with semaphore:
+            response = await client.post("/admin/students", headers=admin, json={
+                "fullname": f"Benchmark Student {index}", "username": username,
+                "password": STUDENT_PASSWORD, "role": "student", "group_id": group_id
+            })
+            response.raise_for_status()
+            headers, _ = await login(client, username, STUDENT_PASSWORD)
+        return headers
+
+    students = await asyncio.gather(*[create_student(i) for i in range(args.submissions)])
+    print(f"🧑‍🎓 Created group {group_id}, homework {homework_id} and {len(students)} students")
+    return homework_id, students
+
+
+async def sample_diagnostics(client, admin, stop_event, samples, interval):
+    """Poll /admin/diagnostics until stopped"""
+    while not stop_event.is_set():
+        try:
+            response = await client.get("/admin/diagnostics", headers=admin)
+            if response.status_code == 200:
+                samples.append(response.json())
+        except httpx.HTTPError:
+            pass
+        try:
+            await asyncio.wait_for(stop_event.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def submit_and_wait(client, semaphore, headers, homework_id, content, args, results):
+    """Submit one solution and poll until it leaves the grading queue"""
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            response = await client.post(f"/student/homework/{homework_id}/submit", headers=headers, json={
+                "files": [{"file_name": "solution.py", "content": content}]
+            })
+        except httpx.HTTPError as e:
+            results.append({"status": type(e).__name__, "submit_ms": (time.perf_counter() - started) * 1000})
+            return
+        accepted = time.perf_counter()
+        if response.status_code not in (200, 202):
+            results.append({"status": f"http_{response.status_code}", "submit_ms": (accepted - started) * 1000})
+            return
+
+    submission_id = response.json()["id"]
+    grading_status = response.json().get("grading_status", "graded")
+    deadline = started + args.timeout
+    while grading_status not in TERMINAL_STATUSES and time.perf_counter() < deadline:
+        await asyncio.sleep(args.poll_interval)
+        try:
+            poll = await client.get(f"/student/submissions/{submission_id}/status", headers=headers)
+        except httpx.HTTPError:
+            continue
+        if poll.status_code == 200:
+            grading_status = poll.json()["grading_status"]
+
+    results.append({
+        "status": grading_status if grading_status in TERMINAL_STATUSES else "timeout",
+        "submit_ms": (accepted - started) * 1000,
+        "total_ms": (time.perf_counter() - started) * 1000
+    })
+
+
+def peak(samples, section, field):
+    values = [sample.get(section, {}).get(field) for sample in samples]
+    values = [value for value in values if isinstance(value, (int, float))]
+    return max(values) if values else None
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency + args.setup_concurrency + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.request_timeout) as client:
+        admin, role = await login(client, args.username, args.password)
+        if role != "admin":
+            raise SystemExit("❌ --username must be an admin account")
+
+        homework_id, students = await setup(client, admin, args)
+
+        mock = None
+        if args.mock_url:
+            mock = httpx.AsyncClient(base_url=args.mock_url, timeout=10.0)
+            await mock.post("/stats/reset")
+
+        before = (await client.get("/admin/diagnostics", headers=admin)).json()
+        stop_event = asyncio.Event()
+        samples = []
+        sampler = asyncio.create_task(
+            sample_diagnostics(client, admin, stop_event, samples, args.sample_interval)
+        )
+
+        print(f"🚀 Submitting {len(students)} solutions, {args.concurrency} at a time...")
+        semaphore = asyncio.Semaphore(args.concurrency)
+        results = []
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            submit_and_wait(client, semaphore, headers, homework_id, solution(i, args.same_content), args, results)
+            for i, headers in enumerate(students)
+        ])
+        elapsed = time.perf_counter() - started
+
+        stop_event.set()
+        await sampler
+        after = (await client.get("/admin/diagnostics", headers=admin)).json()
+        mock_stats = None
+        if mock:
+            mock_stats = (await mock.get("/stats")).json()
+            await mock.aclose()
+
+    report(args, results, elapsed, samples, before, after, mock_stats)
+
+
+def report(args, results, elapsed, samples, before, after, mock_stats):
+    by_status = {}
+    for result in results:
+        by_status[result["status"]] = by_status.get(result["status"], 0) + 1
+
+    graded = [r for r in results if r["status"] == "graded"]
+    fallbacks = by_status.get("needs_regrade", 0) + by_status.get("failed", 0)
+    submit_ms = [r["submit_ms"] for r in results]
+    total_ms = [r["total_ms"] for r in graded]
+
+    print("\n" + "=" * 50)
+    print("📊 Results")
+    print("=" * 50)
+    print(f"  DB mode: {after.get('db_mode')}")
+    print(f"  Submissions: {len(results)} in {elapsed:.2f}s -> {by_status}")
+    print(f"  Throughput: {len(graded) / elapsed:.2f} graded submissions/sec")
+    print(f"  Submit (202) latency: p50={percentile(submit_ms, 50):.0f}ms "
+          f"p95={percentile(submit_ms, 95):.0f}ms p99={percentile(submit_ms, 99):.0f}ms")
+    print(f"  Submit -> graded:     p50={percentile(total_ms, 50):.0f}ms "
+          f"p95={percentile(total_ms, 95):.0f}ms p99={percentile(total_ms, 99):.0f}ms")
+    print(f"  Fallback rate: {fallbacks / len(results):.1%} ({fallbacks} needs_regrade/failed)")
+    errors = len(results) - len(graded) - fallbacks
+    if errors:
+        print(f"  ⚠️  {errors} submission(s) errored or timed out - check pool saturation below")
+
+    pool = after.get("db_pool", {})
+    peak_checked_out = peak(samples, "db_pool", "checked_out")
+    peak_saturation = peak(samples, "db_pool", "saturation")
+    print(f"  DB pool: {pool.get('pool_class')} capacity={pool.get('capacity')} "
+          f"peak checked out={peak_checked_out} peak saturation="
+          f"{'n/a' if peak_saturation is None else f'{peak_saturation:.0%}'}")
+
+    scheduler = after.get("ai_scheduler", {})
+    print(f"  AI scheduler: peak in flight={peak(samples, 'ai_scheduler', 'in_flight')} "
+          f"peak queue={peak(samples, 'ai_scheduler', 'queue_depth')} "
+          f"limit={scheduler.get('limit')} overloads="
+          f"{scheduler.get('overloads', 0) - before.get('ai_scheduler', {}).get('overloads', 0)}")
+    print(f"  Grading queue: peak depth={peak(samples, 'grading_queue', 'queue_depth')} "
+          f"breaker={after.get('ai_breaker', {}).get('state')}")
+    cache_before = before.get("grading_cache", {})
+    cache_after = after.get("grading_cache", {})
+    print(f"  Grading cache: hits={cache_after.get('hits', 0) - cache_before.get('hits', 0)} "
+          f"coalesced={cache_after.get('coalesced', 0) - cache_before.get('coalesced', 0)}")
+
+    if mock_stats:
+        print(f"  Mock API: {mock_stats['requests']} requests, max in flight={mock_stats['max_in_flight']}, "
+              f"outcomes={mock_stats['outcomes']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent submission grading benchmark")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--username", default="admin", help="Admin account used for setup")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--submissions", type=int, default=100, help="Students, one submission each")
+    parser.add_argument("--concurrency", type=int, default=50, help="Submissions in flight at once")
+    parser.add_argument("--setup-concurrency", type=int, default=8)
+    parser.add_argument("--same-content", action="store_true", help="Submit identical code (exercises the cache)")
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--sample-interval", type=float, default=0.25)
+    parser.add_argument("--timeout", type=float, default=300.0, help="Give up waiting for a grade after this")
+    parser.add_argument("--request-timeout", type=float, default=60.0, help="Per-request HTTP timeout")
+    parser.add_argument("--mock-url", help="mock_deepseek.py base URL, to include its stats")
+    args = parser.parse_args()
+
+    print("🧪 AI Grading Throughput Benchmark")
+    print("=" * 50)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
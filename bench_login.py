@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Login storm benchmark for Homework Management System
+Measures login throughput and the latency of other endpoints while
+many logins are being processed. Run this against a started server.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+# Base URL - adjust if your server runs on different host/port
+BASE_URL = "http://localhost:8000"
+PROBE_PATH = "/app/constants"
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def probe(client, stop_event, latencies):
+    """Hit a cheap endpoint in a loop and record its latency"""
+    while not stop_event.is_set():
+        started = time.perf_counter()
+        await client.get(PROBE_PATH)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def login_worker(client, queue, results, username, password):
+    """Take login jobs from the queue until it is empty"""
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        started = time.perf_counter()
+        response = await client.post("/auth/login", json={
+            "username": username,
+            "password": password,
+            "device_name": "Benchmark"
+        })
+        results.append((response.status_code, (time.perf_counter() - started) * 1000))
+
+
+async def measure_idle(client, duration):
+    """Probe latency with no login traffic"""
+    stop_event = asyncio.Event()
+    latencies = []
+    task = asyncio.create_task(probe(client, stop_event, latencies))
+    await asyncio.sleep(duration)
+    stop_event.set()
+    await task
+    return latencies
+
+
+async def measure_storm(client, logins, concurrency, username, password):
+    """Run a login storm while probing another endpoint"""
+    queue = asyncio.Queue()
+    for _ in range(logins):
+        queue.put_nowait(None)
+
+    stop_event = asyncio.Event()
+    probe_latencies = []
+    login_results = []
+
+    probe_task = asyncio.create_task(probe(client, stop_event, probe_latencies))
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        login_worker(client, queue, login_results, username, password)
+        for _ in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - started
+    stop_event.set()
+    await probe_task
+
+    return elapsed, login_results, probe_latencies
+
+
+def print_latencies(label, latencies):
+    print(f"  {label}: n={len(latencies)} "
+          f"p50={percentile(latencies, 50):.1f}ms "
+          f"p99={percentile(latencies, 99):.1f}ms "
+          f"max={max(latencies, default=0):.1f}ms")
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 2)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60.0) as client:
+        print(f"⏱️  Measuring idle latency of {PROBE_PATH} for {args.idle}s...")
+        idle_latencies = await measure_idle(client, args.idle)
+
+        print(f"🌩️  Sending {args.logins} logins with concurrency {args.concurrency}...")
+        elapsed, login_results, storm_latencies = await measure_storm(
+            client, args.logins, args.concurrency, args.username, args.password
+        )
+
+    statuses = {}
+    for status_code, _ in login_results:
+        statuses[status_code] = statuses.get(status_code, 0) + 1
+    login_latencies = [latency for _, latency in login_results]
+
+    print("\n" + "=" * 50)
+    print("📊 Results")
+    print("=" * 50)
+    print(f"  Logins: {len(login_results)} in {elapsed:.2f}s "
+          f"({len(login_results) / elapsed:.1f} logins/sec)")
+    print(f"  Status codes: {statuses}")
+    print_latencies("Login latency", login_latencies)
+    print_latencies(f"{PROBE_PATH} idle", idle_latencies)
+    print_latencies(f"{PROBE_PATH} during storm", storm_latencies)
+    if idle_latencies and storm_latencies:
+        print(f"  Mean probe slowdown: "
+              f"{statistics.mean(storm_latencies) / statistics.mean(idle_latencies):.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login storm benchmark")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--logins", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--idle", type=float, default=3.0, help="Seconds of idle probing")
+    parser.add_argument("--username", default="alice")
+    # A wrong password still runs the full lookup + bcrypt path without creating sessions
+    parser.add_argument("--password", default="wrong-password")
+    args = parser.parse_args()
+
+    print("🧪 Login Storm Benchmark")
+    print("=" * 50)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
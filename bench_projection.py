@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+List projection benchmark for Homework Management System
+Seeds a scratch database with one group holding --submissions submissions
+and runs each list query twice: as full ORM entities (what the services
+loaded before projections) and as the services load them now, with
+load_only() columns and SubmissionFile.content deferred. Reports rows and
+bytes read from the database and peak Python memory per request.
+
+    python bench_projection.py [--submissions 1000]
+
+Uses a temporary SQLite file; set BENCH_DATABASE_URL to run against
+PostgreSQL instead - its tables are dropped and recreated.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, desc, event, insert
+from sqlalchemy.orm import joinedload, selectinload, sessionmaker
+
+from app.database import Base
+from app.models import User, Group, Homework, Submission, SubmissionFile, Grade
+from app.services import GradeService, HomeworkService, UserService
+
+HOMEWORK_COUNT = 20
+FILE_LINES = 150
+
+
+def seed(engine, submission_count: int) -> dict:
+    """One teacher and group; students x homework adds up to submission_count"""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    now = datetime.utcnow()
+    students = -(-submission_count // HOMEWORK_COUNT)
+    source = "\n".join(f"    total += values[{i}] * {i}  # step {i}" for i in range(FILE_LINES))
+    feedback = "The solution is correct and readable, but some names could be clearer. " * 6
+
+    users = [{"id": 1, "fullname": "Bench Teacher", "username": "bench_teacher", "password_hash": "x" * 60,
+              "role": "teacher"}]
+    users += [{"id": 2 + s, "fullname": f"Student {s}", "username": f"bench_student_{s}", "password_hash": "x" * 60,
+               "role": "student", "group_id": 1} for s in range(students)]
+    homework = [{
+        "id": h + 1, "title": f"Homework {h + 1}", "description": "Implement the algorithm. " * 40, "points": 100,
+        "start_date": now - timedelta(days=30), "deadline": now + timedelta(days=h), "line_limit": 300,
+        "teacher_id": 1, "group_id": 1, "file_extension": ".py", "ai_grading_prompt": "Grade strictly. " * 200
+    } for h in range(HOMEWORK_COUNT)]
+
+    submissions, files, grades = [], [], []
+    for index in range(submission_count):
+        submission_id = index + 1
+        submissions.append({
+            "id": submission_id, "homework_id": index % HOMEWORK_COUNT + 1, "student_id": 2 + index // HOMEWORK_COUNT,
+            "submitted_at": now - timedelta(minutes=index), "ai_grade": 80, "final_grade": 80,
+            "ai_feedback": feedback[:200], "grading_status": "graded", "graded_at": now
+        })
+        files.append({"submission_id": submission_id, "file_name": "solution.py", "content": source,
+                      "line_count": FILE_LINES})
+        grades.append({
+            "submission_id": submission_id, "ai_task_completeness": 80, "ai_code_quality": 80, "ai_correctness": 80,
+            "ai_total": 80, "final_task_completeness": 80, "final_code_quality": 80, "final_correctness": 80,
+            "ai_feedback": feedback, "task_completeness_feedback": feedback, "code_quality_feedback": feedback,
+            "correctness_feedback": feedback
+        })
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), users[:1])
+        conn.execute(insert(Group), [{"id": 1, "name": "Bench group", "teacher_id": 1}])
+        for model, rows in ((User, users[1:]), (Homework, homework), (Submission, submissions),
+                            (SubmissionFile, files), (Grade, grades)):
+            conn.execute(insert(model), rows)
+
+    return {"teacher_id": 1, "group_id": 1, "student_id": 2, "submission_ids": [s["id"] for s in submissions]}
+
+
+def scenarios(ids: dict) -> dict:
+    """Name -> (full entity load, projected load)"""
+    t, g, s = ids["teacher_id"], ids["group_id"], ids["student_id"]
+    everything = len(ids["submission_ids"])  # One page holding every row, like the full loads
+
+    def full_group_submissions(db):
+        return db.query(Submission).options(
+            joinedload(Submission.student),
+            joinedload(Submission.homework),
+            joinedload(Submission.grade)
+        ).join(Homework, Submission.homework_id == Homework.id).filter(
+            Homework.group_id == g, Homework.teacher_id == t
+        ).order_by(desc(Submission.submitted_at)).all()
+
+    def submission_files(undeferred):
+        def load(db):
+            option = selectinload(Submission.files)
+            return db.query(Submission).options(
+                option.undefer(SubmissionFile.content) if undeferred else option
+            ).filter(Submission.id.in_(ids["submission_ids"])).all()
+        return load
+
+    return {
+        "teacher homework": (
+            lambda db: db.query(Homework).options(joinedload(Homework.group)).filter(Homework.teacher_id == t).all(),
+            lambda db: HomeworkService.get_teacher_homework(db, t, limit=everything)
+        ),
+        "student homework": (
+            lambda db: db.query(Homework).options(
+                joinedload(Homework.teacher), joinedload(Homework.group)
+            ).filter(
+                Homework.group_id == g, Homework.start_date <= datetime.utcnow(), Homework.deadline > datetime.utcnow()
+            ).all(),
+            lambda db: HomeworkService.get_student_homework(db, s)
+        ),
+        "group submissions": (
+            full_group_submissions,
+            lambda db: GradeService.get_group_submissions(db, g, t, limit=everything)
+        ),
+        "student submissions": (
+            lambda db: db.query(Submission).options(
+                joinedload(Submission.homework), joinedload(Submission.grade)
+            ).filter(Submission.student_id == s).order_by(desc(Submission.submitted_at)).limit(20).all(),
+            lambda db: GradeService.get_student_submissions(db, s)
+        ),
+        "group students": (
+            lambda db: db.query(User).filter(User.role == "student", User.group_id == g).all(),
+            lambda db: UserService.get_users(db, "student", g, limit=everything)
+        ),
+        "submission files": (submission_files(True), submission_files(False))
+    }
+
+
+class StatementRecorder:
+    """Collects the SQL (with parameters) sent while recording is on"""
+
+    def __init__(self):
+        self.recording = False
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.recording and not executemany:
+            self.statements.append((statement, parameters))
+
+
+def value_size(value) -> int:
+    """Approximate wire size of one column value"""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (int, float)):
+        return 8
+    return len(str(value))
+
+
+def transferred(engine, statements) -> tuple:
+    """(rows, bytes) the recorded statements read, by running them again"""
+    rows = size = 0
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            for row in conn.exec_driver_sql(statement, parameters):
+                rows += 1
+                size += sum(value_size(value) for value in row)
+    return rows, size
+
+
+def measure(engine, SessionLocal, recorder, load, repeat: int) -> dict:
+    """Rows and bytes from the database, peak memory and median time of one load"""
+    timings = []
+    for _ in range(repeat):
+        db = SessionLocal()
+        started = time.perf_counter()
+        load(db)
+        timings.append((time.perf_counter() - started) * 1000)
+        db.close()
+
+    db = SessionLocal()
+    recorder.statements = []
+    recorder.recording = True
+    tracemalloc.start()
+    try:
+        load(db)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        recorder.recording = False
+        db.close()
+
+    rows, size = transferred(engine, recorder.statements)
+    return {"rows": rows, "bytes": size, "peak": peak, "ms": statistics.median(timings)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List projection benchmark")
+    parser.add_argument("--submissions", type=int, default=1000, help="Submissions in the benchmark group")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query")
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL") or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "projection.db")
+    engine = create_engine(url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+    print("🧪 List Projection Benchmark")
+    print("=" * 50)
+    print(f"🗄️  Seeding one group with {args.submissions} submission(s) ({engine.dialect.name})...")
+    ids = seed(engine, args.submissions)
+
+    recorder = StatementRecorder()
+    event.listen(engine, "before_cursor_execute", recorder)
+
+    print("\n" + "=" * 50)
+    print("📊 Results (full entities -> projection)")
+    print("=" * 50)
+    for name, (full, projected) in scenarios(ids).items():
+        before = measure(engine, SessionLocal, recorder, full, args.repeat)
+        after = measure(engine, SessionLocal, recorder, projected, args.repeat)
+        saved = 100 * (1 - after["bytes"] / before["bytes"]) if before["bytes"] else 0.0
+        print(f"  {name} ({after['rows']} rows):")
+        print(f"    from DB: {before['bytes'] / 1024:.0f}KB -> {after['bytes'] / 1024:.0f}KB (-{saved:.0f}%)")
+        print(f"    peak memory: {before['peak'] / 1024:.0f}KB -> {after['peak'] / 1024:.0f}KB")
+        print(f"    time p50: {before['ms']:.1f}ms -> {after['ms']:.1f}ms")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
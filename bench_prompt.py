@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Prompt size benchmark for Homework Management System
+Builds grading prompts for a corpus of submissions twice - the original
+verbatim prompt and the compacted, budgeted one from prompt_builder - and
+reports size reduction and build time. With --grade N it also sends N of each
+to the configured AI API and compares grading latency.
+
+The corpus is every submission in the database; with --corpus DIR (or an
+empty database) each source file under DIR is graded as a one-file submission.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy.orm import selectinload
+
+from app.database import SessionLocal
+from app.models import Homework, Submission, SubmissionFile
+from app.services.prompt_builder import build_prompt, estimate_tokens, instruction_blocks
+from bench_login import percentile
+
+
+class CorpusFile:
+    def __init__(self, file_name, content):
+        self.file_name = file_name
+        self.content = content
+
+
+def legacy_prompt(homework, files):
+    """The prompt as grade_submission built it before prompt_builder"""
+    file_contents = ""
+    for file in files:
+        file_contents += f"=== {file.file_name} ===\n{file.content}\n\n"
+
+    return f"""
+You are an expert programming instructor. Grade this {homework.file_extension} code submission.
+
+HOMEWORK: {homework.title}
+DESCRIPTION: {homework.description}
+POINTS: {homework.points}
+GRADING CRITERIA: {homework.ai_grading_prompt}
+
+SUBMITTED FILES:
+{file_contents}
+
+Please grade this submission on 3 criteria (0-100 each):
+1. Task Completeness - How well does the code fulfill the requirements?
+2. Code Quality - Code structure, readability, best practices
+3. Correctness - Does the code work correctly and handle edge cases?
+
+Return your response as JSON in this exact format:
+{{
+    "task_completeness": <score 0-100>,
+    "code_quality": <score 0-100>, 
+    "correctness": <score 0-100>,
+    "total": <average of the three scores>,
+    "overall_feedback": "<brief 2-3 sentence summary>",
+    "task_completeness_feedback": "<specific feedback on task completion>",
+    "code_quality_feedback": "<specific feedback on code quality>",
+    "correctness_feedback": "<specific feedback on correctness>"
+}}
+
+Be constructive and specific in your feedback. Focus on what the student did well and areas for improvement.
+"""
+
+
+def load_database_corpus(limit):
+    """(homework, files) pairs for stored submissions"""
+    db = SessionLocal()
+    try:
+        submissions = db.query(Submission).options(
+            selectinload(Submission.files).undefer(SubmissionFile.content)
+        ).order_by(Submission.id).limit(limit).all()
+        corpus = []
+        for submission in submissions:
+            homework = db.query(Homework).filter(Homework.id == submission.homework_id).first()
+            files = [CorpusFile(f.file_name, f.content) for f in submission.files]
+            if homework and files:
+                db.expunge(homework)
+                corpus.append((homework, files))
+        return corpus
+    finally:
+        db.close()
+
+
+def load_directory_corpus(directory, extension, limit):
+    """One single-file submission per source file under directory"""
+    homework = Homework(
+        id=0, title="Corpus homework", description="Benchmark corpus", points=100,
+        file_extension=extension, ai_grading_prompt="Check correctness and style",
+        group_id=None, line_limit=1200
+    )
+    corpus = []
+    for root, _, names in os.walk(directory):
+        for name in sorted(names):
+            if name.endswith(extension):
+                with open(os.path.join(root, name), encoding="utf-8", errors="replace") as f:
+                    corpus.append((homework, [CorpusFile(name, f.read())]))
+                if len(corpus) >= limit:
+                    return corpus
+    return corpus
+
+
+def measure(corpus, builder):
+    """Total characters, estimated tokens and per-prompt build times"""
+    chars = tokens = 0
+    timings = []
+    prompts = []
+    for homework, files in corpus:
+        started = time.perf_counter()
+        prompt = builder(homework, files)
+        timings.append((time.perf_counter() - started) * 1_000_000)
+        chars += len(prompt)
+        tokens += estimate_tokens(prompt, homework.file_extension)
+        prompts.append((homework, prompt))
+    return chars, tokens, timings, prompts
+
+
+async def grade_latency(prompts, count):
+    """Send prompts through the AI client and collect latencies (ms)"""
+    from app.services.ai_client import ai_http_client
+    from app.services.ai_service import AIService, AIGradingError
+
+    service = AIService()
+    latencies = []
+    failures = 0
+    for homework, prompt in prompts[:count]:
+        started = time.perf_counter()
+        try:
+            AIService.parse_grades(await service.post_with_retries(homework.group_id, prompt))
+        except AIGradingError:
+            failures += 1
+        latencies.append((time.perf_counter() - started) * 1000)
+    await ai_http_client.close()
+    return latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt compaction benchmark")
+    parser.add_argument("--corpus", help="Directory of source files instead of stored submissions")
+    parser.add_argument("--extension", default=".py", help="File extension for --corpus")
+    parser.add_argument("--limit", type=int, default=1000, help="Maximum submissions to load")
+    parser.add_argument("--strip-comments", action="store_true", help="Also drop comment-only lines")
+    parser.add_argument("--grade", type=int, default=0, help="Also grade N prompts of each kind")
+    args = parser.parse_args()
+
+    print("🧪 Prompt Compaction Benchmark")
+    print("=" * 50)
+
+    corpus = [] if args.corpus else load_database_corpus(args.limit)
+    if not corpus:
+        directory = args.corpus or os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+        corpus = load_directory_corpus(directory, args.extension, args.limit)
+        print(f"📁 Corpus: {len(corpus)} file(s) from {directory}")
+    else:
+        print(f"🗄️  Corpus: {len(corpus)} stored submission(s)")
+
+    if not corpus:
+        print("❌ Nothing to benchmark")
+        sys.exit(1)
+
+    before = measure(corpus, legacy_prompt)
+    instruction_blocks.cache_clear()
+    after = measure(
+        corpus,
+        lambda homework, files: build_prompt(homework, files, strip_comments=args.strip_comments)[0]
+    )
+
+    print("\n" + "=" * 50)
+    print("📊 Results")
+    print("=" * 50)
+    for label, (chars, tokens, timings, _) in (("before", before), ("after", after)):
+        print(f"  {label:>6}: {chars} chars, ~{tokens} tokens "
+              f"(avg {tokens / len(corpus):.0f}/prompt), build p50={percentile(timings, 50):.0f}µs "
+              f"p99={percentile(timings, 99):.0f}µs")
+    reduction = 100 * (1 - after[1] / before[1]) if before[1] else 0.0
+    print(f"  Token reduction: {reduction:.1f}%")
+    print(f"  Instruction block cache: {instruction_blocks.cache_info()}")
+
+    if args.grade:
+        print(f"\n⏱️  Grading {args.grade} prompt(s) of each kind...")
+        for label, measured in (("before", before), ("after", after)):
+            latencies, failures = asyncio.run(grade_latency(measured[3], args.grade))
+            print(f"  {label:>6}: p50={percentile(latencies, 50):.0f}ms "
+                  f"p95={percentile(latencies, 95):.0f}ms failures={failures}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Read-path throughput benchmark for Homework Management System
+Fires concurrent authenticated GET requests at a running server and reports
+requests/sec and latency percentiles. Run it once with DB_ASYNC=false and
+once with DB_ASYNC=true (single uvicorn worker) to compare the two modes.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from bench_login import BASE_URL, percentile
+
+DEFAULT_PATHS = {
+    "admin": ["/admin/groups", "/admin/students", "/admin/teachers"],
+    "teacher": ["/teacher/homework", "/teacher/groups", "/teacher/groups/1/submissions"],
+    "student": ["/student/homework", "/student/submissions", "/student/leaderboard"],
+}
+
+
+async def login(client, username, password):
+    """Log in and return auth headers plus the user's role"""
+    response = await client.post("/auth/login", json={
+        "username": username,
+        "password": password,
+        "device_name": "Benchmark"
+    })
+    response.raise_for_status()
+    data = response.json()
+    return {"Authorization": f"Bearer {data['access_token']}"}, data["user"]["role"]
+
+
+async def worker(client, headers, paths, deadline, results):
+    """Cycle through the paths until the deadline"""
+    index = 0
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        started = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        results.append((path, response.status_code, (time.perf_counter() - started) * 1000))
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 2)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60.0) as client:
+        headers, role = await login(client, args.username, args.password)
+        paths = args.paths or DEFAULT_PATHS[role]
+
+        db_mode = "unknown"
+        if role == "admin":
+            diagnostics = await client.get("/admin/diagnostics", headers=headers)
+            db_mode = diagnostics.json().get("db_mode", db_mode)
+
+        print(f"🔁 {args.concurrency} workers for {args.duration}s against {paths} (db_mode={db_mode})")
+        results = []
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*[
+            worker(client, headers, paths, deadline, results)
+            for _ in range(args.concurrency)
+        ])
+
+    print("\n" + "=" * 50)
+    print("📊 Results")
+    print("=" * 50)
+    print(f"  Requests: {len(results)} ({len(results) / args.duration:.1f} req/sec)")
+    for path in paths:
+        latencies = [latency for p, _, latency in results if p == path]
+        errors = sum(1 for p, status_code, _ in results if p == path and status_code >= 400)
+        print(f"  {path}: n={len(latencies)} errors={errors} "
+              f"p50={percentile(latencies, 50):.1f}ms p99={percentile(latencies, 99):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-path throughput benchmark")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--paths", nargs="*", help="Override the endpoints to request")
+    args = parser.parse_args()
+
+    print("🧪 Request Throughput Benchmark")
+    print("=" * 50)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Response serialization benchmark for Homework Management System
+Renders a list of --rows submissions the way GET /teacher/groups/{id}/submissions
+does by default (a SubmissionResponse built per row, then validated and
+encoded again by FastAPI's response_model handling) and through the
+FAST_JSON_RESPONSES path (Core row dicts rendered by orjson, or once
+through a cached TypeAdapter when orjson is missing). Checks that every
+path produces the same JSON and reports render time per response.
+
+    python bench_serialization.py [--rows 10000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.schemas.submission import SubmissionResponse
+from app.utils import fast_json
+from app.utils.fast_json import FastJSONResponse
+
+
+def make_rows(count: int) -> List[dict]:
+    """Rows as GradeService.get_group_submission_rows returns them"""
+    now = datetime.utcnow()
+    return [{
+        "id": i + 1, "homework_id": i % 20 + 1, "student_id": 100 + i // 20,
+        "submitted_at": now - timedelta(minutes=i), "ai_grade": 70 + i % 30, "final_grade": 70 + i % 30,
+        "ai_feedback": "Correct solution; consider clearer variable names.", "grading_status": "graded",
+        "homework_title": f"Homework {i % 20 + 1}", "student_name": f"Student {100 + i // 20}", "files": []
+    } for i in range(count)]
+
+
+async def current_path(rows: List[dict], field) -> bytes:
+    """Router builds models from ORM objects, FastAPI validates and encodes them again"""
+    submissions = [SimpleNamespace(**row) for row in rows]
+    content = [SubmissionResponse(
+        id=s.id, homework_id=s.homework_id, student_id=s.student_id, submitted_at=s.submitted_at,
+        ai_grade=s.ai_grade, final_grade=s.final_grade, ai_feedback=s.ai_feedback,
+        grading_status=s.grading_status, homework_title=s.homework_title, student_name=s.student_name, files=[]
+    ) for s in submissions]
+    data = await serialize_response(field=field, response_content=content, is_coroutine=True)
+    return JSONResponse(data).body
+
+
+def fast_path(rows: List[dict]) -> bytes:
+    return FastJSONResponse(List[SubmissionResponse], rows).body
+
+
+def adapter_path(rows: List[dict]) -> bytes:
+    """FAST_JSON_RESPONSES without orjson installed"""
+    orjson, fast_json.orjson = fast_json.orjson, None
+    try:
+        return FastJSONResponse(List[SubmissionResponse], rows).body
+    finally:
+        fast_json.orjson = orjson
+
+
+def timed(render, repeat: int) -> tuple:
+    """(median ms, body) over repeat renders"""
+    timings = []
+    body = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = render()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--rows", type=int, default=10000, help="Submissions per response")
+    parser.add_argument("--repeat", type=int, default=5, help="Renders per path")
+    args = parser.parse_args()
+
+    print("🧪 Response Serialization Benchmark")
+    print("=" * 50)
+    rows = make_rows(args.rows)
+    field = create_response_field(name="Response_bench", type_=List[SubmissionResponse])
+
+    paths = {"current (models + response_model)": lambda: asyncio.run(current_path(rows, field))}
+    if fast_json.orjson is not None:
+        paths["fast (orjson)"] = lambda: fast_path(rows)
+    else:
+        print("⚠️  orjson is not installed - only the TypeAdapter fallback is measured")
+    paths["fast (TypeAdapter fallback)"] = lambda: adapter_path(rows)
+
+    results = {name: timed(render, args.repeat) for name, render in paths.items()}
+    expected = json.loads(next(iter(results.values()))[1])
+
+    print(f"\n📊 {args.rows} rows, median of {args.repeat}")
+    baseline = next(iter(results.values()))[0]
+    ok = True
+    for name, (ms, body) in results.items():
+        same = json.loads(body) == expected
+        ok = ok and same
+        print(f"  {name:>36}: {ms:8.1f}ms  {len(body) / 1024:.0f}KB  "
+              f"x{baseline / ms:.1f}  {'✓ same JSON' if same else '❌ different JSON'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
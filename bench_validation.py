@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Schema validation benchmark for Homework Management System
+Times the Pydantic work behind the busiest requests with the v1-style
+compatibility API the schemas used before (@validator, from_orm, .dict(),
+line counting with split) and with the native v2 API they use now
+(field_validator, model_validate, model_dump, newline counting).
+
+    python bench_validation.py [--iterations 2000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import warnings
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pydantic import BaseModel, validator
+from pydantic.warnings import PydanticDeprecatedSince20
+
+from app.schemas import GradeResponse, SubmissionCreate, UserResponse
+from app.utils.constants import MAX_FILES_PER_HOMEWORK, MAX_LINES_PER_FILE
+
+warnings.filterwarnings("ignore", category=PydanticDeprecatedSince20)
+
+
+class LegacySubmissionFileCreate(BaseModel):
+    """SubmissionFileCreate as it was written for the v1 API"""
+    file_name: str
+    content: str
+
+    @validator('content')
+    def validate_content(cls, v):
+        lines = v.split('\n')
+        if len(lines) > MAX_LINES_PER_FILE:
+            raise ValueError(f'File cannot exceed {MAX_LINES_PER_FILE} lines')
+        return v
+
+
+class LegacySubmissionCreate(BaseModel):
+    files: List[LegacySubmissionFileCreate]
+
+    @validator('files')
+    def validate_files(cls, v):
+        if len(v) == 0:
+            raise ValueError('At least one file is required')
+        if len(v) > MAX_FILES_PER_HOMEWORK:
+            raise ValueError(f'Cannot submit more than {MAX_FILES_PER_HOMEWORK} files')
+        return v
+
+
+def submission_payload() -> dict:
+    """The largest submission the limits allow"""
+    source = "\n".join(f"    result = compute(values[{i}], {i})  # line {i}" for i in range(MAX_LINES_PER_FILE))
+    return {"files": [{"file_name": f"part{i}.py", "content": source} for i in range(MAX_FILES_PER_HOMEWORK)]}
+
+
+def orm_user():
+    return SimpleNamespace(id=1, fullname="Alice Student", username="alice", role="student", group_id=1,
+                           created_at=datetime.utcnow(), password_hash="x" * 60)
+
+
+def orm_grade():
+    return SimpleNamespace(
+        id=1, submission_id=1, ai_task_completeness=80, ai_code_quality=75, ai_correctness=90, ai_total=82,
+        final_task_completeness=80, final_code_quality=75, final_correctness=90, teacher_total=None,
+        ai_feedback="Solid work.", task_completeness_feedback="All parts done.",
+        code_quality_feedback="Readable.", correctness_feedback="Handles edge cases.",
+        modified_by_teacher=None, queue_wait_ms=12, grading_ms=900, graded_at=datetime.utcnow()
+    )
+
+
+def cases() -> dict:
+    """Name -> (v1-style call, v2 call)"""
+    payload, user, grade = submission_payload(), orm_user(), orm_grade()
+    return {
+        "submit payload": (
+            lambda: LegacySubmissionCreate.parse_obj(payload),
+            lambda: SubmissionCreate.model_validate(payload)
+        ),
+        "login user dict": (
+            lambda: UserResponse.from_orm(user).dict(),
+            lambda: UserResponse.model_validate(user).model_dump()
+        ),
+        "grade response": (
+            lambda: GradeResponse.from_orm(grade),
+            lambda: GradeResponse.model_validate(grade)
+        )
+    }
+
+
+def timed(call, iterations: int) -> float:
+    """Median microseconds per call over five rounds"""
+    rounds = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            call()
+        rounds.append((time.perf_counter() - started) * 1_000_000 / iterations)
+    return statistics.median(rounds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Schema validation benchmark")
+    parser.add_argument("--iterations", type=int, default=2000, help="Calls per round")
+    args = parser.parse_args()
+
+    print("🧪 Schema Validation Benchmark")
+    print("=" * 50)
+    print(f"📊 Median µs per call ({args.iterations} calls x 5 rounds)")
+    for name, (legacy, native) in cases().items():
+        before, after = timed(legacy, args.iterations), timed(native, args.iterations)
+        print(f"  {name:>16}: v1 API {before:8.1f}µs -> v2 API {after:8.1f}µs (x{before / after:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Leaderboard maintenance for Homework Management System
+  python leaderboard_tools.py rebuild   - recompute the leaderboard table (backfill)
+  python leaderboard_tools.py check     - compare the table with live submission totals
+"""
+
+import os
+import sys
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import engine, SessionLocal, Base
+from app.models import LeaderboardEntry
+from app.services.leaderboard_service import LeaderboardService
+
+
+def rebuild(db):
+    """Recompute every leaderboard bucket from submissions"""
+    print("Rebuilding leaderboard table...")
+    count = LeaderboardService.rebuild(db)
+    print(f"✓ Wrote {count} leaderboard rows")
+    return True
+
+
+def check(db):
+    """Report buckets that disagree with the live aggregate"""
+    print("Checking leaderboard consistency...")
+    mismatches = LeaderboardService.check_consistency(db)
+
+    if not mismatches:
+        print("✓ Leaderboard table matches submissions")
+        return True
+
+    print(f"❌ Found {len(mismatches)} mismatched bucket(s):")
+    for mismatch in mismatches[:50]:
+        print(f"   student {mismatch['student_id']} {mismatch['period']} {mismatch['period_start']}: "
+              f"expected {mismatch['expected']}, actual {mismatch['actual']}")
+    if len(mismatches) > 50:
+        print(f"   ... and {len(mismatches) - 50} more")
+    print("💡 Run 'python leaderboard_tools.py rebuild' to repair")
+    return False
+
+
+def main():
+    commands = {"rebuild": rebuild, "check": check}
+    if len(sys.argv) != 2 or sys.argv[1] not in commands:
+        print(__doc__)
+        sys.exit(2)
+
+    # Make sure the table exists on databases created before it was added
+    Base.metadata.create_all(bind=engine, tables=[LeaderboardEntry.__table__])
+
+    db = SessionLocal()
+    try:
+        ok = commands[sys.argv[1]](db)
+    finally:
+        db.close()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Schema migration for Homework Management System
+Brings a database created by an older version up to the current models:
+missing tables, missing columns, indexes and named unique constraints.
+  python migrate_db.py check     - list what is missing without changing anything
+  python migrate_db.py upgrade   - apply it
+Works on SQLite and PostgreSQL. A unique constraint is not added while the
+table holds duplicate rows; they are listed so they can be cleaned up first.
+"""
+
+import os
+import sys
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import UniqueConstraint, inspect, text
+from sqlalchemy.schema import CreateColumn
+
+from app.database import engine, Base
+import app.models  # noqa: F401 - registers every table on Base.metadata
+
+POSTGRES = engine.dialect.name == "postgresql"
+
+
+def quote(name):
+    return engine.dialect.identifier_preparer.quote(name)
+
+
+def index_sql(name, table, columns, unique=False):
+    """CREATE INDEX; concurrent on PostgreSQL so live tables keep taking writes"""
+    return (
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX{' CONCURRENTLY' if POSTGRES else ''} "
+        f"IF NOT EXISTS {quote(name)} ON {quote(table)} ({', '.join(quote(c) for c in columns)})"
+    )
+
+
+def column_sql(table, column):
+    """ALTER TABLE ADD COLUMN; NOT NULL is dropped when existing rows have no default"""
+    ddl = str(CreateColumn(column).compile(dialect=engine.dialect))
+    if not column.nullable and column.server_default is None:
+        ddl = ddl.replace(" NOT NULL", "")
+    return f"ALTER TABLE {quote(table)} ADD COLUMN {ddl}"
+
+
+def unique_sql(constraint):
+    """Statements adding a named unique constraint"""
+    table = constraint.table.name
+    columns = [column.name for column in constraint.columns]
+    if not POSTGRES:
+        # SQLite cannot add constraints to an existing table; a unique index enforces the same
+        return [index_sql(constraint.name, table, columns, unique=True)]
+    return [
+        index_sql(constraint.name, table, columns, unique=True),
+        f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(constraint.name)} UNIQUE USING INDEX {quote(constraint.name)}"
+    ]
+
+
+def find_duplicates(conn, constraint, limit=5):
+    """Sample of value combinations that already break a unique constraint"""
+    columns = ", ".join(quote(column.name) for column in constraint.columns)
+    return conn.execute(text(
+        f"SELECT {columns}, COUNT(*) FROM {quote(constraint.table.name)} "
+        f"GROUP BY {columns} HAVING COUNT(*) > 1 LIMIT {limit}"
+    )).fetchall()
+
+
+def plan(conn):
+    """Return (steps, blocked): [(description, statements or table)] and [(description, duplicates)]"""
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    steps, blocked = [], []
+
+    # Models are registered parents-first (users and groups reference each other)
+    for table in Base.metadata.tables.values():
+        if table.name not in existing_tables:
+            steps.append((f"create table {table.name}", table))
+            continue
+
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                steps.append((f"add column {table.name}.{column.name}", [column_sql(table.name, column)]))
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        existing_uniques = {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            if index.name not in existing_indexes:
+                columns = [column.name for column in index.columns]
+                steps.append((
+                    f"create index {index.name} on {table.name}({', '.join(columns)})",
+                    [index_sql(index.name, table.name, columns, index.unique)]
+                ))
+
+        for constraint in table.constraints:
+            if not isinstance(constraint, UniqueConstraint) or not constraint.name:
+                continue
+            if constraint.name in existing_uniques or constraint.name in existing_indexes:
+                continue
+            description = (
+                f"add unique {constraint.name} on "
+                f"{table.name}({', '.join(column.name for column in constraint.columns)})"
+            )
+            duplicates = find_duplicates(conn, constraint)
+            if duplicates:
+                blocked.append((description, duplicates))
+            else:
+                steps.append((description, unique_sql(constraint)))
+
+    return steps, blocked
+
+
+def report_blocked(blocked):
+    for description, duplicates in blocked:
+        print(f"❌ Cannot {description}: duplicate rows exist, e.g.")
+        for row in duplicates:
+            print(f"   {tuple(row[:-1])} x{row[-1]}")
+    print("💡 Remove the duplicates, then run 'python migrate_db.py upgrade' again")
+
+
+def check(conn):
+    """List pending changes"""
+    steps, blocked = plan(conn)
+    if not steps and not blocked:
+        print("✓ Database schema is up to date")
+        return True
+
+    print(f"Pending changes ({engine.dialect.name}):")
+    for description, _ in steps:
+        print(f"   - {description}")
+    if blocked:
+        report_blocked(blocked)
+    return False
+
+
+def upgrade(conn):
+    """Apply pending changes; each statement runs in its own transaction"""
+    steps, blocked = plan(conn)
+    for description, action in steps:
+        print(f"→ {description}")
+        if isinstance(action, list):
+            for statement in action:
+                conn.execute(text(statement))
+        else:
+            action.create(conn)
+
+    if steps:
+        # Refresh planner statistics so the new indexes get used
+        conn.execute(text("ANALYZE"))
+        print(f"✓ Applied {len(steps)} change(s)")
+    else:
+        print("✓ Nothing to apply")
+
+    if blocked:
+        report_blocked(blocked)
+        return False
+    return True
+
+
+def main():
+    commands = {"check": check, "upgrade": upgrade}
+    if len(sys.argv) != 2 or sys.argv[1] not in commands:
+        print(__doc__)
+        sys.exit(2)
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        ok = commands[sys.argv[1]](conn)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
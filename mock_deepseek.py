@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Local DeepSeek stand-in for Homework Management System
+Serves an OpenAI-compatible /v1/chat/completions endpoint that returns
+grading JSON after a configurable delay, and can inject 500s, 429s,
+malformed bodies and hung requests at chosen rates. Point the API at it
+to load-test grading without spending real API credit:
+
+    python mock_deepseek.py --latency-ms 1500 --rate-429 0.05
+    DEEPSEEK_API_URL=http://localhost:8100/v1/chat/completions python run.py
+
+Grades are derived from a hash of the prompt, so the same submission
+always gets the same score. Requests with "stream": true get the same
+content as server-sent event chunks, the first one after
+--first-token-fraction of the sampled latency. GET /stats shows what was
+served.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+
+class MockConfig:
+    def __init__(
+            self,
+            latency_ms=800.0,
+            jitter_ms=200.0,
+            distribution="lognormal",
+            error_rate=0.0,
+            rate_429=0.0,
+            malformed_rate=0.0,
+            hang_rate=0.0,
+            hang_seconds=120.0,
+            max_concurrency=0,
+            retry_after=1.0,
+            first_token_fraction=0.2,
+            chunk_chars=16,
+            seed=None
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.malformed_rate = malformed_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.max_concurrency = max_concurrency
+        self.retry_after = retry_after
+        self.first_token_fraction = first_token_fraction
+        self.chunk_chars = chunk_chars
+        self.random = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        """Response delay in seconds drawn from the configured distribution"""
+        mean, jitter = self.latency_ms, self.jitter_ms
+        if self.distribution == "fixed" or jitter <= 0:
+            value = mean
+        elif self.distribution == "uniform":
+            value = self.random.uniform(mean - jitter, mean + jitter)
+        elif self.distribution == "normal":
+            value = self.random.gauss(mean, jitter)
+        else:
+            # Long right tail like real LLM latency; mean stays at latency_ms
+            sigma = min(2.0, jitter / mean) if mean > 0 else 0.0
+            value = self.random.lognormvariate(0, sigma) * mean / math.exp(sigma ** 2 / 2)
+        return max(0.0, value) / 1000
+
+    def pick_fault(self) -> str:
+        """Which failure (if any) this request gets"""
+        roll = self.random.random()
+        for fault, rate in (
+                ("error", self.error_rate),
+                ("rate_limited", self.rate_429),
+                ("malformed", self.malformed_rate),
+                ("hang", self.hang_rate)
+        ):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return "ok"
+
+
+def prompt_text(body: dict) -> str:
+    return "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+
+
+def fake_grades(prompt: str) -> dict:
+    """Deterministic grading JSON for a prompt"""
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    task_completeness, code_quality, correctness = (55 + digest[i] % 46 for i in range(3))
+    return {
+        "task_completeness": task_completeness,
+        "code_quality": code_quality,
+        "correctness": correctness,
+        "total": round((task_completeness + code_quality + correctness) / 3),
+        "overall_feedback": "Solid attempt. The main logic works; a few edge cases and naming could be improved.",
+        "task_completeness_feedback": "Most requirements are implemented.",
+        "code_quality_feedback": "Readable structure; consider smaller functions and clearer names.",
+        "correctness_feedback": "Handles the common cases; check empty and boundary inputs."
+    }
+
+
+def completion(body: dict, content: str, prompt_tokens: int) -> dict:
+    completion_tokens = len(content) // 4 + 1
+    return {
+        "id": f"mock-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "deepseek-chat"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+def stream_chunks(body: dict, content: str, prompt_tokens: int, config: MockConfig, latency: float, complete: bool):
+    """Server-sent events spreading content over the rest of the latency"""
+    chunk_id = f"mock-{uuid.uuid4().hex[:12]}"
+    pieces = [content[i:i + config.chunk_chars] for i in range(0, len(content), config.chunk_chars)]
+    pause = latency * (1 - config.first_token_fraction) / max(1, len(pieces))
+
+    def event(payload: dict) -> str:
+        return f"data: {json.dumps(payload)}\n\n"
+
+    async def generate():
+        await asyncio.sleep(latency * config.first_token_fraction)
+        yield event({
+            "id": chunk_id, "object": "chat.completion.chunk", "model": body.get("model", "deepseek-chat"),
+            "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]
+        })
+        for piece in pieces:
+            yield event({
+                "id": chunk_id, "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+            })
+            await asyncio.sleep(pause)
+        if not complete:
+            # Connection "drops" before the stream finishes
+            return
+        completion_tokens = len(content) // 4 + 1
+        yield event({
+            "id": chunk_id, "object": "chat.completion.chunk",
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+        yield "data: [DONE]\n\n"
+
+    return generate()
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    app = FastAPI(title="Mock DeepSeek API")
+    state = {"in_flight": 0, "max_in_flight": 0, "requests": 0, "outcomes": {}, "latency_ms": 0.0}
+
+    def count(outcome: str):
+        state["outcomes"][outcome] = state["outcomes"].get(outcome, 0) + 1
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        state["requests"] += 1
+        body = await request.json()
+
+        if config.max_concurrency and state["in_flight"] >= config.max_concurrency:
+            count("rate_limited")
+            return JSONResponse(
+                {"error": {"message": "Too many concurrent requests", "type": "rate_limit_error"}},
+                status_code=429,
+                headers={"Retry-After": str(config.retry_after)}
+            )
+
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        started = time.perf_counter()
+        try:
+            fault = config.pick_fault()
+            streamed = bool(body.get("stream"))
+            latency = config.sample_latency()
+            if fault == "hang":
+                await asyncio.sleep(config.hang_seconds)
+            elif not streamed or fault in ("error", "rate_limited"):
+                await asyncio.sleep(latency)
+            count(fault)
+
+            if fault == "error":
+                return JSONResponse(
+                    {"error": {"message": "Internal server error", "type": "server_error"}},
+                    status_code=500
+                )
+            if fault == "rate_limited":
+                return JSONResponse(
+                    {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                    status_code=429,
+                    headers={"Retry-After": str(config.retry_after)}
+                )
+
+            prompt = prompt_text(body)
+            content = json.dumps(fake_grades(prompt), indent=2)
+            if streamed:
+                return StreamingResponse(
+                    stream_chunks(body, content, len(prompt) // 4 + 1, config, latency, fault != "malformed"),
+                    media_type="text/event-stream"
+                )
+            if fault == "malformed":
+                if config.random.random() < 0.5:
+                    return PlainTextResponse("<html><body>502 Bad Gateway</body></html>")
+                # Valid envelope, but the model's JSON was cut off mid-object
+                content = "Here is the grade:\n" + content[:len(content) // 2]
+
+            return completion(body, content, len(prompt) // 4 + 1)
+        finally:
+            state["in_flight"] -= 1
+            state["latency_ms"] += (time.perf_counter() - started) * 1000
+
+    @app.get("/stats")
+    async def stats():
+        served = sum(state["outcomes"].values())
+        return {
+            "requests": state["requests"],
+            "in_flight": state["in_flight"],
+            "max_in_flight": state["max_in_flight"],
+            "outcomes": state["outcomes"],
+            "avg_latency_ms": round(state["latency_ms"] / served, 1) if served else 0.0
+        }
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        state.update({"requests": 0, "max_in_flight": state["in_flight"], "outcomes": {}, "latency_ms": 0.0})
+        return {"reset": True}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local DeepSeek chat-completions stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Mean response delay")
+    parser.add_argument("--jitter-ms", type=float, default=200.0, help="Spread of the delay")
+    parser.add_argument("--distribution", choices=["fixed", "uniform", "normal", "lognormal"], default="lognormal")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction answered with HTTP 500")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction answered with HTTP 429")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction with an unparseable body")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction that never answer in time")
+    parser.add_argument("--hang-seconds", type=float, default=120.0)
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                        help="Answer 429 above this many concurrent requests (0 = unlimited)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--first-token-fraction", type=float, default=0.2,
+                        help="Share of the latency before the first streamed chunk")
+    parser.add_argument("--chunk-chars", type=int, default=16, help="Characters per streamed chunk")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        distribution=args.distribution,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        malformed_rate=args.malformed_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        max_concurrency=args.max_concurrency,
+        retry_after=args.retry_after,
+        first_token_fraction=args.first_token_fraction,
+        chunk_chars=args.chunk_chars,
+        seed=args.seed
+    )
+
+    print(f"🤖 Mock DeepSeek on http://{args.host}:{args.port}/v1/chat/completions")
+    print(f"   latency {args.distribution} {args.latency_ms:.0f}±{args.jitter_ms:.0f}ms, "
+          f"500s {args.error_rate:.0%}, 429s {args.rate_429:.0%}, malformed {args.malformed_rate:.0%}, "
+          f"hangs {args.hang_rate:.0%}")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
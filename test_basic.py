@@ -128,7 +128,7 @@ def test_admin_endpoints(token):
         # Test get teachers
         response = requests.get(f"{BASE_URL}/admin/teachers", headers=headers)
         if response.status_code == 200:
-            teachers = response.json()
+            teachers = response.json()["items"]
             print(f"✓ Admin can view teachers ({len(teachers)} found)")
         else:
             print(f"✗ Admin teachers endpoint failed: {response.status_code}")
@@ -136,7 +136,7 @@ def test_admin_endpoints(token):
         # Test get groups
         response = requests.get(f"{BASE_URL}/admin/groups", headers=headers)
         if response.status_code == 200:
-            groups = response.json()
+            groups = response.json()["items"]
             print(f"✓ Admin can view groups ({len(groups)} found)")
         else:
             print(f"✗ Admin groups endpoint failed: {response.status_code}")
@@ -153,7 +153,7 @@ def test_teacher_endpoints(token):
         # Test get homework
         response = requests.get(f"{BASE_URL}/teacher/homework", headers=headers)
         if response.status_code == 200:
-            homework = response.json()
+            homework = response.json()["items"]
             print(f"✓ Teacher can view homework ({len(homework)} found)")
         else:
             print(f"✗ Teacher homework endpoint failed: {response.status_code}")
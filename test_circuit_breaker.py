@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker test for Homework Management System
+Drives AIService.post_with_retries against an upstream that always answers
+503 and checks the breaker state after each call:
+closed -> open -> half_open -> failed probe -> open, and that a
+successful probe closes it again. No AI API is called.
+
+    pytest test_circuit_breaker.py        (or: python test_circuit_breaker.py)
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Must be set before the AI service reads its settings
+os.environ.setdefault("DEEPSEEK_API_KEY", "circuit-breaker-test")
+os.environ["AI_RETRY_BASE_DELAY"] = "0"
+
+import httpx
+
+from app.services import ai_service
+from app.services.ai_service import AIService, AIUnavailableError
+from app.services.circuit_breaker import CircuitBreaker
+
+RESET_SECONDS = 1.0  # Long enough that a slow probe attempt is not taken for a stuck one
+
+
+class FakeUpstream:
+    """Stands in for AIService._send: 503 until healthy, then a completion"""
+
+    def __init__(self):
+        self.healthy = False
+        self.calls = 0
+
+    async def __call__(self, provider, payload):
+        self.calls += 1
+        if self.healthy:
+            return 200, {"choices": [{"message": {"content": "{}"}}]}, httpx.Headers(), ""
+        return 503, None, httpx.Headers(), "overloaded"
+
+
+async def call(service: AIService) -> bool:
+    """Whether one grading call got a result"""
+    try:
+        await service.post_with_retries(None, "prompt", 10)
+        return True
+    except AIUnavailableError:
+        return False
+
+
+async def run_breaker_cycle() -> list:
+    """Breaker state seen after each step"""
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=RESET_SECONDS)
+    upstream = FakeUpstream()
+    service = AIService()
+    service._send = upstream
+    original, ai_service.ai_breaker = ai_service.ai_breaker, breaker
+    states = []
+    try:
+        assert not await call(service)
+        states.append(breaker.current_state())  # one failed call: still closed
+
+        assert not await call(service)
+        states.append(breaker.current_state())  # threshold reached: open
+
+        sent = upstream.calls
+        assert not await call(service)
+        assert upstream.calls == sent, "an open breaker must not call upstream"
+
+        time.sleep(RESET_SECONDS)
+        states.append(breaker.current_state())  # half_open: one probe allowed
+
+        sent = upstream.calls
+        assert not await call(service)
+        assert upstream.calls == sent + 1, "the half-open breaker allows exactly one probe attempt"
+        states.append(breaker.current_state())  # failed probe: open again
+
+        time.sleep(RESET_SECONDS)
+        upstream.healthy = True
+        assert await call(service)
+        states.append(breaker.current_state())  # successful probe: closed
+    finally:
+        ai_service.ai_breaker = original
+    return states
+
+
+def test_failed_probe_reopens_breaker():
+    assert asyncio.run(run_breaker_cycle()) == ["closed", "open", "half_open", "open", "closed"]
+
+
+def main():
+    print("🔌 Circuit Breaker Check")
+    print("=" * 50)
+    states = asyncio.run(run_breaker_cycle())
+    print(" -> ".join(states))
+    if states != ["closed", "open", "half_open", "open", "closed"]:
+        print("❌ Unexpected breaker states")
+        sys.exit(1)
+    print("✓ A failed probe reopens the breaker and a successful one closes it")
+
+
+if __name__ == "__main__":
+    main()
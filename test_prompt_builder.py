@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Prompt compaction test for Homework Management System
+Checks that comment stripping (AI_PROMPT_STRIP_COMMENTS) removes only
+comments: code after a block comment on the same line survives, and
+Python lines inside triple-quoted strings are kept as string content.
+
+    pytest test_prompt_builder.py        (or: python test_prompt_builder.py)
+"""
+
+import os
+import sys
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.prompt_builder import strip_comment_lines
+
+C_SOURCE = """int a = 1;
+/* init */ int b = 2;
+// helper
+    /* one */ /* two */ int c = 3; // trailing
+/* multi
+   line */ int d = 4;
+/*
+ * doc
+ */
+
+int e = a + b + c + d;"""
+
+C_EXPECTED = """int a = 1;
+int b = 2;
+    int c = 3; // trailing
+int d = 4;
+
+int e = a + b + c + d;"""
+
+PY_SOURCE = '''# module comment
+HELP = """Usage:
+# not a comment, part of the help text
+"""
+x = '#' # trailing
+    # indented comment
+doc = \'\'\'one line\'\'\'
+# after a closed string
+y = 2'''
+
+PY_EXPECTED = '''HELP = """Usage:
+# not a comment, part of the help text
+"""
+x = '#' # trailing
+doc = \'\'\'one line\'\'\'
+y = 2'''
+
+
+def test_block_comment_followed_by_code():
+    assert strip_comment_lines(C_SOURCE, ".c") == C_EXPECTED
+
+
+def test_hash_lines_inside_python_strings_are_kept():
+    assert strip_comment_lines(PY_SOURCE, ".py") == PY_EXPECTED
+
+
+def main():
+    print("✂️  Comment Stripping Check")
+    print("=" * 50)
+    ok = True
+    for name, source, extension, expected in (
+            ("C block comments", C_SOURCE, ".c", C_EXPECTED),
+            ("Python strings", PY_SOURCE, ".py", PY_EXPECTED)
+    ):
+        result = strip_comment_lines(source, extension)
+        if result == expected:
+            print(f"✓ {name}")
+        else:
+            ok = False
+            print(f"❌ {name}:\n{result}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Query count test for Homework Management System
+Calls the list endpoints through the app with a few rows and with many,
+and checks that the number of SQL statements per request (from the
+per-request query statistics) stays the same. A count that grows with
+the rows is an N+1 loop.
+
+    pytest test_query_counts.py        (or: python test_query_counts.py)
+
+Always runs against a scratch SQLite file, never the configured database.
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Must be set before the app (and its engine) is imported
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "query_counts.db")
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import SessionLocal
+from app.models import User, Group, Homework, Submission
+from app.utils.security import get_password_hash
+from app.utils.query_stats import query_stats
+
+PASSWORD = "query-count-password"
+FEW_ROWS = 2
+MANY_ROWS = 25
+
+# Route -> (role that calls it, statements per request once the auth cache is warm)
+LIST_ENDPOINTS = {
+    "/admin/groups": ("admin", 1),
+    "/teacher/groups": ("teacher", 1),
+    "/teacher/homework": ("teacher", 1)
+}
+
+
+def create_users() -> int:
+    """Admin and teacher accounts; returns the teacher id"""
+    db = SessionLocal()
+    try:
+        password_hash = get_password_hash(PASSWORD)
+        db.add(User(fullname="Count Admin", username="count_admin", password_hash=password_hash, role="admin"))
+        teacher = User(fullname="Count Teacher", username="count_teacher", password_hash=password_hash, role="teacher")
+        db.add(teacher)
+        db.commit()
+        return teacher.id
+    finally:
+        db.close()
+
+
+def add_rows(teacher_id: int, count: int):
+    """Add groups with two students each, and homework with a submission per student"""
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        for _ in range(count):
+            group = Group(name="Count group", teacher_id=teacher_id)
+            db.add(group)
+            db.flush()
+            students = [
+                User(fullname="Count Student", username=f"count_s_{group.id}_{i}",
+                     password_hash="x", role="student", group_id=group.id)
+                for i in range(2)
+            ]
+            homework = Homework(
+                title="Count homework", description="d", points=10, start_date=now - timedelta(days=1),
+                deadline=now + timedelta(days=1), line_limit=300, teacher_id=teacher_id,
+                group_id=group.id, file_extension=".py", ai_grading_prompt="p"
+            )
+            db.add_all(students + [homework])
+            db.flush()
+            db.add_all([
+                Submission(homework_id=homework.id, student_id=student.id, ai_grade=5, final_grade=5,
+                           ai_feedback="ok", grading_status="graded")
+                for student in students
+            ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def login(client: TestClient, username: str) -> dict:
+    response = client.post("/auth/login", json={"username": username, "password": PASSWORD, "device_name": "test"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def count_queries(client: TestClient, path: str, headers: dict) -> int:
+    """SQL statements run by one GET request"""
+    query_stats.reset()
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return query_stats.report()[f"GET {path}"]["queries"]
+
+
+def measure_query_counts() -> dict:
+    """Path -> (statements with FEW_ROWS rows, statements with MANY_ROWS rows)"""
+    with TestClient(app) as client:
+        teacher_id = create_users()
+        headers = {"admin": login(client, "count_admin"), "teacher": login(client, "count_teacher")}
+
+        add_rows(teacher_id, FEW_ROWS)
+        few = {}
+        for path, (role, _) in LIST_ENDPOINTS.items():
+            count_queries(client, path, headers[role])  # Warm the identity cache
+            few[path] = count_queries(client, path, headers[role])
+
+        add_rows(teacher_id, MANY_ROWS - FEW_ROWS)
+        return {
+            path: (few[path], count_queries(client, path, headers[role]))
+            for path, (role, _) in LIST_ENDPOINTS.items()
+        }
+
+
+def test_list_endpoints_run_constant_queries():
+    counts = measure_query_counts()
+    growing = {path: pair for path, pair in counts.items() if pair[0] != pair[1]}
+    assert not growing, f"Query count grows with rows ({FEW_ROWS} -> {MANY_ROWS}): {growing}"
+    # A count of 0 would mean the statement hooks stopped counting
+    unexpected = {
+        path: (pair, LIST_ENDPOINTS[path][1]) for path, pair in counts.items()
+        if pair != (LIST_ENDPOINTS[path][1],) * 2
+    }
+    assert not unexpected, f"Unexpected query counts (measured, expected): {unexpected}"
+
+
+def main():
+    print("🔢 Query Count Check")
+    print("=" * 50)
+    ok = True
+    for path, (few, many) in measure_query_counts().items():
+        expected = LIST_ENDPOINTS[path][1]
+        mark = "✓" if few == many == expected else "❌"
+        ok = ok and few == many == expected
+        print(f"{mark} GET {path}: {few} queries with {FEW_ROWS} rows, {many} with {MANY_ROWS} "
+              f"(expected {expected})")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Query plan test for Homework Management System
+Seeds a scratch database with enough rows that the planner prefers
+indexes, runs the service queries behind each hot endpoint and EXPLAINs
+the SQL they issued. Fails if any of them reads a large table with a
+full scan, i.e. an index from app/models/ is missing or unusable.
+
+    pytest test_query_plans.py        (or: python test_query_plans.py)
+
+Uses an in-memory SQLite database by default. Set QUERY_PLAN_DATABASE_URL
+to check PostgreSQL instead - its tables are dropped and recreated.
+Queries that read whole tables by design (leaderboard rebuild, grading
+status counts, admin lists of every group or student) are not checked.
+"""
+
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.dependencies.auth import resolve_user
+from app.models import User, Session as UserSession, Group, Homework, Submission, SubmissionFile, Grade
+from app.schemas.regrade import RegradeRequest
+from app.services import (
+    AuthService,
+    ExportService,
+    GradeService,
+    GroupService,
+    HomeworkService,
+    LeaderboardService,
+    GradingService,
+    RegradeService,
+    UserService
+)
+from app.utils.pagination import encode_cursor
+
+QUERY_PLAN_DATABASE_URL = os.getenv("QUERY_PLAN_DATABASE_URL", "sqlite://")
+
+GROUPS = 40
+STUDENTS_PER_GROUP = 50
+HOMEWORK_PER_GROUP = 10
+SUBMISSIONS_PER_STUDENT = 6
+SESSIONS_PER_USER = 2
+# Mostly graded, with a few submissions in every other state
+GRADING_STATUS_MIX = ["graded"] * 46 + ["pending", "grading", "needs_regrade", "failed"]
+
+# Tables seeded with thousands of rows; a full scan of these is a missing index
+LARGE_TABLES = {"users", "sessions", "homework", "submissions", "submission_files", "grades"}
+
+
+def create_plan_engine():
+    if QUERY_PLAN_DATABASE_URL.startswith("sqlite"):
+        return create_engine(
+            QUERY_PLAN_DATABASE_URL,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+    return create_engine(QUERY_PLAN_DATABASE_URL)
+
+
+def seed(engine) -> dict:
+    """Fill the tables and return ids used by the checked queries"""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    now = datetime.utcnow()
+    users, groups, homework, sessions = [], [], [], []
+    submissions, files, grades = [], [], []
+
+    users.append({"id": 1, "fullname": "Admin", "username": "admin", "password_hash": "x", "role": "admin"})
+    next_user_id = 2
+    for g in range(1, GROUPS + 1):
+        teacher_id = next_user_id
+        next_user_id += 1
+        users.append({"id": teacher_id, "fullname": f"Teacher {g}", "username": f"teacher{g}",
+                      "password_hash": "x", "role": "teacher"})
+        groups.append({"id": g, "name": f"Group {g}", "teacher_id": teacher_id})
+
+        homework_ids = []
+        for h in range(HOMEWORK_PER_GROUP):
+            homework_id = len(homework) + 1
+            homework_ids.append(homework_id)
+            homework.append({
+                "id": homework_id, "title": f"Homework {homework_id}", "description": "d", "points": 100,
+                "start_date": now - timedelta(days=30 - h), "deadline": now + timedelta(days=h - 3),
+                "line_limit": 300, "teacher_id": teacher_id, "group_id": g, "file_extension": ".py",
+                "ai_grading_prompt": "p", "created_at": now - timedelta(days=30 - h)
+            })
+
+        for s in range(STUDENTS_PER_GROUP):
+            student_id = next_user_id
+            next_user_id += 1
+            users.append({"id": student_id, "fullname": f"Student {student_id}", "username": f"student{student_id}",
+                          "password_hash": "x", "role": "student", "group_id": g})
+            for k in range(SESSIONS_PER_USER):
+                sessions.append({
+                    "user_id": student_id, "token": f"token-{student_id}-{k}", "device_name": "bench",
+                    "ip_address": "127.0.0.1", "expires_at": now + timedelta(days=k * 2 - 1)
+                })
+            for k in range(SUBMISSIONS_PER_STUDENT):
+                submission_id = len(submissions) + 1
+                submitted_at = now - timedelta(days=20 - k, minutes=student_id % 60)
+                submissions.append({
+                    "id": submission_id, "homework_id": homework_ids[k], "student_id": student_id,
+                    "submitted_at": submitted_at, "ai_grade": 80, "final_grade": 80, "ai_feedback": "ok",
+                    "grading_status": GRADING_STATUS_MIX[submission_id % len(GRADING_STATUS_MIX)],
+                    "grading_attempts": 1, "graded_at": submitted_at
+                })
+                files.append({"submission_id": submission_id, "file_name": "main.py",
+                               "content": "print(1)\n", "line_count": 2})
+                grades.append({
+                    "submission_id": submission_id, "ai_task_completeness": 80, "ai_code_quality": 80,
+                    "ai_correctness": 80, "ai_total": 80, "final_task_completeness": 80,
+                    "final_code_quality": 80, "final_correctness": 80, "ai_feedback": "ok",
+                    "task_completeness_feedback": "ok", "code_quality_feedback": "ok",
+                    "correctness_feedback": "ok"
+                })
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [u for u in users if u["role"] != "student"])
+        conn.execute(insert(Group), groups)
+        conn.execute(insert(User), [u for u in users if u["role"] == "student"])
+        for model, rows in ((Homework, homework), (UserSession, sessions), (Submission, submissions),
+                            (SubmissionFile, files), (Grade, grades)):
+            conn.execute(insert(model), rows)
+        conn.execute(text("ANALYZE"))
+
+    student = users[2]
+    return {
+        "admin_id": 1,
+        "group_id": student["group_id"],
+        "teacher_id": groups[0]["teacher_id"],
+        "student_id": student["id"],
+        "student_username": student["username"],
+        "homework_id": homework[0]["id"],
+        "open_homework_id": homework[SUBMISSIONS_PER_STUDENT]["id"],
+        "submission_id": 1
+    }
+
+
+def service_queries(ids: dict) -> dict:
+    """Name -> callable(db) for each service query that serves a request"""
+    g, t, s = ids["group_id"], ids["teacher_id"], ids["student_id"]
+    h, sub = ids["homework_id"], ids["submission_id"]
+    files = [{"file_name": "main.py", "content": "print(2)\n"}]
+    # Cursors as a previous page would hand them out
+    submission_cursor = encode_cursor([datetime.utcnow() - timedelta(days=1), sub])
+    homework_cursor = encode_cursor([datetime.utcnow() - timedelta(days=1), h])
+
+    def regrade(db):
+        job = RegradeService.create_job(db, h, ids["admin_id"], RegradeRequest(), t)
+        RegradeService.next_batch(db, job.id, 20)
+
+    return {
+        "login": lambda db: AuthService.get_user_with_session_count(db, ids["student_username"]),
+        "resolve_user": lambda db: resolve_user(db, "plan-token", s),
+        "user_sessions": lambda db: AuthService.get_user_sessions(db, s),
+        "cleanup_expired_sessions": AuthService.cleanup_expired_sessions,
+        "list_teachers": lambda db: UserService.get_users(db, "teacher"),
+        "list_group_students": lambda db: UserService.get_users(db, "student", g),
+        "get_student": lambda db: UserService.get_user(db, s, "student"),
+        "count_group_students": lambda db: GroupService.count_students(db, g),
+        "teacher_groups": lambda db: GroupService.get_teacher_groups(db, t),
+        "teacher_group": lambda db: GroupService.get_teacher_group(db, g, t),
+        "teacher_homework": lambda db: HomeworkService.get_teacher_homework(db, t),
+        "teacher_homework_rows": lambda db: HomeworkService.get_teacher_homework_rows(db, t),
+        "teacher_homework_next_page": lambda db: HomeworkService.get_teacher_homework(db, t, homework_cursor),
+        "student_homework": lambda db: HomeworkService.get_student_homework(db, s),
+        "student_homework_rows": lambda db: HomeworkService.get_student_homework_rows(db, s),
+        "homework_detail": lambda db: HomeworkService.get_homework_by_id(db, h, s, "student"),
+        "count_submissions": lambda db: HomeworkService.count_submissions(db, h),
+        "duplicate_submission_check": lambda db: HomeworkService.prepare_submission(
+            db, ids["open_homework_id"], s, files
+        ),
+        "student_submissions": lambda db: GradeService.get_student_submissions(db, s),
+        "student_submission_rows": lambda db: GradeService.get_student_submission_rows(db, s),
+        "student_submissions_next_page": lambda db: GradeService.get_student_submissions(
+            db, s, cursor=submission_cursor
+        ),
+        "group_submissions": lambda db: GradeService.get_group_submissions(db, g, t),
+        "group_submission_rows": lambda db: GradeService.get_group_submission_rows(db, g, t),
+        "homework_submissions": lambda db: GradeService.get_group_submissions(db, g, t, h),
+        "group_submissions_next_page": lambda db: GradeService.get_group_submission_rows(
+            db, g, t, cursor=submission_cursor, with_total=True
+        ),
+        "export_submissions": lambda db: db.execute(ExportService.submissions_statement(g, t)).all(),
+        "export_gradebook": lambda db: db.execute(ExportService.gradebook_statement(g, [h])).all(),
+        "student_grade": lambda db: GradeService.get_student_submission_grade(db, sub, s),
+        "teacher_grade": lambda db: GradeService.get_teacher_submission_grade(db, sub, t),
+        "live_group_leaderboard": lambda db: GradeService.get_group_leaderboard(db, g, "week"),
+        "group_leaderboard": lambda db: LeaderboardService.get_group_leaderboard(db, g, "week"),
+        "regrade_backlog": lambda db: GradingService.get_regrade_submission_ids(db, 20),
+        "stale_grading": lambda db: GradingService.get_stale_grading_submission_ids(db, 20),
+        "unfinished_submissions": GradingService.get_unfinished_submission_ids,
+        "regrade_job": regrade
+    }
+
+
+class StatementRecorder:
+    """Collects the SQL (with parameters) sent while recording is on"""
+
+    def __init__(self):
+        self.recording = False
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.recording and not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            self.statements.append((statement, parameters))
+
+
+def full_scans(conn, statement, parameters) -> list:
+    """Large tables the statement's plan reads in full"""
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        details = [row[-1] for row in rows]
+        # "SCAN users", "SCAN users_1", "SCAN users USING INDEX ..." (full index walk)
+        tables = [re.sub(r"_\d+$", "", m.group(1)) for d in details for m in [re.match(r"SCAN (\w+)", d)] if m]
+    else:
+        rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).fetchall()
+        tables = re.findall(r"Seq Scan on (\w+)", "\n".join(row[0] for row in rows))
+    return sorted({table for table in tables if table in LARGE_TABLES})
+
+
+def collect_plan_failures() -> dict:
+    """Query name -> [(table, statement)] for every full scan found"""
+    engine = create_plan_engine()
+    ids = seed(engine)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+    recorder = StatementRecorder()
+    event.listen(engine, "before_cursor_execute", recorder)
+
+    failures = {}
+    for name, query in service_queries(ids).items():
+        db = SessionLocal()
+        recorder.statements = []
+        recorder.recording = True
+        try:
+            query(db)
+        finally:
+            recorder.recording = False
+            db.rollback()
+
+        assert recorder.statements, f"{name} ran no SQL"
+        with engine.connect() as conn:
+            for statement, parameters in recorder.statements:
+                for table in full_scans(conn, statement, parameters):
+                    failures.setdefault(name, []).append((table, " ".join(statement.split())))
+        db.close()
+
+    engine.dispose()
+    return failures
+
+
+def test_service_queries_use_indexes():
+    failures = collect_plan_failures()
+    assert not failures, "Full scans of large tables:\n" + "\n".join(
+        f"  {name}: {table} <- {statement[:200]}"
+        for name, scans in failures.items() for table, statement in scans
+    )
+
+
+def main():
+    print("🔎 Query Plan Check")
+    print("=" * 50)
+    failures = collect_plan_failures()
+    if not failures:
+        print("✓ Every checked service query uses an index on the large tables")
+        sys.exit(0)
+
+    for name, scans in failures.items():
+        for table, statement in scans:
+            print(f"❌ {name}: full scan of {table}")
+            print(f"   {statement[:200]}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()